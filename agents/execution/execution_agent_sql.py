@@ -6,15 +6,16 @@ from datetime import datetime
 import pandas as pd
 from core.time_context.time_context import get_simulation_date
 from core.config.config import settings, FeatureGroupConfig
-from core.data_provider.data_provider import load_data, fetch_stock_data
+from core.data_provider.data_provider import load_data, fetch_stock_data, fetch_stock_data_many
 from core.logger.logger import logger
 from core.logger.system_logger import log_event
 from db.conflict_utils import insert_with_conflict_handling
-from db.postgres_manager import run_query
-from services.exit_policy_evaluator import get_exit_probability
+from db.position_store import PositionStore
+from services.exit_policy_evaluator import get_exit_probabilities
 from db.replay_buffer_sql import SQLReplayBuffer  as ReplayBuffer
 from core.feature_engineering.feature_enricher_multi import enrich_multi_interval_features
-from core.event_bus import publish_event
+from core.event_bus import publish_event, publish_events, flush_events
+from agents.execution.exit_engine import decide_exits
 from agents.execution.trade_execution_helper import TradeExecutionHelper
 
 CAPITAL_PER_TRADE = settings.capital_per_trade
@@ -44,6 +45,7 @@ class ExecutionAgentSQL:
         self.today_str = self.today.strftime("%Y-%m-%d")
         self.prefix = "🔨 [EXEC] "
         self.executor = TradeExecutionHelper(self.today, dry_run=self.dry_run, prefix=self.prefix)
+        self.position_store = PositionStore(TABLE_OPEN_POS)
 
     def load_signals(self) -> pd.DataFrame:
         df = safe_load_table(TABLE_RECS, FeatureGroupConfig.recommendation_columns)
@@ -100,6 +102,25 @@ class ExecutionAgentSQL:
         })
         return row["open"], row["high"], row["low"], row["close"]
 
+    def load_today_ohlc_many(self, symbols: list) -> pd.DataFrame:
+        """Today's bar for every symbol from one price query, indexed by symbol; BAR events go out as one batch."""
+        frames = fetch_stock_data_many(symbols, days=1)
+        rows, events = {}, []
+        for sym, df in frames.items():
+            if df is None or df.empty:
+                logger.error(f"{self.prefix}"+str(f"No OHLC data for {sym}"))
+                continue
+            row = df.iloc[-1]
+            rows[sym] = row[["open", "high", "low", "close"]]
+            events.append(("BAR", {
+                "symbol": sym,
+                "interval": "day",
+                "ohlcv": row[["open", "high", "low", "close", "volume"]].to_dict(),
+                "timestamp": self.now_str
+            }))
+        publish_events(events)
+        return pd.DataFrame.from_dict(rows, orient="index", columns=["open", "high", "low", "close"])
+
     def exit_trades(self, open_positions: pd.DataFrame):
         if open_positions.empty:
             return open_positions.copy(), pd.DataFrame(columns=[
@@ -108,58 +129,49 @@ class ExecutionAgentSQL:
                 "interval"
             ])
 
-        remaining, exited = [], []
-        for _, pos in open_positions.iterrows():
-            sym = pos["stock"]
-            ohlc = self.load_today_ohlc(sym)
-            if not ohlc:
-                remaining.append(pos)
-                continue
-            proba = get_exit_probability(pos)
-            if proba >= 0.6:
-                logger.success(f"Exiting {sym} (proba={proba:.2f})", prefix=self.prefix)
-                # per‐share PnL
-                entry_price = float(pos.get("entry_price", 0))
-                pnl_per_share = ohlc[-1] - entry_price
-                # use persisted quantity and compute total profit
-                qty = int(pos.get("quantity", 0))
-                profit = pnl_per_share * qty
-                publish_event("TRADE_CLOSE", {
-                    "symbol": sym,
-                    "exit_price": ohlc[-1],
-                    "reward": pnl_per_share,
-                    "timestamp": self.today,
-                    "strategy_config": pos.get("strategy_config", {})
-                })
-                exited.append({
-                    "timestamp": self.today,
-                    "stock": sym,
-                    "action": "sell",
-                    "price": ohlc[-1],
-                    "quantity": qty,
-                    "profit": profit,
-                    "strategy_config": pos.get("strategy_config", {}),
-                    "interval": pos.get("interval", "day"),
-                    "signal_reason": "ml_exit_high_confidence",
-                    "source": "execution_agent",
-                    "imported_at": datetime.now(),
-                })
+        bars = self.load_today_ohlc_many(open_positions["stock"].tolist())
+        with_bar = open_positions["stock"].isin(bars.index)
+        proba = get_exit_probabilities(open_positions[with_bar], today=self.today)
+        decisions = decide_exits(open_positions, bars["close"], proba, self.today)
+
+        exits = decisions[decisions["exit"]]
+        exiting = open_positions.loc[exits.index].reindex(columns=["strategy_config", "interval"])
+        configs = [c if isinstance(c, (dict, str)) else {} for c in exiting["strategy_config"]]
+        for sym, reason, p in zip(exits["stock"], exits["decision"], exits["proba"]):
+            logger.success(f"Exiting {sym} ({reason}, proba={p:.2f})", prefix=self.prefix)
+        publish_events(
+            ("TRADE_CLOSE", {
+                "symbol": sym,
+                "exit_price": price,
+                "reward": reward,
+                "timestamp": self.today,
+                "strategy_config": cfg
+            })
+            for sym, price, reward, cfg in zip(exits["stock"], exits["close"], exits["pnl_per_share"], configs)
+        )
+        exited_df = pd.DataFrame({
+            "timestamp": self.today,
+            "stock": exits["stock"].to_numpy(),
+            "action": "sell",
+            "price": exits["close"].to_numpy(),
+            "quantity": exits["quantity"].to_numpy(),
+            "profit": exits["profit"].to_numpy(),
+            "strategy_config": configs,
+            "interval": exiting["interval"].fillna("day").to_numpy(),
+            "signal_reason": exits["decision"].to_numpy(),
+            "source": "execution_agent",
+            "imported_at": datetime.now(),
+        })
 
-            elif proba >= 0.4:
-                logger.info(f"{self.prefix}"+str(f"Borderline exit skipped for {sym} (proba={proba:.2f})"))
-                remaining.append(pos)
-            else:
-                logger.info(f"Holding {sym}, exit proba too low ({proba:.2f})", prefix=self.prefix)
-                # Estimate days held and unrealized PnL
-                entry_price = float(pos.get("entry_price", 0))
-                days_held = (self.today - pd.to_datetime(pos.get("entry_date", self.today))).days
-                pnl = ohlc[-1] - entry_price if entry_price else 0.0
-                cap_eff = pnl / entry_price if entry_price else 0.0
-                self.publish_m2m_update(sym, days_held=days_held, capital_efficiency=cap_eff, unrealized_pnl=pnl)
-                remaining.append(pos)
-
-        remaining_df = pd.DataFrame(remaining, columns=open_positions.columns)
-        exited_df = pd.DataFrame(exited)
+        borderline = decisions[decisions["decision"] == "borderline"]
+        if not borderline.empty:
+            logger.info(f"{self.prefix}"+str(f"Borderline exits skipped for {len(borderline)} positions: {borderline['stock'].tolist()}"))
+        holds = decisions[decisions["decision"] == "hold"]
+        if not holds.empty:
+            logger.info(f"Holding {len(holds)} positions, exit proba too low", prefix=self.prefix)
+            self.publish_m2m_updates(holds)
+
+        remaining_df = open_positions[~decisions["exit"]].copy()
         return remaining_df, exited_df
 
     def enter_trades(self, signals: pd.DataFrame, open_positions: pd.DataFrame):
@@ -319,22 +331,37 @@ class ExecutionAgentSQL:
 
         return pd.concat([open_positions, pd.DataFrame(new_positions)], ignore_index=True)
 
+    def _m2m_payload(self, symbol: str, days_held: int, capital_efficiency: float = 0.0, unrealized_pnl: float = 0.0) -> dict:
+        return {
+            "event_type": "M2M_PNL",
+            "timestamp": self.now_str,
+            "symbol": symbol,
+            "days_held": days_held,
+            "capital_efficiency": capital_efficiency,
+            "unrealized_pnl": unrealized_pnl,
+            "interval": "day",
+            "regime_tag": None  # optional if you calculate it
+        }
+
     def publish_m2m_update(self, symbol: str, days_held: int, capital_efficiency: float = 0.0, unrealized_pnl: float = 0.0):
         try:
-            publish_event("M2M_PNL", {
-                "event_type": "M2M_PNL",
-                "timestamp": self.now_str,
-                "symbol": symbol,
-                "days_held": days_held,
-                "capital_efficiency": capital_efficiency,
-                "unrealized_pnl": unrealized_pnl,
-                "interval": "day",
-                "regime_tag": None  # optional if you calculate it
-            })
+            publish_event("M2M_PNL", self._m2m_payload(symbol, days_held, capital_efficiency, unrealized_pnl))
             logger.debug(f"{self.prefix} M2M_PNL emitted for {symbol}")
         except Exception as e:
             logger.warning(f"{self.prefix} Failed to emit M2M_PNL for {symbol}: {e}")
 
+    def publish_m2m_updates(self, decisions: pd.DataFrame):
+        """One M2M_PNL event per ``decide_exits`` row, published as a batch."""
+        try:
+            publish_events(
+                ("M2M_PNL", self._m2m_payload(sym, int(days), float(eff), float(pnl)))
+                for sym, days, eff, pnl in zip(decisions["stock"], decisions["days_held"],
+                                               decisions["capital_efficiency"], decisions["unrealized_pnl"])
+            )
+            logger.debug(f"{self.prefix} M2M_PNL emitted for {len(decisions)} positions")
+        except Exception as e:
+            logger.warning(f"{self.prefix} Failed to emit M2M_PNL for {len(decisions)} positions: {e}")
+
 
     def run(self):
         logger.start("ExecutionAgentSQL starting.", prefix=self.prefix)
@@ -342,6 +369,9 @@ class ExecutionAgentSQL:
         start_t = time.time()
         signals = self.load_signals()
         open_positions = self.load_open_positions()
+        # Not mark-as-persisted: a failed read comes back empty, and diffing
+        # against that would never close the rows really in the table
+        self.position_store.invalidate()
         open_positions, exits = self.exit_trades(open_positions)
         if not exits.empty and not self.dry_run:
             # serialize strategy_config for JSONB
@@ -349,19 +379,14 @@ class ExecutionAgentSQL:
             insert_with_conflict_handling(exits, TABLE_TRADES)
             logger.info(f"{self.prefix}"+str(f"Exited {len(exits)} positions."))
         open_positions = self.enter_trades(signals, open_positions)
-        try:
-            run_query(f'DELETE FROM "{TABLE_OPEN_POS}"', fetchall=False)
-        except Exception as e:
-            logger.warning(f"Could not clear open positions: {e}", prefix=self.prefix)
-        cols = ["stock", "entry_price", "entry_date", "quantity", "sma_short", "sma_long", "rsi_thresh", "strategy_config", "interval"]
-        if not open_positions.empty and not self.dry_run:
-            # serialize strategy_config and persist quantity
-            open_write = open_positions.copy()
-            open_write["strategy_config"] = open_write["strategy_config"].apply(json.dumps)
-            insert_with_conflict_handling(open_write[cols], TABLE_OPEN_POS)
-            logger.info(f"{self.prefix}"+str(f"{len(open_positions)} open positions saved."))
+        if not self.dry_run:
+            try:
+                self.position_store.sync(open_positions)
+            except Exception as e:
+                logger.warning(f"Could not save open positions: {e}", prefix=self.prefix)
         else:
-            logger.info(f"{self.prefix}"+str("No open positions to save."))
+            logger.info(f"{self.prefix}"+str(f"Dry run: {len(open_positions)} open positions not saved."))
+        flush_events()  # batched publisher mode: don't leave this cycle's events waiting
         elapsed = time.time() - start_t
         logger.success(f"ExecutionAgentSQL complete in {elapsed:.2f}s.", prefix=self.prefix)
         log_event("ExecutionAgentSQL", "run", "complete", "success", meta={"elapsed_sec": round(elapsed, 2)})
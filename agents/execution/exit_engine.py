@@ -0,0 +1,96 @@
+# agents/execution/exit_engine.py
+
+"""
+Vectorized exit decisions for a book of open positions.
+
+``decide_exits`` takes the positions, today's close per symbol and the exit
+model's probability per position and returns one decision row per position:
+
+* ``no_bar``      – no bar for the symbol today; the position is kept as is;
+* ``stop_loss`` / ``take_profit`` – the position's ``exit_rule`` was hit on
+  today's close (fractions of the entry price, e.g. ``0.03`` = 3 %);
+* ``ml_exit_high_confidence`` – exit probability ≥ ``exit_threshold``;
+* ``borderline``  – probability in ``[hold_threshold, exit_threshold)``; kept;
+* ``hold``        – kept, with mark-to-market numbers for an M2M update.
+"""
+
+import json
+
+import numpy as np
+import pandas as pd
+
+EXIT_REASONS = ("stop_loss", "take_profit", "ml_exit_high_confidence")
+
+
+def _exit_rule_field(strategy_config, key):
+    if isinstance(strategy_config, str):
+        try:
+            strategy_config = json.loads(strategy_config)
+        except ValueError:
+            return None
+    if not isinstance(strategy_config, dict):
+        return None
+    rule = strategy_config.get("exit_rule") or {}
+    return rule.get(key) if isinstance(rule, dict) else None
+
+
+def _rule_column(positions: pd.DataFrame, key: str) -> np.ndarray:
+    if "strategy_config" not in positions:
+        return np.zeros(len(positions))
+    values = positions["strategy_config"].map(lambda cfg: _exit_rule_field(cfg, key))
+    return pd.to_numeric(values, errors="coerce").fillna(0).to_numpy(dtype=float)
+
+
+def decide_exits(
+    positions: pd.DataFrame,
+    closes: pd.Series,
+    proba: pd.Series,
+    today,
+    exit_threshold: float = 0.6,
+    hold_threshold: float = 0.4,
+) -> pd.DataFrame:
+    """
+    Decision per row of ``positions`` (same index). ``closes`` maps symbol →
+    today's close; ``proba`` is aligned to ``positions``.
+    """
+    today = pd.to_datetime(today)
+    close = positions["stock"].map(closes).to_numpy(dtype=float)
+    has_bar = ~np.isnan(close)
+    entry_price = pd.to_numeric(positions["entry_price"], errors="coerce").fillna(0).to_numpy(dtype=float)
+    quantity = positions["quantity"] if "quantity" in positions else pd.Series(0, index=positions.index)
+    quantity = pd.to_numeric(quantity, errors="coerce").fillna(0).to_numpy(dtype=float).astype(int)
+    p = proba.reindex(positions.index).to_numpy(dtype=float)
+
+    pnl_per_share = close - entry_price
+    with np.errstate(divide="ignore", invalid="ignore"):
+        pnl_pct = np.where(entry_price != 0, pnl_per_share / entry_price, 0.0)
+
+    stop_loss = _rule_column(positions, "stop_loss")
+    take_profit = _rule_column(positions, "take_profit")
+    stop_hit = has_bar & (stop_loss > 0) & (pnl_pct <= -stop_loss)
+    target_hit = has_bar & ~stop_hit & (take_profit > 0) & (pnl_pct >= take_profit)
+    ml_exit = has_bar & ~stop_hit & ~target_hit & (p >= exit_threshold)
+    borderline = has_bar & ~(stop_hit | target_hit | ml_exit) & (p >= hold_threshold)
+
+    decision = np.select(
+        [~has_bar, stop_hit, target_hit, ml_exit, borderline],
+        ["no_bar", "stop_loss", "take_profit", "ml_exit_high_confidence", "borderline"],
+        default="hold",
+    )
+
+    entry_dates = pd.to_datetime(positions["entry_date"], errors="coerce").fillna(today)
+    days_held = (today - entry_dates).dt.days.to_numpy()
+
+    return pd.DataFrame({
+        "stock": positions["stock"].to_numpy(),
+        "decision": decision,
+        "exit": np.isin(decision, EXIT_REASONS),
+        "proba": p,
+        "close": close,
+        "quantity": quantity,
+        "pnl_per_share": pnl_per_share,
+        "profit": pnl_per_share * quantity,
+        "unrealized_pnl": np.where(entry_price != 0, pnl_per_share, 0.0),
+        "capital_efficiency": pnl_pct,
+        "days_held": days_held,
+    }, index=positions.index)
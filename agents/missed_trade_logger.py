@@ -2,7 +2,7 @@
 
 from core.data_provider.data_provider import fetch_stock_data
 from core.logger.logger import logger
-from core.event_bus import publish_event
+from core.event_bus import publish_events
 from db.db import SessionLocal
 from core.time_context.time_context import get_simulation_date
 import pandas as pd
@@ -48,19 +48,21 @@ def run_missed_trade_logger():
 
     logger.info(f"📉 Found {len(missed)} missed trade candidates on {date}.")
 
+    events = []
     for symbol in missed:
         try:
             reward = simple_backtest_profit(symbol, date)
-            publish_event("TRADE_CLOSE", {
+            events.append(("TRADE_CLOSE", {
                 "symbol": symbol,
                 "exit_price": None,
                 "reward": reward,
                 "timestamp": date + " 23:59",
                 "strategy_config": {},
                 "virtual": True
-            })
+            }))
         except Exception as e:
             logger.warning(f"⚠️ Could not simulate missed trade for {symbol}: {e}")
+    publish_events(events)
 
 if __name__ == "__main__":
     run_missed_trade_logger()
@@ -1,7 +1,6 @@
 # agents/planner_agent_sql.py
 
 from datetime import datetime
-import random
 import pandas as pd
 from tqdm import tqdm
 import pytz
@@ -11,17 +10,24 @@ from sqlalchemy import text
 from core.logger.logger import logger
 from core.config.config import settings
 from core.time_context.time_context import get_simulation_date
-from core.data_provider.data_provider import fetch_stock_data, load_data, save_data
+from core.data_provider.data_provider import fetch_stock_data, fetch_stock_data_many, load_data, save_data
 from core.feature_engineering.feature_enricher_multi import enrich_multi_interval_features
+from core.feature_engineering.incremental_features import update_features_incremental
 from core.predict.predictor import predict_dual_model
 from core.predict.predict_param_model import predict_param_config
-from core.skiplist.skiplist import add_to_skiplist, is_in_skiplist
+from core.skiplist.skiplist import add_to_skiplist, is_in_skiplist, invalidate_skiplist_cache, skiplist_cache_stats
 from core.logger.system_logger import log_event
 from db.db import SessionLocal
 from db.models import Base
 from db.postgres_manager import run_query, get_all_symbols
 from db.conflict_utils import insert_with_conflict_handling
 from core.system_state import get_system_config
+from agents.planner.stock_evaluator import (
+    evaluate_stock,
+    evaluate_stocks_parallel,
+    plan_evaluations,
+    policy_rng,
+)
 
 from agents.execution.execution_agent_sql import ExecutionAgentSQL
 from agents.memory.memory_agent import MemoryAgent
@@ -45,6 +51,7 @@ class PlannerAgentSQL:
         force_eval=False,
         dry_run=False,
         stock_whitelist=None,
+        workers=None,
     ):
         self.session = SessionLocal()
         Base.metadata.create_all(bind=self.session.get_bind())
@@ -64,6 +71,7 @@ class PlannerAgentSQL:
         self.force_filter = force_filter
         self.force_eval = force_eval
         self.stock_whitelist = stock_whitelist
+        self.workers = workers or settings.planner_eval_workers
 
         self.top_n = settings.top_n
         self.max_eval = settings.max_eval
@@ -125,12 +133,24 @@ class PlannerAgentSQL:
         except Exception:
             skipset = set()
 
+        try:
+            cached = fetch_stock_data_many(
+                [s for s in symbols if s not in skipset],
+                end=self.today, interval=settings.price_fetch_interval, days=1, fetch_missing=False,
+            )
+        except Exception as e:
+            logger.warning(f"⚠️ Batch price load failed: {e}. Falling back to per-symbol fetch.", prefix=self.prefix)
+            cached = {}
+
         fetched = 0
         for sym in tqdm(symbols, desc="Fetching price data"):
             if sym in skipset:
                 if not self.suppress_skiplist_logs:
                     logger.info(f"{self.prefix}"+str(f"⏭️ Skipping {sym} (in skiplist)"))
                 continue
+            if sym in cached and not cached[sym].empty:
+                fetched += 1
+                continue
             try:
                 df_new = fetch_stock_data(symbol=sym, end=self.today, interval=settings.price_fetch_interval, days=1)
                 if df_new is None or df_new.empty:
@@ -142,6 +162,7 @@ class PlannerAgentSQL:
                 logger.warning(f"⚠️ Fetch failed for {sym}: {e}. Adding to skiplist.", prefix=self.prefix)
                 run_query(f"INSERT INTO {self.skiplist_table}(stock, reason) VALUES (%s, %s) ON CONFLICT DO NOTHING", params=(sym, str(e)), fetchall=False)
 
+        invalidate_skiplist_cache()
         logger.success(f"✅ Price fetch complete: {fetched} succeeded.", prefix=self.prefix)
 
     def _refresh_features(self):
@@ -153,7 +174,9 @@ class PlannerAgentSQL:
                 logger.warning(f"⏩ Skipping {stock} due to bad pattern. Adding to skiplist.", prefix=self.prefix)
                 add_to_skiplist(stock, reason="bad_pattern")
                 continue
+            update_features_incremental(stock, "day", end=self.today)
             enrich_multi_interval_features(stock=stock, sim_date=self.today, intervals=["day"])
+        logger.info(f"{self.prefix}📇 Skiplist cache: {skiplist_cache_stats()}")
         logger.success("✅ Feature refresh complete.", prefix=self.prefix)
 
     def _filter_stocks(self):
@@ -189,9 +212,6 @@ class PlannerAgentSQL:
             logger.success("📦 Stocks already filtered for today.", prefix=self.prefix)
 
     def _evaluate_stocks(self):
-        from models.joint_policy import JointPolicyModel
-        model = JointPolicyModel.load()
-
         df_filtered = load_data(settings.ml_selected_stocks_table)
         if df_filtered is None or df_filtered.empty:
             logger.warning("⚠️ No ML-selected stocks. Using fallback.", prefix=self.prefix)
@@ -205,7 +225,8 @@ class PlannerAgentSQL:
             stocks = [s for s in stocks if s in self.stock_whitelist]
             logger.info(f"{self.prefix}📋 Whitelist applied: {len(stocks)}")
 
-        random.shuffle(stocks)
+        rng = policy_rng(self.today)
+        rng.shuffle(stocks)
         eval_limit = min(len(stocks), self.max_eval)
         logger.info(f"{self.prefix}🔍 Evaluating top {eval_limit} stocks...")
 
@@ -213,46 +234,25 @@ class PlannerAgentSQL:
         config = get_system_config()
         policy_mode = config.get("policy_mode", "mix").lower()
         rl_allocation = int(config.get("rl_allocation", 10)) / 100.0
+        tasks = plan_evaluations(stocks[:eval_limit], policy_mode, rl_allocation, rng)
 
-
-        all_signals = []
-        for stock in tqdm(stocks[:eval_limit], desc="Evaluating"):
-            signals = []
-
-            use_rl = policy_mode == "rl"
-            use_rf = policy_mode == "rf"
-            mix_mode = policy_mode == "mix"
-
-            if mix_mode:
-                use_rl = random.uniform(0, 1) < rl_allocation
-                use_rf = not use_rl
-
-            if use_rl:
-                rl_sig = self.rl_agent.evaluate(stock)
-                if rl_sig:
-                    signals.append(rl_sig)
-
-            if use_rf:
-                ml_sig = self.strategy_agent.evaluate(stock)
-                if ml_sig:
-                    signals.append(ml_sig)
-
-            final_signal = self.signal_arbitrator.arbitrate(signals)
-            if final_signal:
-                # 👉 Joint policy inference
-                try:
-                    joint = model.predict([final_signal["features"]])[0]
-                    final_signal["joint_policy_decision"] = {
-                        "position_size": joint[0],
-                        "exit_days": joint[1],
-                    }
-                except Exception as e:
-                    logger.warning(f"[PLANNER] Joint model failed on {stock}: {e}")
-
-                all_signals.append(final_signal)
-
+        if self.workers > 1 and len(tasks) > 1:
+            results = evaluate_stocks_parallel(
+                tasks, self.workers, sim_date=str(self.today.date()), prefix=self.prefix
+            )
+        else:
+            from models.joint_policy import JointPolicyModel
+            model = JointPolicyModel.load()
+            results = [
+                evaluate_stock(
+                    task, self.rl_agent, self.strategy_agent, self.signal_arbitrator, model, prefix=self.prefix
+                )
+                for task in tqdm(tasks, desc="Evaluating")
+            ]
+
+        all_signals = [sig for sig in results if sig]
         if all_signals:
-            df = pd.DataFrame(all_signals).sort_values(by="confidence", ascending=False).head(self.top_n)
+            df = pd.DataFrame(all_signals).sort_values(by="confidence", ascending=False, kind="mergesort").head(self.top_n)
             insert_with_conflict_handling(df, settings.tables.recommendations)
             logger.success(f"✅ Saved {len(df)} final signals.", prefix=self.prefix)
         else:
@@ -268,4 +268,10 @@ class PlannerAgentSQL:
         self.strategy_agent.log_summary()
 
 if __name__ == "__main__":
-    PlannerAgentSQL().run()
+    import argparse
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Processes for stock evaluation (default: settings.planner_eval_workers)")
+    args = parser.parse_args()
+    PlannerAgentSQL(workers=args.workers).run()
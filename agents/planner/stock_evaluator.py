@@ -0,0 +1,116 @@
+# agents/planner/stock_evaluator.py
+
+"""
+Per-stock evaluation used by ``PlannerAgentSQL._evaluate_stocks``.
+
+``evaluate_stock`` runs RL and/or RF evaluation, arbitration and the joint
+policy for one stock. ``evaluate_stocks_parallel`` shards the stock list over a
+spawn-based process pool. Each worker builds its own agents, models and DB
+engine once in ``_init_worker`` and reuses them for every stock it gets.
+Results come back in input order, so the merge matches the serial loop.
+"""
+
+import math
+import multiprocessing
+import random
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Tuple
+
+from core.config.config import settings
+from core.logger.logger import logger
+
+# (stock, use_rl, use_rf)
+EvalTask = Tuple[str, bool, bool]
+
+_worker = {}
+
+
+def policy_rng(today) -> random.Random:
+    """RNG for the shuffle and rl/rf mix; same run date → same draws."""
+    return random.Random(f"{settings.random_state}:{today.date()}")
+
+
+def plan_evaluations(stocks: List[str], policy_mode: str, rl_allocation: float, rng: random.Random) -> List[EvalTask]:
+    """Decide rl/rf per stock up front so every execution mode sees the same draws."""
+    tasks = []
+    for stock in stocks:
+        use_rl = policy_mode == "rl"
+        use_rf = policy_mode == "rf"
+        if policy_mode == "mix":
+            use_rl = rng.uniform(0, 1) < rl_allocation
+            use_rf = not use_rl
+        tasks.append((stock, use_rl, use_rf))
+    return tasks
+
+
+def evaluate_stock(task: EvalTask, rl_agent, strategy_agent, signal_arbitrator, model, prefix: str = "") -> Optional[dict]:
+    stock, use_rl, use_rf = task
+    signals = []
+
+    if use_rl:
+        rl_sig = rl_agent.evaluate(stock)
+        if rl_sig:
+            signals.append(rl_sig)
+
+    if use_rf:
+        ml_sig = strategy_agent.evaluate(stock)
+        if ml_sig:
+            signals.append(ml_sig)
+
+    final_signal = signal_arbitrator.arbitrate(signals)
+    if not final_signal:
+        return None
+
+    # 👉 Joint policy inference
+    try:
+        joint = model.predict([final_signal["features"]])[0]
+        final_signal["joint_policy_decision"] = {
+            "position_size": joint[0],
+            "exit_days": joint[1],
+        }
+    except Exception as e:
+        logger.warning(f"[PLANNER] Joint model failed on {stock}: {e}")
+    return final_signal
+
+
+# ─── process pool ─────────────────────────────────────────
+def _init_worker(sim_date: Optional[str], prefix: str):
+    from core.time_context.time_context import set_simulation_date
+    if sim_date:
+        set_simulation_date(sim_date)
+
+    # Imported here so each spawned worker builds its own engine, sessions and models
+    from models.joint_policy import JointPolicyModel
+    from agents.strategy.rl_strategy_agent import RLStrategyAgent
+    from agents.strategy.strategy_agent import StrategyAgent
+    from agents.arbitration.signal_arbitration_agent import SignalArbitrationAgent
+
+    _worker.update(
+        rl_agent=RLStrategyAgent(),
+        strategy_agent=StrategyAgent(),
+        signal_arbitrator=SignalArbitrationAgent(),
+        model=JointPolicyModel.load(),
+        prefix=prefix,
+    )
+
+
+def _evaluate_in_worker(task: EvalTask) -> Optional[dict]:
+    # Exceptions propagate to the parent through pool.map, as in the serial loop
+    return evaluate_stock(task, **_worker)
+
+
+def evaluate_stocks_parallel(tasks: List[EvalTask], workers: int, sim_date: Optional[str] = None, prefix: str = "") -> List[Optional[dict]]:
+    """Evaluate ``tasks`` on ``workers`` processes; one result per task, in order."""
+    if not tasks:
+        return []
+    workers = min(workers, len(tasks))
+    chunksize = max(1, math.ceil(len(tasks) / (workers * 4)))
+    logger.info(f"{prefix}🧵 Evaluating {len(tasks)} stocks on {workers} workers (chunks of {chunksize})")
+
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(sim_date, prefix),
+    ) as pool:
+        return list(pool.map(_evaluate_in_worker, tasks, chunksize=chunksize))
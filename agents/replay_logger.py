@@ -1,39 +1,16 @@
 # agents/replay_logger.py
 
-from core.event_bus import subscribe_to_events
+from core.event_bus import run_group_workers
 from db.db import SessionLocal
-from db.replay_buffer_sql import SQLReplayBuffer
+from db.replay_buffer_sql import SQLReplayBuffer, store_trade_close_batch, trade_close_episode
 from core.logger.logger import logger
 import pandas as pd
 
 def handle_event(event):
-    if event["event_type"] != "TRADE_CLOSE":
-        return
-
     try:
-        episode = {
-            "stock": event["symbol"],
-            "date": event["timestamp"][:10],
-            "features": {},  # Optional: preload from cache
-            "action": 1,
-            "reward": float(event.get("reward", 0)),
-            "interval": event.get("interval", "day"),
-            "strategy_config": event.get("strategy_config", {}),
-            "done": True,
-
-            # 🎯 Enriched reward signals for PPO training
-            "missed_pnl": float(event.get("missed_pnl", 0)),
-            "holding_cost": float(event.get("holding_cost", 0)),
-            "slippage_penalty": float(event.get("slippage_penalty", 0)),
-            "capital_efficiency": float(event.get("capital_efficiency", 0)),
-
-            # 📈 Optional: regime awareness (VIX tag, etc.)
-            "regime_tag": event.get("regime_tag"),
-        }
-
-        # ✅ Fix: convert to JSON strings
-        episode["features"] = json.dumps(episode.get("features", {}))
-        episode["strategy_config"] = json.dumps(episode.get("strategy_config", {}))
+        episode = trade_close_episode(event)
+        if episode is None:
+            return
 
         logger.info(
             f"[REPLAY LOGGER] {episode['stock']} | reward: {episode['reward']:.2f} | "
@@ -46,6 +23,10 @@ def handle_event(event):
         logger.error(f"[REPLAY LOGGER] ⚠️ Failed to insert replay episode: {e}")
 
 
+def handle_events(events):
+    store_trade_close_batch(events, "REPLAY LOGGER")
+
+
 def log_replay_row(stock, action, reason, model=None, prediction=None, confidence=None, signal=None, date=None):
     """
     For logging rejected or skipped signals, e.g., during arbitration.
@@ -59,4 +40,4 @@ def log_replay_row(stock, action, reason, model=None, prediction=None, confidenc
     run_query(query, params=(date, stock, action, reason, model, prediction, confidence, signal), fetchall=False)
 
 if __name__ == "__main__":
-    subscribe_to_events(handle_event)
+    run_group_workers("replay_logger", handle_events)
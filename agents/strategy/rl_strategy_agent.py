@@ -1,9 +1,8 @@
 # agents/strategy/rl_strategy_agent.py
 
-from core.predict.rl_predictor import load_policy, load_rl_frame
+from core.predict.rl_predictor import load_policy, load_rl_frame, simulate_rewards_batch
 from core.time_context.time_context import get_simulation_date
 from rl.envs.trading_env import TradingEnv
-from stable_baselines3.common.vec_env import DummyVecEnv
 import pandas as pd
 import numpy as np
 from core.logger.logger import logger
@@ -20,44 +19,50 @@ class RLStrategyAgent:
     def _evaluate_reward(self, df: pd.DataFrame, model_name: str) -> float:
         try:
             env = TradingEnv(df)
-            obs = env.reset()[0]
-            total_reward = 0
-
             policy = load_policy(model_name)
-            for _ in range(env.start_idx, env.end_idx):
-                action, _ = policy.predict(obs, deterministic=True)
-                obs, reward, done, _, _ = env.step(action)
-                total_reward += reward
-                if done:
-                    break
-
-            return total_reward
         except Exception as e:
             logger.warning(f"⚠️ Reward simulation failed: {e}")
             return -np.inf
+        rewards, _ = simulate_rewards_batch([env], policy)
+        return float(rewards[0])
 
-    def evaluate(self, stock: str) -> dict | None:
-        best_signal = None
-
-        for interval in self.intervals:
-            logger.info(f"🧠 [RL] Evaluating {stock} @ {interval}...")
-            df = load_rl_frame(stock, interval=interval)
-            if df.empty or len(df) < 30:
-                continue
-
-            model_name = f"ppo_{stock}_{interval}_latest"
-            reward = self._evaluate_reward(df, model_name=model_name)
-            if reward <= 0:
-                continue
-
-            env = TradingEnv(df)
-            obs = env.reset()[0]
+    def evaluate_many(self, stocks: list[str]) -> dict:
+        """
+        Best RL signal per stock across ``self.intervals``.
 
-            policy = load_policy(model_name)
-            action, _ = policy.predict(obs, deterministic=True)
-            if action == 0:
+        Episodes that share a policy run as one vectorized rollout (one
+        ``predict`` per step for all of them), and the entry action is the
+        rollout's first action instead of a separate inference.
+        """
+        tasks = []  # (stock, interval, env, policy) in evaluation order
+        for stock in stocks:
+            for interval in self.intervals:
+                logger.info(f"🧠 [RL] Evaluating {stock} @ {interval}...")
+                df = load_rl_frame(stock, interval=interval)
+                if df.empty or len(df) < 30:
+                    continue
+                try:
+                    env = TradingEnv(df)
+                    policy = load_policy(f"ppo_{stock}_{interval}_latest")
+                except Exception as e:
+                    logger.warning(f"⚠️ Reward simulation failed: {e}")
+                    continue
+                tasks.append((stock, interval, env, policy))
+
+        rewards = np.full(len(tasks), -np.inf)
+        first_actions = np.zeros(len(tasks), dtype=int)
+        groups = {}
+        for i, (_, _, env, policy) in enumerate(tasks):
+            groups.setdefault((id(policy), env.observation_space.shape), []).append(i)
+        for idx in groups.values():
+            r, a = simulate_rewards_batch([tasks[i][2] for i in idx], tasks[idx[0]][3])
+            rewards[idx] = r
+            first_actions[idx] = a
+
+        best = {stock: None for stock in stocks}
+        for (stock, interval, _, _), reward, action in zip(tasks, rewards, first_actions):
+            if reward <= 0 or action == 0:
                 continue
-
             signal = {
                 "stock": stock,
                 "date": self.today,
@@ -71,15 +76,18 @@ class RLStrategyAgent:
             if action == 2:
                 signal["action"] = "sell"
 
-            if best_signal is None or reward > best_signal["confidence"]:
-                best_signal = signal
+            if best[stock] is None or reward > best[stock]["confidence"]:
+                best[stock] = signal
 
-        if best_signal:
-            logger.success(f"✅ RL best signal: {best_signal}")
-        else:
-            logger.info(f"🤷 RL: No valid trade for {stock}")
+        for stock, signal in best.items():
+            if signal:
+                logger.success(f"✅ RL best signal: {signal}")
+            else:
+                logger.info(f"🤷 RL: No valid trade for {stock}")
+        return best
 
-        return best_signal
+    def evaluate(self, stock: str) -> dict | None:
+        return self.evaluate_many([stock])[stock]
 
     def generate_trades(self, stocks: list[str], today=None) -> list[dict]:
 
@@ -90,9 +98,5 @@ class RLStrategyAgent:
         # if someone passed today in, override our self.today
         if today is not None:
             self.today = pd.to_datetime(today).date()
-        signals = []
-        for s in stocks:
-            sig = self.evaluate(s)
-            if sig is not None:
-                signals.append(sig)
-        return signals
\ No newline at end of file
+        best = self.evaluate_many(stocks)
+        return [best[s] for s in stocks if best[s] is not None]
\ No newline at end of file
@@ -0,0 +1,284 @@
+# bootstrap/fill_simulator.py
+
+"""
+Batch version of ``simulate_trade_execution`` for a whole day of trades.
+
+``MinuteBars.load`` reads the minute bars of every traded symbol from the
+trade date through the last exit date in one ``fetch_stock_data_many`` call
+and keeps them as flat, per-symbol sorted NumPy arrays. ``simulate_fills``
+then resolves every trade with ``searchsorted`` on those arrays, using the
+same rules as the per-trade path:
+
+* MARKET entry: the bar at the execution time fills at its open; otherwise the
+  first bar in the next 5 minutes, else the last bar in the prior 30 minutes,
+  fills at its open plus slippage and impact; otherwise the day's last close.
+* LIMIT entry: filled at the limit price with probability ``fill_prob``.
+* TIME_BASED exit: the close of the bar at ``exit_time``, else the last close
+  of the exit day. Trades with no bars on the exit day are not filled.
+
+Random draws happen in trade order, exactly as the per-trade path makes them,
+so a seeded run gives the same fills either way.
+
+On top of that, trades whose ``meta["strategy_config"]`` carries an
+``exit_rule`` with ``stop_loss`` / ``take_profit`` (fractions of the entry
+price) are checked against the low/high of every bar from the execution time
+through ``exit_time``; the first bar that crosses a level exits there, at the
+level or at the bar's open if it gapped through (stop first if both are crossed).
+"""
+
+import random
+from datetime import datetime, time, timedelta
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from agents.execution.exit_engine import _exit_rule_field
+from bootstrap.simulate_trade_execution import calculate_reward
+from core.data_provider.data_provider import fetch_stock_data_many
+from core.logger.logger import logger
+from core.realism_boosters.market_impact import estimate_market_impact
+from core.realism_boosters.slippage import calculate_slippage
+from utils.time_utils import make_naive, to_naive_utc
+
+SESSION_START = time(2, 45)
+SESSION_END = time(10, 0)
+MARKET_OPEN = time(3, 45)
+INTRADAY_EXIT_CUTOFF = time(15, 15)
+ENTRY_LOOKAHEAD = np.int64(pd.Timedelta(minutes=5).value)
+ENTRY_LOOKBACK = np.int64(pd.Timedelta(minutes=30).value)
+DAY = np.int64(pd.Timedelta(days=1).value)
+
+
+def _ns(ts) -> np.int64:
+    return np.int64(pd.Timestamp(ts).value)
+
+
+def _bar_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """Bars with a naive-UTC ``timestamp`` column, sorted by it."""
+    index = df.index
+    if isinstance(index, pd.DatetimeIndex) and index.tz is None and index.is_monotonic_increasing:
+        # already finalized by the data provider
+        return df.assign(timestamp=index.values)
+    if df.index.name in ("date", "timestamp"):
+        df = df.reset_index().rename(columns={df.index.name: "timestamp"})
+    elif "date" in df.columns:
+        df = df.rename(columns={"date": "timestamp"})
+    df = to_naive_utc(df.copy(), "timestamp").dropna(subset=["timestamp"])
+    return df.sort_values("timestamp", kind="stable")
+
+
+class MinuteBars:
+    """Minute bars of many symbols as one set of flat arrays, one sorted segment per symbol."""
+
+    def __init__(self, frames: Dict[str, pd.DataFrame]):
+        self.index: Dict[str, int] = {}
+        starts, columns = [0], {c: [] for c in ("ts", "open", "high", "low", "close")}
+        for symbol, df in frames.items():
+            if df is None or df.empty:
+                continue
+            df = _bar_frame(df)
+            if df.empty:
+                continue
+            self.index[symbol] = len(starts) - 1
+            starts.append(starts[-1] + len(df))
+            close = df["close"].to_numpy(dtype=float)
+            columns["ts"].append(df["timestamp"].to_numpy(dtype="datetime64[ns]").astype(np.int64))
+            columns["open"].append(df["open"].to_numpy(dtype=float))
+            columns["close"].append(close)
+            for col in ("high", "low"):
+                columns[col].append(df[col].to_numpy(dtype=float) if col in df else close)
+
+        bounds = np.asarray(starts, dtype=np.int64)
+        self.start, self.end = bounds[:-1], bounds[1:]
+        for col, parts in columns.items():
+            dtype = np.int64 if col == "ts" else float
+            setattr(self, col, np.concatenate(parts) if parts else np.empty(0, dtype=dtype))
+
+    @classmethod
+    def load(cls, symbols: List[str], first_day, last_day) -> "MinuteBars":
+        """One read of the minute bars of ``symbols`` for ``first_day`` … ``last_day``."""
+        start = datetime.combine(pd.Timestamp(first_day).date(), SESSION_START)
+        end = datetime.combine(pd.Timestamp(last_day).date(), SESSION_END)
+        frames = fetch_stock_data_many(list(dict.fromkeys(symbols)), interval="minute", start=start, end=end)
+        return cls(frames)
+
+    def segments(self, symbols: List[str]) -> np.ndarray:
+        """Segment number per symbol, -1 for symbols without bars."""
+        return np.array([self.index.get(s, -1) for s in symbols], dtype=np.int64)
+
+    def searchsorted(self, seg: np.ndarray, t: np.ndarray, side: str = "left") -> np.ndarray:
+        """Global position of ``t`` within each row's own symbol segment (``seg`` ≥ 0)."""
+        pos = np.zeros(len(seg), dtype=np.int64)
+        order = np.argsort(seg, kind="stable")
+        sorted_seg = seg[order]
+        edges = np.flatnonzero(np.diff(sorted_seg)) + 1
+        for rows in np.split(order, edges):
+            s = seg[rows[0]]
+            if s < 0:
+                continue
+            lo, hi = self.start[s], self.end[s]
+            pos[rows] = lo + np.searchsorted(self.ts[lo:hi], t[rows], side=side)
+        return pos
+
+
+def _first_hits(a: np.ndarray, b: np.ndarray, hit: Callable) -> np.ndarray:
+    """
+    For bar ranges ``[a[k], b[k])`` and a per-bar boolean ``hit(bar_positions, owners)``,
+    the first hit position per range (-1 if none).
+    """
+    lengths = np.maximum(b - a, 0)
+    first = np.full(len(a), -1, dtype=np.int64)
+    total = int(lengths.sum())
+    if total == 0:
+        return first
+    owner = np.repeat(np.arange(len(a)), lengths)
+    offsets = np.cumsum(lengths) - lengths
+    bars = a[owner] + (np.arange(total) - offsets[owner])
+    crossed = hit(bars, owner)
+    # Assigning in reverse order leaves the earliest hit per owner in place
+    first[owner[crossed][::-1]] = bars[crossed][::-1]
+    return first
+
+
+def simulate_fills(trades: list, date, bars: Optional[MinuteBars] = None) -> List[Optional[dict]]:
+    """
+    Simulate ``trades`` placed on ``date``. Returns one result per trade, in order:
+    the ``simulate_trade_execution`` result dict, or ``None`` if it did not fill.
+    Like the per-trade path, intraday exits are clamped to 15:15 on the trade's own
+    ``exit_time`` when the trade fills.
+    """
+    n = len(trades)
+    results: List[Optional[dict]] = [None] * n
+    if n == 0:
+        return results
+
+    day = pd.Timestamp(date).date()
+    exit_times = []
+    for t in trades:
+        exit_time = make_naive(t.exit_time)
+        if t.meta.get("interval") == "15minute":
+            exit_time = min(exit_time, datetime.combine(t.timestamp.date(), INTRADAY_EXIT_CUTOFF))
+        exit_times.append(exit_time)
+
+    if bars is None:
+        last_day = max([day] + [e.date() for t, e in zip(trades, exit_times) if t.exit_strategy == "TIME_BASED"])
+        bars = MinuteBars.load([t.symbol for t in trades], day, last_day)
+
+    seg = bars.segments([t.symbol for t in trades])
+    day_start = np.full(n, _ns(day), dtype=np.int64)
+    day_lo = bars.searchsorted(seg, day_start)
+    day_hi = bars.searchsorted(seg, day_start + DAY)
+    has_bars = (seg >= 0) & (day_hi > day_lo)
+    if not has_bars.any():
+        logger.warning(f"❌ No minute bars for any of {n} traded symbols on {day}")
+        return results
+
+    # ── entry: random draws in trade order, as simulate_trade_execution makes them ──
+    exe = np.zeros(n, dtype=np.int64)
+    exe_times: List[Optional[datetime]] = [None] * n
+    cost = np.ones(n)
+    market = np.zeros(n, dtype=bool)
+    limit_price = np.full(n, np.nan)
+    for k, t in enumerate(trades):
+        if not has_bars[k]:
+            continue
+        if t.order_type == "MARKET":
+            exe_time = make_naive(t.timestamp + timedelta(minutes=random.randint(1, 5)))
+            exe_time = max(exe_time, datetime.combine(exe_time.date(), MARKET_OPEN))
+            market[k] = True
+            cost[k] = 1 + calculate_slippage(t.symbol, t.size, date) + estimate_market_impact(t.size, t.symbol, date)
+        elif t.order_type == "LIMIT":
+            if random.random() >= t.meta.get("fill_prob", 0.7):
+                continue
+            exe_time = make_naive(t.timestamp)
+            limit_price[k] = t.price
+        else:
+            continue
+        exe_times[k] = exe_time
+        exe[k] = _ns(exe_time)
+
+    last = len(bars.ts) - 1
+    i = bars.searchsorted(seg, exe)
+    ts_i = bars.ts[np.clip(i, 0, last)]
+    in_day = (i >= day_lo) & (i < day_hi)
+    exact = market & in_day & (ts_i == exe)
+    ahead = market & in_day & ~exact & (ts_i <= exe + ENTRY_LOOKAHEAD)
+    j = i - 1
+    ts_j = bars.ts[np.clip(j, 0, last)]
+    behind = market & ~exact & ~ahead & (j >= day_lo) & (j < day_hi) & (ts_j >= exe - ENTRY_LOOKBACK)
+    daily = market & ~exact & ~ahead & ~behind
+
+    open_i, open_j = bars.open[np.clip(i, 0, last)], bars.open[np.clip(j, 0, last)]
+    entry = np.where(exact, open_i, np.nan)
+    entry = np.where(ahead, open_i * cost, entry)
+    entry = np.where(behind, open_j * cost, entry)
+    entry = np.where(daily, bars.close[np.clip(day_hi - 1, 0, last)], entry)
+    entry = np.where(np.isnan(limit_price), entry, limit_price)
+    entered = ~np.isnan(entry)
+
+    # ── exit ──
+    time_based = np.array([t.exit_strategy == "TIME_BASED" for t in trades])
+    x = np.array([_ns(e) for e in exit_times], dtype=np.int64)
+    x_day = np.array([_ns(e.date()) for e in exit_times], dtype=np.int64)
+    x_lo = bars.searchsorted(seg, x_day)
+    x_hi = bars.searchsorted(seg, x_day + DAY)
+    filled = entered & time_based & (seg >= 0) & (x_hi > x_lo)
+
+    xi = bars.searchsorted(seg, x)
+    on_bar = filled & (xi < x_hi) & (bars.ts[np.clip(xi, 0, last)] == x)
+    exit_price = np.where(on_bar, bars.close[np.clip(xi, 0, last)], bars.close[np.clip(x_hi - 1, 0, last)])
+    exit_ns = x.copy()
+
+    # ── stop / target over the bars between entry and exit ──
+    direction = np.array([1 if t.direction >= 0 else -1 for t in trades], dtype=float)
+    stop = np.array([_exit_rule_field(t.meta.get("strategy_config"), "stop_loss") or 0 for t in trades], dtype=float)
+    take = np.array([_exit_rule_field(t.meta.get("strategy_config"), "take_profit") or 0 for t in trades], dtype=float)
+    ruled = np.flatnonzero(filled & ((stop > 0) | (take > 0)))
+    if len(ruled):
+        ent, d = entry[ruled], direction[ruled]
+        stop_level = np.where(stop[ruled] > 0, ent * (1 - d * stop[ruled]), np.nan)
+        take_level = np.where(take[ruled] > 0, ent * (1 + d * take[ruled]), np.nan)
+
+        def stop_hit(b, o):
+            adverse = np.where(d[o] > 0, bars.low[b], bars.high[b])
+            return (d[o] * (adverse - stop_level[o])) <= 0
+
+        def take_hit(b, o):
+            favourable = np.where(d[o] > 0, bars.high[b], bars.low[b])
+            return (d[o] * (favourable - take_level[o])) >= 0
+
+        a, b = i[ruled], bars.searchsorted(seg[ruled], x[ruled], side="right")
+        first_stop, first_take = _first_hits(a, b, stop_hit), _first_hits(a, b, take_hit)
+        use_stop = (first_stop >= 0) & ((first_take < 0) | (first_stop <= first_take))
+        use_take = ~use_stop & (first_take >= 0)
+        hit_bar = np.where(use_stop, first_stop, first_take)
+        bar_open = bars.open[np.clip(hit_bar, 0, last)]
+        # a bar that opens beyond the level (gap) fills at its open
+        stop_fill = np.where(d * (bar_open - stop_level) < 0, bar_open, stop_level)
+        take_fill = np.where(d * (bar_open - take_level) > 0, bar_open, take_level)
+        exit_price[ruled] = np.where(use_stop, stop_fill, np.where(use_take, take_fill, exit_price[ruled]))
+        exit_ns[ruled] = np.where(hit_bar >= 0, bars.ts[np.clip(hit_bar, 0, last)], exit_ns[ruled])
+
+    for k in np.flatnonzero(filled):
+        t = trades[k]
+        if t.meta.get("interval") == "15minute" and t.exit_time > exit_times[k]:
+            t.exit_time = exit_times[k]
+        exit_time = t.exit_time if exit_ns[k] == x[k] else pd.Timestamp(exit_ns[k]).to_pydatetime()
+        results[k] = {
+            "symbol": t.symbol,
+            "entry_price": float(entry[k]),
+            "exit_price": float(exit_price[k]),
+            "entry_time": exe_times[k],
+            "exit_time": exit_time,
+            "reward": calculate_reward(entry=float(entry[k]), exit=float(exit_price[k]), trade=t),
+            "direction": t.direction,
+            "meta": t.meta,
+        }
+
+    logger.info(
+        f"🎯 Simulated {int(filled.sum())}/{n} fills for {day} | exact={int(exact.sum())} "
+        f"window={int((ahead | behind).sum())} daily_close={int(daily.sum())} "
+        f"no_bars={int((~has_bars).sum())}"
+    )
+    return results
@@ -9,7 +9,7 @@ import pandas as pd
 from db.replay_buffer_sql import SQLReplayBuffer as ReplayBuffer
 from agents.execution.execution_agent_sql import ExecutionAgentSQL
 from models.run_stock_filter import run_stock_filter as run_filter_model
-from bootstrap.simulate_trade_execution import simulate_trade_execution
+from bootstrap.fill_simulator import simulate_fills
 from core.model_trainer.trainer import train_models
 from core.market_calendar import get_trading_days
 from bootstrap.phase_controller import PhaseController
@@ -85,20 +85,23 @@ def run_historical_bootstrap(start_date: str, end_date: str):
 
         # 5️⃣ Simulate execution & log to RL buffer
         executed_trades = []
-        for trade in trades:
+        try:
+            results = simulate_fills(trades, date)
+        except Exception as e:
+            logger.warning(f"⚠️ simulate_fills failed on {date.date()}: {e}")
+            results = []
+        for trade, result in zip(trades, results):
+            if not result:
+                continue
+            executed_trades.append(result)
             try:
-                result = simulate_trade_execution(trade, date)
-                if not result:
-                    continue
-                executed_trades.append(result)
-
                 replay_buffer.add(result, tags={
                     "phase": phase_controller.phase,
                     "source": phase_controller.get_source_label(),
                     "exploration_type": trade.meta.get("exploration_type", "random")
                 })
             except Exception as e:
-                logger.warning(f"⚠️ simulate_trade_execution failed for {trade.symbol} on {date.date()}: {e}")
+                logger.warning(f"⚠️ replay_buffer.add failed for {trade.symbol} on {date.date()}: {e}")
 
         logger.info(f"✅ Executed {len(executed_trades)} / {len(trades)} trades")
 
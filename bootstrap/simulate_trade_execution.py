@@ -35,7 +35,10 @@ def simulate_trade_execution(trade, date):
                 exe_time = market_open_utc
 
             row = bars_df[bars_df["timestamp"] == exe_time]
-            if row.empty:
+            if not row.empty:
+                exe_price = row.iloc[0]["open"]
+            else:
+                daily_close = None
                 # 1️⃣ try the next 5 min
                 window = bars_df[(bars_df["timestamp"] >= exe_time) & (bars_df["timestamp"] <= exe_time + timedelta(minutes=5))]
                 # 2️⃣ then try the prior 30 min
@@ -58,7 +61,7 @@ def simulate_trade_execution(trade, date):
                     exe_price = row.iloc[0]["open"]
 
                 # apply slippage & impact if using minute fallback
-                if 'exe_price' in locals() and exe_price != daily_close:
+                if daily_close is None:
                     slippage = calculate_slippage(trade.symbol, trade.size, date)
                     impact   = estimate_market_impact(trade.size, trade.symbol, date)
                     exe_price *= (1 + slippage + impact)
@@ -67,6 +70,7 @@ def simulate_trade_execution(trade, date):
             fill_prob = trade.meta.get("fill_prob", 0.7)
             if random.random() < fill_prob:
                 exe_price = trade.price
+                exe_time = make_naive(trade.timestamp)
             else:
                 return None
 
@@ -110,6 +114,9 @@ def simulate_trade_execution(trade, date):
                     exit_price = exe_price
             else:
                 exit_price = exit_row.iloc[0]["close"]
+        else:
+            logger.warning(f"❌ Unsupported exit strategy {trade.exit_strategy!r} for {trade.symbol}")
+            return None
 
         reward = calculate_reward(entry=exe_price, exit=exit_price, trade=trade)
 
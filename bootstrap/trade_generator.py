@@ -3,7 +3,7 @@
 from datetime import datetime, timedelta
 import random
 from core.logger.logger import logger
-from core.data_provider.data_provider import get_last_close, fetch_stock_data
+from core.data_provider.data_provider import get_last_close, get_last_close_many, fetch_stock_data
 from utils.time_utils import make_naive  # ✅ added for consistency
 
 
@@ -26,12 +26,15 @@ def generate_random_trades(stocks, date, vol_regime):
     skipped = []
 
     logger.warning(f"⚡ generate_random_trades() called for {date} | Total: {len(stocks)} | Sample: {stocks[:5]} ...")
+    closes = get_last_close_many(stocks, sim_date=date)
 
     for symbol in stocks:
         logger.debug(f"🔍 Attempting trade for {symbol}")
 
         # Retry logic to refetch if price is missing on first try
-        price = get_last_close(symbol, sim_date=date)
+        price = closes.get(symbol)
+        if price is None:
+            price = get_last_close(symbol, sim_date=date)
         if price is None:
             logger.info(f"🔁 Attempting to refetch {symbol} minute data for {date}...")
             _ = fetch_stock_data(symbol, interval="minute", start=date - timedelta(days=1), end=date + timedelta(days=1))
@@ -84,10 +87,13 @@ def generate_random_trades(stocks, date, vol_regime):
 
 def generate_rule_based_trades(stocks, date, vol_regime):
     trades = []
+    closes = get_last_close_many(stocks, sim_date=date)
     for symbol in stocks:
         pseudo_rsi = random.uniform(10, 70)
         if pseudo_rsi < 30:
-            price = get_last_close(symbol, sim_date=date)
+            price = closes.get(symbol)
+            if price is None:
+                price = get_last_close(symbol, sim_date=date)
             if price is None:
                 logger.warning(f"❌ Skipping {symbol}: No price data available.")
                 continue
@@ -129,8 +135,11 @@ def generate_rule_based_trades(stocks, date, vol_regime):
 
 def generate_model_based_trades(stocks, date, vol_regime):
     trades = []
+    closes = get_last_close_many(stocks, sim_date=date)
     for symbol in stocks:
-        price = get_last_close(symbol)
+        price = closes.get(symbol)
+        if price is None:
+            price = get_last_close(symbol, sim_date=date)
         if price is None:
             logger.warning(f"❌ Skipping {symbol}: No price data available.")
             continue
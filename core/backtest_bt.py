@@ -37,6 +37,11 @@ class SMA_RSI_Exit(Strategy):
         self.fast = self.I(ta_sma, self.data.Close, c)
         self.slow = self.I(ta_sma, self.data.Close, d)
         self.rsi = self.I(ta_rsi, self.data.Close, settings.rsi_window)
+        rule = self.cfg.exit_rule
+        self.sma_exit = (
+            self.I(ta_sma, self.data.Close, rule.sma_window)
+            if rule.kind == "sma_cross" and rule.sma_window else None
+        )
         self.entry_bar_index = None
 
     def next(self):
@@ -73,8 +78,7 @@ class SMA_RSI_Exit(Strategy):
                 self.position.close()
 
         elif rule.kind == "sma_cross" and rule.sma_window:
-            sma_exit = self.I(ta_sma, self.data.Close, rule.sma_window)
-            if crossover(sma_exit, self.fast):
+            if crossover(self.sma_exit, self.fast):
                 print(f"💸 EXIT (SMA Cross)")
                 self.position.close()
 
@@ -83,6 +87,18 @@ class SMA_RSI_Exit(Strategy):
                 print(f"⌛ EXIT (Max Hold Days): Held {bar_index - self.entry_bar_index} days")
                 self.position.close()
 
+def build_backtest(df: pd.DataFrame, cfg: StrategyConfig) -> Backtest:
+    """``Backtest`` of ``SMA_RSI_Exit`` on an Open/High/Low/Close/Volume frame."""
+    SMA_RSI_Exit.cfg = cfg
+    return Backtest(
+        df,
+        SMA_RSI_Exit,
+        cash=settings.capital_per_trade,
+        commission=getattr(settings, "backtest_commission", 0.001),
+        trade_on_close=True,
+        exclusive_orders=True
+    )
+
 # ─────────────────────────────────────────────────────────
 # Main backtest wrapper
 # ─────────────────────────────────────────────────────────
@@ -110,15 +126,7 @@ def run_backtest_config(stock: str, cfg: StrategyConfig, start=None, end=None, r
     print(f"📌 DEBUG: df.index.tz = {df.index.tz}")
     print(f"📌 DEBUG: run_date tz = {run_date.tzinfo if run_date else 'None'}")
 
-    SMA_RSI_Exit.cfg = cfg
-    bt = Backtest(
-        df,
-        SMA_RSI_Exit,
-        cash=settings.capital_per_trade,
-        commission=getattr(settings, "backtest_commission", 0.001),
-        trade_on_close=True,
-        exclusive_orders=True
-    )
+    bt = build_backtest(df, cfg)
 
     try:
         stats = bt.run()
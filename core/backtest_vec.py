@@ -0,0 +1,266 @@
+# core/backtest_vec.py
+"""
+Vectorized grid backtester.
+
+Runs many ``StrategyConfig`` combinations over one price frame as a
+(configs × bars) NumPy program. Each distinct SMA window and the RSI are
+computed once; entry/exit signals become boolean matrices and the position
+state machine steps through the bars for all configs at once.
+
+Fills, sizing, commissions and statistics follow ``SMA_RSI_Exit`` run through
+``backtesting.Backtest`` the way ``run_backtest_config`` does it:
+
+* orders placed on bar ``i`` fill at ``Close[i]`` (``trade_on_close``)
+  before the strategy sees bar ``i + 1``;
+* ``stop_loss`` / ``take_profit`` are compared against ``Position.pl_pct``,
+  which backtesting.py reports in percent;
+* trades still open on the last bar count towards equity but not towards
+  ``trade_count``.
+"""
+
+import sys
+from datetime import timedelta
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+from core.backtest_bt import ta_sma, ta_rsi
+from core.config.config import settings
+from core.config.strategy_config import StrategyConfig
+from core.data_provider.data_provider import fetch_stock_data
+from utils.time_utils import make_naive, make_naive_index
+
+SIZE_FRACTION = 1 - sys.float_info.epsilon  # backtesting.py's default ``buy()`` size (full equity)
+
+
+# ─────────────────────────────────────────────────────────
+# Signal matrices
+# ─────────────────────────────────────────────────────────
+def _sma_rows(close: np.ndarray, windows: np.ndarray, cache: Dict[int, np.ndarray]) -> np.ndarray:
+    """Stack one SMA row per config; NaN rows for missing windows."""
+    out = np.full((len(windows), len(close)), np.nan)
+    for w in np.unique(windows[windows > 0]):
+        if w not in cache:
+            cache[w] = ta_sma(close, int(w))
+        out[windows == w] = cache[w]
+    return out
+
+
+def _cross_up(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """``backtesting.lib.crossover(a, b)`` evaluated on every bar (False on bar 0)."""
+    out = np.zeros(a.shape, dtype=bool)
+    out[:, 1:] = (a[:, :-1] < b[:, :-1]) & (a[:, 1:] > b[:, 1:])
+    return out
+
+
+def _rule_array(configs: List[StrategyConfig], attr: str) -> np.ndarray:
+    return np.array([getattr(c.exit_rule, attr) or 0 for c in configs], dtype=float)
+
+
+# ─────────────────────────────────────────────────────────
+# Simulation
+# ─────────────────────────────────────────────────────────
+def simulate_grid(
+    close: np.ndarray,
+    configs: List[StrategyConfig],
+    cash: float,
+    commission: float,
+) -> dict:
+    """
+    Step every config through ``close`` at once.
+
+    Returns the (configs × bars) equity matrix and the closed trades as flat
+    arrays tagged with the config index.
+    """
+    close = np.asarray(close, dtype=float)
+    n, k = len(close), len(configs)
+
+    sma_cache: Dict[int, np.ndarray] = {}
+    fast = _sma_rows(close, np.array([c.sma_short for c in configs]), sma_cache)
+    slow = _sma_rows(close, np.array([c.sma_long for c in configs]), sma_cache)
+    rsi = ta_rsi(close, settings.rsi_window)
+
+    rsi_entry = np.array([c.rsi_entry for c in configs], dtype=float)
+    with np.errstate(invalid="ignore"):
+        entry_sig = _cross_up(fast, slow) & (rsi[None, :] < rsi_entry[:, None])
+
+    kinds = np.array([c.exit_rule.kind for c in configs])
+    stop_loss = _rule_array(configs, "stop_loss")
+    take_profit = _rule_array(configs, "take_profit")
+    trail = _rule_array(configs, "trail")
+    max_hold = _rule_array(configs, "max_holding_days")
+    sma_window = _rule_array(configs, "sma_window").astype(int)
+
+    is_fixed = kinds == "fixed_pct"
+    is_trailing = kinds == "trailing_pct"
+    is_sma = (kinds == "sma_cross") & (sma_window > 0)
+    exit_sma = _sma_rows(close, np.where(is_sma, sma_window, 0), sma_cache)
+    with np.errstate(invalid="ignore"):
+        sma_exit_sig = _cross_up(exit_sma, fast)
+
+    # Bars before every indicator has a value are skipped, as in Backtest.run
+    start = 1 + int(np.isnan(rsi).argmin())
+
+    cash_v = np.full(k, float(cash))
+    size = np.zeros(k)
+    entry_price = np.zeros(k)
+    entry_bar = np.zeros(k, dtype=int)
+    signal_bar = np.full(k, -1)
+    in_pos = np.zeros(k, dtype=bool)
+    pending_entry = np.zeros(k, dtype=bool)
+    pending_exit = np.zeros(k, dtype=bool)
+    equity = np.full((k, n), np.nan)
+    trades = {key: [] for key in ("config", "entry_bar", "exit_bar", "entry_price", "exit_price", "size")}
+
+    for j in range(start, n):
+        fill = close[j - 1]
+
+        # broker.next(): fill orders from the previous bar at its close
+        closing = pending_exit & in_pos
+        if closing.any():
+            idx = np.flatnonzero(closing)
+            pl = size[idx] * (fill - entry_price[idx])
+            cash_v[idx] += pl - size[idx] * fill * commission
+            trades["config"].append(idx)
+            trades["entry_bar"].append(entry_bar[idx])
+            trades["exit_bar"].append(np.full(len(idx), j - 1))
+            trades["entry_price"].append(entry_price[idx])
+            trades["exit_price"].append(np.full(len(idx), fill))
+            trades["size"].append(size[idx])
+            in_pos[idx] = False
+        pending_exit[:] = False
+
+        if pending_entry.any():
+            idx = np.flatnonzero(pending_entry)
+            units = np.floor_divide(cash_v[idx] * SIZE_FRACTION, fill + SIZE_FRACTION * fill * commission)
+            ok = units > 0
+            idx, units = idx[ok], units[ok]
+            size[idx] = units
+            entry_price[idx] = fill
+            entry_bar[idx] = j - 1
+            cash_v[idx] -= units * fill * commission
+            in_pos[idx] = True
+        pending_entry[:] = False
+
+        price = close[j]
+        equity[:, j] = cash_v + np.where(in_pos, size * (price - entry_price), 0.0)
+
+        # strategy.next(): entries while flat, exits while in a position
+        enter = ~in_pos & entry_sig[:, j]
+        pending_entry |= enter
+        signal_bar[enter] = j
+
+        if in_pos.any():
+            invested = entry_price * size
+            with np.errstate(invalid="ignore", divide="ignore"):
+                pnl_pct = size * (price - entry_price) / invested * 100
+            fixed_hit = is_fixed & (
+                ((stop_loss != 0) & (pnl_pct <= -stop_loss)) | ((take_profit != 0) & (pnl_pct >= take_profit))
+            )
+            trail_hit = is_trailing & (
+                (pnl_pct <= -stop_loss) | (price < np.where(trail != 0, price * (1 - trail), 0.0))
+            )
+            sma_hit = is_sma & sma_exit_sig[:, j]
+            time_hit = (max_hold != 0) & (signal_bar >= 0) & (j - signal_bar >= max_hold)
+            pending_exit |= in_pos & (fixed_hit | trail_hit | sma_hit | time_hit)
+
+    equity = pd.DataFrame(equity.T).bfill().fillna(pd.Series(cash_v)).to_numpy().T
+    trades = {
+        key: (np.concatenate(parts) if parts else np.array([], dtype=float))
+        for key, parts in trades.items()
+    }
+    return {"equity": equity, "trades": trades}
+
+
+# ─────────────────────────────────────────────────────────
+# Statistics (backtesting._stats.compute_stats, vectorized over configs)
+# ─────────────────────────────────────────────────────────
+def _geometric_mean(returns: pd.DataFrame) -> np.ndarray:
+    returns = returns.fillna(0) + 1
+    bad = (returns <= 0).any().to_numpy()
+    with np.errstate(divide="ignore", invalid="ignore"):
+        gmean = np.exp(np.log(returns.clip(lower=1e-300)).sum().to_numpy() / (len(returns) or np.nan)) - 1
+    return np.where(bad, 0.0, gmean)
+
+
+def grid_stats(equity: np.ndarray, trades: dict, index: pd.DatetimeIndex) -> pd.DataFrame:
+    k = equity.shape[0]
+    total_return = (equity[:, -1] - equity[:, 0]) / equity[:, 0]
+    max_drawdown = -np.nan_to_num((1 - equity / np.maximum.accumulate(equity, axis=1)).max(axis=1))
+
+    period = pd.Series(index[-100:]).diff().dropna().median()
+    freq_days = period.days
+    have_weekends = index.dayofweek.to_series().between(5, 6).mean() > 2 / 7 * .6
+    annual_days = (52 if freq_days == 7 else 12 if freq_days == 31 else 1 if freq_days == 365
+                   else (365 if have_weekends else 252))
+    freq = {7: "W", 31: "ME", 365: "YE"}.get(freq_days, "D")
+    day_returns = pd.DataFrame(equity.T, index=index).resample(freq).last().dropna().pct_change()
+    gmean = _geometric_mean(day_returns)
+    ann_return = (1 + gmean) ** annual_days - 1
+    ann_vol = np.sqrt(
+        (day_returns.var(ddof=1).to_numpy() + (1 + gmean) ** 2) ** annual_days - (1 + gmean) ** (2 * annual_days)
+    )
+    with np.errstate(divide="ignore", invalid="ignore"):
+        sharpe = (ann_return * 100) / np.where(ann_vol * 100 == 0, np.nan, ann_vol * 100)
+
+    cfg_idx = trades["config"].astype(int)
+    trade_count = np.bincount(cfg_idx, minlength=k)
+    trade_ret = trades["exit_price"] / trades["entry_price"] - 1 if len(cfg_idx) else np.array([])
+    log_sum = np.bincount(cfg_idx, weights=np.log(np.clip(trade_ret + 1, 1e-300, None)), minlength=k)
+    any_bad = np.bincount(cfg_idx, weights=(trade_ret + 1 <= 0).astype(float), minlength=k) > 0
+    with np.errstate(divide="ignore", invalid="ignore"):
+        avg_trade = np.where(any_bad, 0.0, np.exp(log_sum / trade_count) - 1)
+
+    return pd.DataFrame({
+        "total_return": total_return,
+        "sharpe": sharpe,
+        "max_drawdown": max_drawdown,
+        "avg_trade_return": np.nan_to_num(avg_trade),
+        "trade_count": trade_count.astype(int),
+    })
+
+
+# ─────────────────────────────────────────────────────────
+# Entry points
+# ─────────────────────────────────────────────────────────
+def run_grid_backtest_df(df: pd.DataFrame, configs: List[StrategyConfig]) -> pd.DataFrame:
+    """Metrics for every config on an OHLC frame (``close``/``Close`` column, datetime index)."""
+    df = df.rename(columns=str.lower).sort_index()
+    if df[["open", "high", "low", "close"]].isnull().values.any():
+        raise ValueError("Some OHLC values are missing (NaN). Drop or fill them first.")
+
+    sim = simulate_grid(
+        df["close"].to_numpy(dtype=float),
+        configs,
+        cash=settings.capital_per_trade,
+        commission=getattr(settings, "backtest_commission", 0.001),
+    )
+    return grid_stats(sim["equity"], sim["trades"], pd.DatetimeIndex(df.index))
+
+
+def run_backtest_grid(stock: str, configs: List[StrategyConfig], start=None, end=None, run_date=None) -> List[dict]:
+    """
+    Grid counterpart of ``run_backtest_config``: one price fetch, one
+    vectorized pass, and one metrics dict per config (same keys), in order.
+    """
+    if not configs:
+        return []
+    if run_date:
+        run_date = make_naive(pd.to_datetime(run_date))
+        end = run_date
+        start = run_date - timedelta(days=90)
+
+    if start:
+        start = make_naive(pd.to_datetime(start))
+    if end:
+        end = make_naive(pd.to_datetime(end))
+
+    df = fetch_stock_data(stock, start=start or settings.backtest_start, end=end or settings.backtest_end)
+    if df is None or df.empty:
+        return []
+
+    df.index = make_naive_index(pd.to_datetime(df.index))
+    stats = run_grid_backtest_df(df, configs)
+    stats.insert(0, "stock", stock)
+    return stats.to_dict(orient="records")
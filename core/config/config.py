@@ -69,6 +69,7 @@ class TableNames(BaseModel):
     skiplist: str = "skiplist_stocks"
     encoding: str = "stock_encoding"
     grid_params: str = "grid_params"
+    feature_state: str = "stock_feature_state"
 
 
 class FeatureGroupConfig(BaseModel):
@@ -153,7 +154,33 @@ class Settings(BaseSettings):
     price_fetch_interval: str = "day"
     price_fetch_days: int = 2000
     price_cache_min_rows: int = 50
+    last_close_refresh_interval: float = 300.0  # seconds before the last-close index re-reads new days
+    skiplist_cache_ttl: int = 300
+    instrument_cache_ttl: int = 3600
+    ohlcv_store_enabled: bool = True
+    ohlcv_store_dir: Path = Path("cache/ohlcv")
+    ohlcv_store_max_age: int = 6 * 3600
+    ohlcv_store_cache_partitions: int = 256  # decoded partitions kept per process (LRU)
+    model_cache_enabled: bool = True
+    model_cache_dir: Path = Path("cache/models")
+    model_pool_ttl: float = 60.0  # seconds between "has this model changed?" checks
+    planner_eval_workers: int = 1
+    rl_train_workers: int = 1
+    replay_flush_size: int = 500
+    replay_flush_interval: float = 5.0
+    replay_spool_dir: Path = Path("cache/replay_spool")
+    replay_sample_size: int = 200_000
+    replay_recency_half_life_days: Optional[float] = None
     capital_per_trade: float = 10000.0
+    event_publish_mode: str = "sync"  # "sync" (one XADD per event) or "batched" (EventPublisher)
+    event_batch_size: int = 500
+    event_flush_interval: float = 1.0
+    event_stream_maxlen: Optional[int] = 100_000  # approximate (MAXLEN ~); None keeps everything
+    event_read_count: int = 100
+    event_block_ms: int = 5000
+    event_claim_idle_ms: int = 60_000
+    event_max_deliveries: int = 5
+    event_consumer_workers: int = 1
 
     test_size: float = 0.2
     random_state: int = 42
@@ -14,6 +14,9 @@ from core.logger.logger import logger
 from core.config.config import settings
 from db.db import SessionLocal
 from db.conflict_utils import insert_with_conflict_handling
+from db.columnar_reader import COLUMNAR_MODELS, read_price_history, read_table_columnar
+from core.skiplist.skiplist import is_in_skiplist, invalidate_skiplist_cache
+from core.data_provider import last_close_index, ohlcv_store
 from integrations.zerodha_fetcher import fetch_historical_data
 from db.models import (
     Instrument,
@@ -60,19 +63,20 @@ def log_once(key: str, level: str = "info", message: str = ""):
     _log_cache.add(key)
     getattr(logger, level)(message)
 
-def fetch_stock_data(symbol: str, start: str = None, end: str = None, interval: str = None, days: int = None) -> pd.DataFrame:
+INTERVAL_ALIASES = {
+    "1m": "minute", "3m": "3minute", "5m": "5minute",
+    "10m": "10minute", "15m": "15minute", "30m": "30minute",
+    "60m": "60minute", "day": "day", "week": "week", "month": "month",
+}
+
+
+def _resolve_fetch_window(start, end, interval: str, days: int = None):
+    """Normalise interval aliases and the (start, end) window the way fetch_stock_data expects."""
     from pytz import timezone
     from integrations.zerodha_fetcher import MINIMUM_START_DATE
     from utils.time_utils import make_naive  # ✅ fix tz mismatch
 
     ist = timezone("Asia/Kolkata")
-    interval = interval or settings.price_fetch_interval
-
-    INTERVAL_ALIASES = {
-        "1m": "minute", "3m": "3minute", "5m": "5minute",
-        "10m": "10minute", "15m": "15minute", "30m": "30minute",
-        "60m": "60minute", "day": "day", "week": "week", "month": "month",
-    }
     normalized_interval = INTERVAL_ALIASES.get(interval, interval)
 
     if isinstance(start, str): start = pd.to_datetime(start)
@@ -100,40 +104,42 @@ def fetch_stock_data(symbol: str, start: str = None, end: str = None, interval:
     start = make_naive(start)
     MINIMUM_START_DATE = make_naive(MINIMUM_START_DATE)
     start = max(start, MINIMUM_START_DATE)
+    return normalized_interval, start, end
 
-    session = SessionLocal()
-    if session.query(SkiplistStock).filter(SkiplistStock.stock == symbol).first():
+
+def _finalize_price_frame(df: pd.DataFrame, start, end) -> pd.DataFrame:
+    df = to_naive_utc(df, "date")
+    df = df.set_index("date").sort_index()
+    df.index = make_naive_index(df.index)
+    df = df.loc[start.date():end.date()]
+    df.attrs["start"] = start.date()
+    df.attrs["end"] = end.date()
+    return df
+
+
+def fetch_stock_data(symbol: str, start: str = None, end: str = None, interval: str = None, days: int = None) -> pd.DataFrame:
+    interval = interval or settings.price_fetch_interval
+    normalized_interval, start, end = _resolve_fetch_window(start, end, interval, days)
+
+    if is_in_skiplist(symbol, silent=True):
         if log_once(f"skiplist:{symbol}"):
             logger.warning(f"⏩ Skipping {symbol} — already in skiplist.")
-        session.close()
         return pd.DataFrame()
 
+    if settings.ohlcv_store_enabled and ohlcv_store.is_fresh(symbol, normalized_interval):
+        try:
+            df = ohlcv_store.read_ohlcv(symbol, normalized_interval, start, end)
+            if df is not None and not df.empty:
+                return _finalize_price_frame(df, start, end)
+        except Exception as e:
+            logger.warning(f"⚠ OHLCV store read failed for {symbol} @ {normalized_interval}: {e}")
 
     try:
-        Model = ORM_MODEL_MAP[settings.tables.price_history]
-        recs = (
-            session.query(Model)
-            .filter(Model.symbol == symbol)
-            .filter(Model.interval == normalized_interval)
-            .filter(Model.date >= start.date())
-            .filter(Model.date <= end.date())
-            .order_by(Model.date)
-            .all()
-        )
-        if recs:
-            df = pd.DataFrame([r.__dict__ for r in recs])
-            df = df.drop(columns=["_sa_instance_state"], errors="ignore")
-            df = to_naive_utc(df, "date")
-            df = df.set_index("date").sort_index()
-            df.index = make_naive_index(df.index)
-            df = df.loc[start.date():end.date()]
-            df.attrs["start"] = start.date()
-            df.attrs["end"] = end.date()
-            return df
+        df = read_price_history(symbol, normalized_interval, start=start.date(), end=end.date())
+        if not df.empty:
+            return _finalize_price_frame(df, start, end)
     except Exception as e:
         logger.warning(f"⚠ Could not load cached {interval} data for {symbol}: {e}")
-    finally:
-        session.close()
 
     logger.info(f"📡 Fetching historical data for {symbol} ({start.date()} → {end.date()})")
     df = fetch_historical_data(symbol, start=start, end=end, interval="minute")
@@ -207,6 +213,7 @@ def fetch_stock_data(symbol: str, start: str = None, end: str = None, interval:
         skip = SkiplistStock(stock=symbol, reason="Missing price data", date_added=datetime.now())
         session.merge(skip)
         session.commit()
+        invalidate_skiplist_cache()
         logger.info(f"📛 {symbol} added to skiplist.")
     except Exception as e:
         logger.warning(f"⚠ Could not add {symbol} to skiplist: {e}")
@@ -215,6 +222,84 @@ def fetch_stock_data(symbol: str, start: str = None, end: str = None, interval:
 
     return pd.DataFrame()
 
+def fetch_stock_data_many(
+    symbols: List[str],
+    start: str = None,
+    end: str = None,
+    interval: str = None,
+    days: int = None,
+    fetch_missing: bool = True,
+    as_frame: bool = False,
+):
+    """
+    Batch ``fetch_stock_data``: one price query for all symbols (skiplist served from cache).
+
+    Returns ``{symbol: frame}`` (same shape as ``fetch_stock_data`` per symbol), or a
+    single frame indexed by (symbol, date) when ``as_frame=True``. Symbols with no
+    cached bars go through ``fetch_stock_data`` individually when ``fetch_missing``
+    is set, otherwise they map to an empty frame.
+    """
+    symbols = list(dict.fromkeys(symbols))
+    interval = interval or settings.price_fetch_interval
+    requested_start, requested_end = start, end
+    normalized_interval, start, end = _resolve_fetch_window(start, end, interval, days)
+
+    wanted = [s for s in symbols if not is_in_skiplist(s, silent=True)]
+
+    frames = {s: pd.DataFrame() for s in symbols}
+    if settings.ohlcv_store_enabled:
+        for sym in wanted:
+            if not ohlcv_store.is_fresh(sym, normalized_interval):
+                continue
+            try:
+                df = ohlcv_store.read_ohlcv(sym, normalized_interval, start, end)
+                if df is not None and not df.empty:
+                    frames[sym] = _finalize_price_frame(df, start, end)
+            except Exception as e:
+                logger.warning(f"⚠ OHLCV store read failed for {sym} @ {normalized_interval}: {e}")
+
+    from_db = [s for s in wanted if frames[s].empty]
+    if from_db:
+        try:
+            df_all = read_price_history(from_db, normalized_interval, start=start.date(), end=end.date())
+            for sym, df in df_all.groupby("symbol", sort=False):
+                frames[sym] = _finalize_price_frame(df.reset_index(drop=True), start, end)
+        except Exception as e:
+            logger.warning(f"⚠ Batch load of cached {interval} data failed for {len(from_db)} symbols: {e}")
+
+    if fetch_missing:
+        for sym in wanted:
+            if frames[sym].empty:
+                frames[sym] = fetch_stock_data(sym, start=requested_start, end=requested_end, interval=interval, days=days)
+
+    if as_frame:
+        non_empty = {s: df for s, df in frames.items() if not df.empty}
+        if not non_empty:
+            return pd.DataFrame()
+        return pd.concat(non_empty, names=["symbol", "date"])
+    return frames
+
+
+def _invalidate_ohlcv_store(df: pd.DataFrame) -> None:
+    if "symbol" not in df.columns:
+        return
+    df = df.assign(
+        interval=df["interval"] if "interval" in df.columns else None,
+        date=pd.to_datetime(df["date"]) if "date" in df.columns else pd.NaT,
+    )
+    # Earliest written bar per symbol/interval: the next store sync re-reads from there
+    spans = df.groupby(["symbol", "interval"], dropna=False)["date"].min()
+    for (symbol, interval), since in spans.items():
+        try:
+            ohlcv_store.invalidate(
+                str(symbol),
+                INTERVAL_ALIASES.get(interval, interval) if pd.notna(interval) else None,
+                since=since if pd.notna(since) else None,
+            )
+        except Exception as e:
+            logger.warning(f"⚠ OHLCV store invalidation failed for {symbol}: {e}")
+
+
 def save_data(df: pd.DataFrame, table_name: str, if_exists: str = "ignore") -> None:
     if df is None or df.empty:
         logger.warning(f"⚠️ Not saving '{table_name}': DataFrame is empty.")
@@ -250,6 +335,9 @@ def save_data(df: pd.DataFrame, table_name: str, if_exists: str = "ignore") -> N
     try:
         insert_with_conflict_handling(df, phys, if_exists=if_exists)
         logger.success(f"✅ Saved data to '{phys}' successfully.")
+        if phys == settings.tables.price_history:
+            last_close_index.observe(df)
+            _invalidate_ohlcv_store(df)
     except Exception as e:
         logger.error(f"❌ save_data to '{phys}' failed: {e}")
 
@@ -262,18 +350,28 @@ def load_data(table_name: str, interval: str = None, stock: str = None, start: s
             logger.error(f"Unknown table requested: {table_name}")
             return pd.DataFrame()
 
-        query = session.query(model)
-
-        if hasattr(model, "stock") and stock:
-            query = query.filter(model.stock == stock.upper().strip())
-        if hasattr(model, "date"):
-            if start:
-                query = query.filter(model.date >= pd.to_datetime(start).date())
-            if end:
-                query = query.filter(model.date <= pd.to_datetime(end).date())
-
-        records = query.all()
-        df = pd.DataFrame([r.__dict__ for r in records])
+        if table_name in COLUMNAR_MODELS:
+            key_col = "stock" if hasattr(model, "stock") else None
+            df = read_table_columnar(
+                table_name,
+                key_col=key_col,
+                keys=stock.upper().strip() if (stock and key_col) else None,
+                start=start,
+                end=end,
+            )
+        else:
+            query = session.query(model)
+
+            if hasattr(model, "stock") and stock:
+                query = query.filter(model.stock == stock.upper().strip())
+            if hasattr(model, "date"):
+                if start:
+                    query = query.filter(model.date >= pd.to_datetime(start).date())
+                if end:
+                    query = query.filter(model.date <= pd.to_datetime(end).date())
+
+            records = query.all()
+            df = pd.DataFrame([r.__dict__ for r in records])
         if df.empty:
             return df
 
@@ -295,7 +393,40 @@ def load_data(table_name: str, interval: str = None, stock: str = None, start: s
 
 
 
+def _indexed_closes(symbols: List[str], sim_date) -> dict:
+    """
+    Last closes from the as-of index for the symbols not in the skiplist; ``{}``
+    if it can't be read. Past the index's table watermark only a close from
+    ``sim_date`` itself counts, so unsettled days fall back to the lookback fetch.
+    """
+    wanted = [s for s in symbols if not is_in_skiplist(s, silent=True)]
+    if not wanted:
+        return {}
+    try:
+        return last_close_index.get_index().last_close_many(wanted, sim_date, settled_only=True)
+    except Exception as e:
+        logger.warning(f"⚠ Last-close index unavailable: {e}")
+        return {}
+
+
 def get_last_close(symbol: str, sim_date: datetime = None) -> Optional[float]:
+    """
+    Last close on or before ``sim_date`` from the as-of index. Symbols the index
+    has nothing settled for go through the lookback fetch, which may hit the
+    broker API.
+    """
+    sim_date = pd.to_datetime(sim_date or datetime.now()).normalize()
+    if sim_date.tzinfo is not None:
+        sim_date = sim_date.tz_localize(None)
+    if is_in_skiplist(symbol, silent=True):
+        return None
+    close = _indexed_closes([symbol], sim_date).get(symbol)
+    if close is not None:
+        return close
+    return _get_last_close_lookback(symbol, sim_date)
+
+
+def _get_last_close_lookback(symbol: str, sim_date: datetime = None) -> Optional[float]:
     try:
         sim_date = pd.to_datetime(sim_date or datetime.now()).normalize()
         logger.debug(f"🧪 get_last_close: {symbol} as of {sim_date} | tzinfo: {sim_date.tzinfo}")
@@ -382,6 +513,21 @@ def get_last_close(symbol: str, sim_date: datetime = None) -> Optional[float]:
         logger.exception(f"❌ get_last_close('{symbol}') failed: {e}")
         return None
 
+def get_last_close_many(symbols: List[str], sim_date: datetime = None) -> dict:
+    """
+    Batch ``get_last_close`` from the as-of index (one binary search per symbol).
+    Symbols without cached bars, or whose only cached close predates an
+    unsettled ``sim_date``, are left out so callers can fall back to
+    ``get_last_close`` (which may hit the broker API).
+    """
+    sim_date = pd.to_datetime(sim_date or datetime.now()).normalize()
+    if sim_date.tzinfo is not None:
+        sim_date = sim_date.tz_localize(None)
+
+    closes = _indexed_closes(symbols, sim_date)
+    logger.debug(f"🧪 get_last_close_many: {len(closes)}/{len(symbols)} closes as of {sim_date.date()}")
+    return closes
+
 def list_partitions(base_table_prefix: str = None) -> List[str]:
     prefix = base_table_prefix or "stock_features"
     session = SessionLocal()
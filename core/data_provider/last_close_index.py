@@ -0,0 +1,203 @@
+# core/data_provider/last_close_index.py
+
+"""
+As-of last-close index over ``stock_price_history``.
+
+Per symbol the index keeps three small sorted arrays with one entry per day
+that has bars: the day, that day's last close and the rank of the bar it came
+from. A day with minute bars takes the close of its last minute bar, any
+other day the close of its daily bar. "Last close on or before D" is then a
+binary search over the symbol's days, instead of the expanding-lookback
+price queries ``get_last_close`` used to make.
+
+The index is built with one ``DISTINCT ON`` query. ``refresh()`` re-reads only
+the days from the newest day read from the table on. ``observe(bars)`` merges
+bars as soon as ``save_data`` writes them, so a process sees its own writes
+immediately. ``get_index()`` returns the process-wide index and refreshes it
+once it is older than ``settings.last_close_refresh_interval`` seconds.
+"""
+
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Iterable, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from core.config.config import settings
+from core.logger.logger import logger
+from db.columnar_reader import copy_select
+
+# (days since epoch, close, rank); rank is the bar's epoch second for minute bars, -1 for daily bars
+Series = Tuple[np.ndarray, np.ndarray, np.ndarray]
+
+_DTYPES = {"symbol": object, "close": "float64", "rank": "int64"}
+
+
+def _day_number(value) -> int:
+    ts = pd.Timestamp(value)
+    if ts.tzinfo is not None:
+        ts = ts.tz_localize(None)
+    return int(ts.normalize().value // 86_400_000_000_000)
+
+
+def _merge(old: Optional[Series], days, closes, ranks) -> Series:
+    """Union of ``old`` and the new entries; per day the highest rank wins (later entry on ties)."""
+    if old is not None:
+        days = np.concatenate([old[0], days])
+        closes = np.concatenate([old[1], closes])
+        ranks = np.concatenate([old[2], ranks])
+    order = np.lexsort((ranks, days))
+    days, closes, ranks = days[order], closes[order], ranks[order]
+    last = np.append(days[1:] != days[:-1], True)
+    return days[last], closes[last], ranks[last]
+
+
+class LastCloseIndex:
+    def __init__(self, table_name: str = None):
+        self.table_name = table_name or settings.tables.price_history
+        self._series: Dict[str, Series] = {}
+        self._watermark: Optional[int] = None  # newest day read from the table
+        self.loaded_at = float("-inf")
+        self._lock = threading.Lock()
+
+    def _read(self, since_day: Optional[int] = None) -> pd.DataFrame:
+        since = ""
+        params = {}
+        if since_day is not None:
+            since = "AND date >= %(since)s"
+            params["since"] = pd.Timestamp(since_day, unit="D").date()
+        sql = f"""
+            SELECT DISTINCT ON (symbol, date::date)
+                   symbol, date::date AS day, close,
+                   CASE WHEN COALESCE(interval, 'day') = 'minute'
+                        THEN EXTRACT(EPOCH FROM date)::bigint ELSE -1 END AS rank
+            FROM {self.table_name}
+            WHERE COALESCE(interval, 'day') IN ('minute', 'day') {since}
+            ORDER BY symbol, date::date, COALESCE(interval, 'day') = 'minute' DESC, date DESC
+        """
+        return copy_select(sql, params, dtypes=_DTYPES, parse_dates=["day"])
+
+    def _merge_frame(self, df: pd.DataFrame, from_table: bool = True) -> int:
+        """Merge ``symbol, day, close, rank`` rows; returns the number of symbols touched."""
+        if df.empty:
+            return 0
+        df = df.assign(day=df["day"].values.astype("datetime64[D]").astype(np.int64))
+        with self._lock:
+            for symbol, g in df.groupby("symbol", sort=False):
+                self._series[symbol] = _merge(
+                    self._series.get(symbol),
+                    g["day"].to_numpy(),
+                    g["close"].to_numpy(dtype=float),
+                    g["rank"].to_numpy(dtype=np.int64),
+                )
+            if from_table:
+                # only table reads move the watermark: observed bars say nothing about other writers
+                newest = int(df["day"].max())
+                self._watermark = newest if self._watermark is None else max(self._watermark, newest)
+        return df["symbol"].nunique()
+
+    def build(self) -> "LastCloseIndex":
+        """(Re)load every symbol's daily closes with one query."""
+        t0 = time.perf_counter()
+        df = self._read()
+        with self._lock:
+            self._series, self._watermark = {}, None
+        self._merge_frame(df)
+        self.loaded_at = time.monotonic()
+        logger.info(f"📇 Last-close index: {len(self._series)} symbols, {len(df)} days "
+                    f"in {time.perf_counter() - t0:.2f}s")
+        return self
+
+    def refresh(self) -> int:
+        """Re-read the days from the table watermark on; returns the number of symbols updated."""
+        if self._watermark is None:
+            self.build()
+            return len(self._series)
+        touched = self._merge_frame(self._read(self._watermark))
+        self.loaded_at = time.monotonic()
+        logger.debug(f"📇 Last-close index refreshed: {touched} symbols updated")
+        return touched
+
+    def observe(self, bars: pd.DataFrame) -> None:
+        """Merge freshly saved ``stock_price_history`` rows (``symbol, date, close, interval``)."""
+        if bars is None or bars.empty or not {"symbol", "date", "close"} <= set(bars.columns):
+            return
+        interval = bars["interval"].fillna("day") if "interval" in bars else pd.Series("day", index=bars.index)
+        bars = bars[interval.isin(["minute", "day"])]
+        if bars.empty:
+            return
+        ts = pd.to_datetime(bars["date"])
+        if ts.dt.tz is not None:
+            ts = ts.dt.tz_localize(None)
+        minute = interval.loc[bars.index].eq("minute").to_numpy()
+        self._merge_frame(pd.DataFrame({
+            "symbol": bars["symbol"].astype(str).to_numpy(),
+            "day": ts.dt.normalize().to_numpy(),
+            "close": bars["close"].to_numpy(dtype=float),
+            "rank": np.where(minute, ts.to_numpy().astype("datetime64[s]").astype(np.int64), -1),
+        }), from_table=False)
+
+    def last_close_many(self, symbols: Iterable[str], as_of=None, max_age_days: int = None,
+                        settled_only: bool = False) -> Dict[str, float]:
+        """
+        ``{symbol: close}`` of the last day on or before ``as_of`` (default: today)
+        and at most ``max_age_days`` (default ``settings.price_fetch_days``) before it.
+        Symbols without such a day are left out.
+
+        With ``settled_only`` an older day only counts when ``as_of`` is at or
+        before the table watermark; past it (e.g. a live day whose bars are
+        not stored yet) only a close from ``as_of`` itself is returned.
+        """
+        day = _day_number(as_of or datetime.now())
+        oldest = day - (settings.price_fetch_days if max_age_days is None else max_age_days)
+        if settled_only and (self._watermark is None or day > self._watermark):
+            oldest = day
+        closes = {}
+        series = self._series
+        for symbol in symbols:
+            s = series.get(symbol)
+            if s is None:
+                continue
+            i = int(np.searchsorted(s[0], day, side="right")) - 1
+            if i >= 0 and s[0][i] >= oldest:
+                closes[symbol] = float(s[1][i])
+        return closes
+
+    def last_close(self, symbol: str, as_of=None, max_age_days: int = None,
+                   settled_only: bool = False) -> Optional[float]:
+        return self.last_close_many([symbol], as_of, max_age_days, settled_only).get(symbol)
+
+    def stats(self) -> dict:
+        return {
+            "symbols": len(self._series),
+            "days": int(sum(len(s[0]) for s in self._series.values())),
+            "table_watermark": None if self._watermark is None else pd.Timestamp(self._watermark, unit="D").date(),
+            "age_seconds": round(time.monotonic() - self.loaded_at, 1),
+        }
+
+
+_index: Optional[LastCloseIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_index() -> LastCloseIndex:
+    """The process-wide index; built on first use, refreshed when stale."""
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = LastCloseIndex().build()
+        elif time.monotonic() - _index.loaded_at >= settings.last_close_refresh_interval:
+            try:
+                _index.refresh()
+            except Exception as e:
+                logger.warning(f"⚠️ Last-close index refresh failed, serving loaded copy: {e}")
+                _index.loaded_at = time.monotonic()
+        return _index
+
+
+def observe(bars: pd.DataFrame) -> None:
+    """Feed saved bars to the process-wide index, if one has been built."""
+    if _index is not None:
+        _index.observe(bars)
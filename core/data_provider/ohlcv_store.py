@@ -0,0 +1,272 @@
+# core/data_provider/ohlcv_store.py
+
+"""
+Local columnar mirror of ``stock_price_history``.
+
+Layout::
+
+    <ohlcv_store_dir>/<interval>/<symbol>/<year>.arrow   uncompressed Arrow IPC
+    <ohlcv_store_dir>/<interval>/<symbol>/_sync.json     last synced bar + sync time
+
+Partitions are read through ``pa.memory_map`` and the resulting tables kept in
+a per-process LRU of ``ohlcv_store_cache_partitions`` entries, so repeated
+reads (grid searches, backtests, RL frame building) touch the file once and
+slice the mapped buffers without copying. The map's file descriptor is closed
+right after reading; the mapping itself lives as long as the table's buffers.
+``sync_store`` pulls only bars newer than each symbol's last synced date from
+Postgres, and ``invalidate`` marks a symbol stale when its Postgres bars change,
+recording the earliest changed day (``dirty_from``) for the next sync to re-read.
+"""
+
+import argparse
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.ipc as ipc
+
+from core.config.config import settings
+from core.logger.logger import logger
+from db.columnar_reader import read_price_history
+
+PRICE_COLUMNS = ["date", "open", "high", "low", "close", "volume"]
+SCHEMA = pa.schema([
+    ("date", pa.timestamp("us")),
+    ("open", pa.float64()),
+    ("high", pa.float64()),
+    ("low", pa.float64()),
+    ("close", pa.float64()),
+    ("volume", pa.int64()),
+])
+META_FILE = "_sync.json"
+
+# path → (mtime_ns, table), least recently used first
+_partitions: "OrderedDict[Path, tuple]" = OrderedDict()
+_metas: Dict[Path, tuple] = {}
+_lock = threading.Lock()
+
+
+def _symbol_dir(symbol: str, interval: str) -> Path:
+    return Path(settings.ohlcv_store_dir) / interval / symbol
+
+
+def _read_meta(symbol: str, interval: str) -> Optional[dict]:
+    path = _symbol_dir(symbol, interval) / META_FILE
+    try:
+        mtime = path.stat().st_mtime_ns
+    except FileNotFoundError:
+        return None
+    cached = _metas.get(path)
+    if cached and cached[0] == mtime:
+        return cached[1]
+    meta = json.loads(path.read_text())
+    _metas[path] = (mtime, meta)
+    return meta
+
+
+def _atomic_write_text(path: Path, text: str):
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(text)
+    os.replace(tmp, path)
+
+
+def _open_partition(path: Path) -> pa.Table:
+    mtime = path.stat().st_mtime_ns
+    with _lock:
+        cached = _partitions.get(path)
+        if cached and cached[0] == mtime:
+            _partitions.move_to_end(path)
+            return cached[1]
+        # Closing the map releases the fd; its buffers keep the mapping alive
+        with pa.memory_map(str(path), "r") as source:
+            table = ipc.open_file(source).read_all()
+        _partitions[path] = (mtime, table)
+        _partitions.move_to_end(path)
+        while len(_partitions) > max(settings.ohlcv_store_cache_partitions, 1):
+            _partitions.popitem(last=False)
+        return table
+
+
+def _write_partition(path: Path, df: pd.DataFrame):
+    table = pa.Table.from_pandas(df[PRICE_COLUMNS], schema=SCHEMA, preserve_index=False)
+    tmp = path.with_name(path.name + ".tmp")
+    with pa.OSFile(str(tmp), "wb") as sink:
+        with ipc.new_file(sink, SCHEMA) as writer:
+            writer.write_table(table)
+    # Readers holding the old map keep the old inode; new opens see the new file
+    os.replace(tmp, path)
+
+
+def _merge_symbol(symbol: str, interval: str, bars: pd.DataFrame) -> int:
+    folder = _symbol_dir(symbol, interval)
+    folder.mkdir(parents=True, exist_ok=True)
+
+    bars = bars.copy()
+    bars["date"] = pd.to_datetime(bars["date"])
+    bars["volume"] = bars["volume"].astype("int64")
+    for year, part in bars.groupby(bars["date"].dt.year):
+        path = folder / f"{year}.arrow"
+        if path.exists():
+            part = pd.concat([_open_partition(path).to_pandas(), part[PRICE_COLUMNS]], ignore_index=True)
+        part = part.drop_duplicates(subset="date", keep="last").sort_values("date")
+        _write_partition(path, part)
+    return len(bars)
+
+
+def _touch_meta(symbol: str, interval: str, max_date=None, synced_dirty_from=None):
+    """
+    Record a successful sync. ``synced_dirty_from`` is the ``dirty_from`` the
+    sync started from; if ``invalidate`` moved it meanwhile, the symbol stays
+    stale so the next sync picks the new bars up.
+    """
+    meta = _read_meta(symbol, interval) or {}
+    if max_date is not None:
+        max_date = pd.Timestamp(max_date)
+        if meta.get("max_date"):
+            max_date = max(max_date, pd.Timestamp(meta["max_date"]))
+        meta["max_date"] = max_date.isoformat()
+    if meta.get("dirty_from") == synced_dirty_from:
+        meta.pop("dirty_from", None)
+        meta["synced_at"] = time.time()
+    folder = _symbol_dir(symbol, interval)
+    folder.mkdir(parents=True, exist_ok=True)
+    _atomic_write_text(folder / META_FILE, json.dumps(meta))
+
+
+def _sync_start(meta: dict) -> pd.Timestamp:
+    start = pd.Timestamp(meta["max_date"]).normalize()
+    if meta.get("dirty_from"):
+        start = min(start, pd.Timestamp(meta["dirty_from"]).normalize())
+    return start
+
+
+def sync_store(symbols: List[str], interval: str = "day", batch_size: int = 50) -> Dict[str, int]:
+    """
+    Mirror new bars from Postgres for ``symbols``. Symbols never synced get their
+    full history; the rest re-read from their last synced day, or from their
+    ``dirty_from`` day (see ``invalidate``) when that is earlier.
+    Returns rows written per symbol.
+    """
+    written = {}
+    for i in range(0, len(symbols), batch_size):
+        batch = symbols[i:i + batch_size]
+        metas = {s: _read_meta(s, interval) or {} for s in batch}
+        fresh = [s for s in batch if not metas[s].get("max_date")]
+        known = [s for s in batch if s not in fresh]
+        starts = {s: _sync_start(metas[s]) for s in known}
+
+        groups = []
+        if fresh:
+            groups.append(read_price_history(fresh, interval))
+        if known:
+            groups.append(read_price_history(known, interval, start=min(starts.values()).date()))
+
+        for df_all in groups:
+            for sym, bars in df_all.groupby("symbol", sort=False):
+                if sym in starts:
+                    bars = bars[pd.to_datetime(bars["date"]) >= starts[sym]]
+                if not bars.empty:
+                    written[sym] = _merge_symbol(sym, interval, bars)
+                    _touch_meta(sym, interval, max_date=pd.to_datetime(bars["date"]).max(),
+                                synced_dirty_from=metas[sym].get("dirty_from"))
+
+        # Nothing new since the last sync is still a successful sync
+        for sym in known:
+            if sym not in written:
+                _touch_meta(sym, interval, synced_dirty_from=metas[sym].get("dirty_from"))
+
+    logger.info(f"🗄️ OHLCV store sync @ {interval}: {sum(written.values())} rows across {len(written)} symbols")
+    return written
+
+
+def is_fresh(symbol: str, interval: str, max_age: Optional[float] = None) -> bool:
+    meta = _read_meta(symbol, interval)
+    if not meta or "synced_at" not in meta:
+        return False
+    max_age = settings.ohlcv_store_max_age if max_age is None else max_age
+    return time.time() - meta["synced_at"] <= max_age
+
+
+def invalidate(symbol: str, interval: Optional[str] = None, since=None) -> None:
+    """
+    Mark ``symbol``'s mirror (one interval, or all) stale after its Postgres
+    bars changed: reads fall back to Postgres until the next ``sync_store``,
+    which re-reads from ``since`` (the earliest bar written) or, without it,
+    reloads the symbol's full history.
+    """
+    root = Path(settings.ohlcv_store_dir)
+    folders = [root / interval / symbol] if interval else list(root.glob(f"*/{symbol}"))
+    for folder in folders:
+        meta_path = folder / META_FILE
+        with _lock:
+            for path in [p for p in _partitions if p.parent == folder]:
+                del _partitions[path]
+            _metas.pop(meta_path, None)
+        meta = _read_meta(symbol, folder.parent.name)
+        if not meta:
+            continue
+        meta["synced_at"] = 0
+        if since is None:
+            meta.pop("max_date", None)  # next sync treats the symbol as never synced
+            meta.pop("dirty_from", None)
+        else:
+            since = pd.Timestamp(since)
+            if since.tzinfo is not None:
+                since = since.tz_localize(None)
+            if meta.get("dirty_from"):
+                since = min(since, pd.Timestamp(meta["dirty_from"]))
+            meta["dirty_from"] = since.isoformat()
+        _atomic_write_text(meta_path, json.dumps(meta))
+
+
+def read_ohlcv(symbol: str, interval: str, start=None, end=None) -> Optional[pd.DataFrame]:
+    """
+    Bars for ``symbol`` between the calendar days of ``start`` and ``end``
+    (inclusive), or None when the symbol has no mirror.
+    """
+    folder = _symbol_dir(symbol, interval)
+    if not folder.exists():
+        return None
+
+    start_day = pd.Timestamp(start).tz_localize(None).normalize() if start is not None else None
+    end_day = pd.Timestamp(end).tz_localize(None).normalize() if end is not None else None
+
+    years = sorted(int(p.stem) for p in folder.glob("*.arrow"))
+    if start_day is not None:
+        years = [y for y in years if y >= start_day.year]
+    if end_day is not None:
+        years = [y for y in years if y <= end_day.year]
+    if not years:
+        return pd.DataFrame(columns=PRICE_COLUMNS + ["symbol", "interval"])
+
+    table = pa.concat_tables([_open_partition(folder / f"{y}.arrow") for y in years])
+    df = table.to_pandas()
+    if start_day is not None:
+        df = df[df["date"] >= start_day]
+    if end_day is not None:
+        df = df[df["date"] < end_day + pd.Timedelta(days=1)]
+    df["symbol"] = symbol
+    df["interval"] = interval
+    return df.reset_index(drop=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--interval", action="append", help="Interval(s) to mirror (default: day)")
+    parser.add_argument("--symbols", nargs="*", help="Symbols to mirror (default: full universe)")
+    args = parser.parse_args()
+
+    if args.symbols:
+        symbols = args.symbols
+    else:
+        from db.postgres_manager import get_all_symbols
+        symbols = get_all_symbols()
+
+    for interval in args.interval or ["day"]:
+        sync_store(symbols, interval)
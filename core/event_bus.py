@@ -1,9 +1,47 @@
 # core/event_bus.py
 
+"""
+Redis stream event bus (``event_stream``).
+
+``publish_event`` writes one ``XADD`` per call. With
+``settings.event_publish_mode = "batched"`` events are buffered in-process
+instead and ``EventPublisher`` writes them with one pipeline per batch: when
+``event_batch_size`` events are waiting, every ``event_flush_interval``
+seconds, and at process exit. Every ``XADD`` trims the stream with
+``MAXLEN ~ event_stream_maxlen``.
+
+``consume_group`` reads the stream through a named consumer group
+(``XREADGROUP``/``XACK``): each group keeps its own checkpoint, so a
+restarted consumer resumes where the group left off. Handlers receive a list
+of up to ``event_read_count`` events and the batch is acknowledged only
+after the handler returns. Entries left pending by a crashed consumer are
+claimed by a live one after ``event_claim_idle_ms``. A failing batch is retried
+in halves, so only events that fail on their own stay pending; those delivered
+more than ``event_max_deliveries`` times go to ``<stream>:dead`` (while the
+handler still succeeds on other events) and ``requeue_dead`` replays them. Each event also
+carries its ``consumer_group``; ``event_uuid`` turns ``(group, stream_id)``
+into a stable id, so handlers that key their writes on it stay idempotent
+under redelivery.
+``run_group_workers`` runs several consumer processes for one group.
+"""
+
+import atexit
 import json
+import multiprocessing
+import os
+import socket
+import threading
+import uuid
 from datetime import datetime
+from typing import List, Optional
+
+from core.config.config import settings
 from core.logger.logger import logger
 
+STREAM = "event_stream"
+DEAD_LETTER_SUFFIX = ":dead"
+EVENT_ID_NAMESPACE = uuid.UUID("6f1d2c3a-5b7e-4e0a-9c1d-2f8a4b6e7d90")
+
 try:
     import redis
     r = redis.Redis(decode_responses=True)
@@ -13,20 +51,168 @@ except Exception as e:
     REDIS_ENABLED = False
     logger.warning(f"⚠️ Redis not available — EventBus disabled: {e}")
 
-def publish_event(event_type: str, payload: dict):
+def _stream_fields(payload: dict) -> dict:
+    """Stream entries only hold flat strings/numbers: JSON-encode containers, stringify the rest."""
+    fields = {}
+    for key, value in payload.items():
+        if isinstance(value, (str, bytes, int, float)) and not isinstance(value, bool):
+            fields[key] = value
+        elif isinstance(value, (dict, list, tuple)):
+            fields[key] = json.dumps(value, default=str)
+        else:
+            fields[key] = "" if value is None else str(value)
+    return fields
+
+
+def _event_fields(event_type: str, payload: dict, timestamp: str = None) -> dict:
     payload = payload.copy()  # avoid modifying original
-    payload['event_type'] = event_type
-    payload['timestamp'] = datetime.utcnow().isoformat()
+    payload["event_type"] = event_type
+    payload["timestamp"] = timestamp or datetime.utcnow().isoformat()
+    return _stream_fields(payload)
+
+
+def _xadd_many(client, entries: List[dict], stream: str = STREAM, maxlen: Optional[int] = None) -> None:
+    """All ``entries`` in one pipelined round trip."""
+    maxlen = settings.event_stream_maxlen if maxlen is None else maxlen
+    pipe = client.pipeline(transaction=False)
+    for fields in entries:
+        pipe.xadd(stream, fields, maxlen=maxlen or None, approximate=True)
+    pipe.execute()
+
+
+class EventPublisher:
+    """Buffers events and writes them in pipelined batches (see the module docstring)."""
+
+    def __init__(
+        self,
+        client=None,
+        stream: str = STREAM,
+        batch_size: Optional[int] = None,
+        flush_interval: Optional[float] = None,
+        maxlen: Optional[int] = None,
+    ):
+        self.client = client if client is not None else r
+        self.stream = stream
+        self.batch_size = batch_size or settings.event_batch_size
+        self.flush_interval = flush_interval or settings.event_flush_interval
+        self.maxlen = settings.event_stream_maxlen if maxlen is None else maxlen
+
+        self._lock = threading.Lock()          # guards _pending
+        self._flush_lock = threading.Lock()    # one pipeline at a time, in publish order
+        self._pending: List[dict] = []
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self.published = 0
+        self.flushes = 0
+        self.dropped = 0
+
+        self._thread = threading.Thread(target=self._run, name=f"event-publisher-{stream}", daemon=True)
+        self._thread.start()
+
+    def publish(self, event_type: str, payload: dict) -> None:
+        fields = _event_fields(event_type, payload)
+        with self._lock:
+            self._pending.append(fields)
+            full = len(self._pending) >= self.batch_size
+        if full:
+            self.flush()
+
+    def flush(self) -> int:
+        """Write everything buffered so far; returns the number of events sent."""
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, []
+            if not batch:
+                return 0
+            try:
+                _xadd_many(self.client, batch, self.stream, self.maxlen)
+            except Exception as e:
+                self.dropped += len(batch)
+                logger.warning(f"⚠️ Failed to publish {len(batch)} buffered events: {e}")
+                return 0
+            self.published += len(batch)
+            self.flushes += 1
+            logger.debug(f"📡 {len(batch)} events published to Redis")
+            return len(batch)
+
+    def close(self) -> None:
+        self._stop.set()
+        self._wake.set()
+        self.flush()
+
+    def stats(self) -> dict:
+        with self._lock:
+            pending = len(self._pending)
+        return {"published": self.published, "flushes": self.flushes, "dropped": self.dropped, "pending": pending}
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            if self._stop.is_set():
+                break
+            self.flush()
+
+
+_publisher: Optional[EventPublisher] = None
+_publisher_lock = threading.Lock()
+
+
+def get_publisher() -> EventPublisher:
+    """Process-wide batched publisher; flushed automatically at exit."""
+    global _publisher
+    with _publisher_lock:
+        if _publisher is None:
+            _publisher = EventPublisher()
+            atexit.register(_publisher.close)
+        return _publisher
+
+
+def flush_events() -> int:
+    """Flush the process publisher if one exists (e.g. at the end of a cycle)."""
+    return _publisher.flush() if _publisher else 0
+
+
+def _batched() -> bool:
+    return REDIS_ENABLED and settings.event_publish_mode == "batched"
+
+
+def publish_event(event_type: str, payload: dict):
+    if _batched():
+        get_publisher().publish(event_type, payload)
+        return
 
     if REDIS_ENABLED:
         try:
-            r.xadd("event_stream", payload)
+            maxlen = settings.event_stream_maxlen
+            r.xadd(STREAM, _event_fields(event_type, payload), maxlen=maxlen or None, approximate=True)
             logger.debug(f"📡 Event published to Redis: {event_type}")
         except Exception as e:
             logger.warning(f"⚠️ Failed to publish event: {e}")
     else:
         logger.debug(f"[EventBus DISABLED] {event_type}: {payload}")
 
+def publish_events(events):
+    """Publish ``(event_type, payload)`` pairs with one pipelined round trip."""
+    events = list(events)
+    if not events:
+        return
+    if _batched():
+        publisher = get_publisher()
+        for event_type, payload in events:
+            publisher.publish(event_type, payload)
+        return
+
+    if REDIS_ENABLED:
+        now = datetime.utcnow().isoformat()
+        try:
+            _xadd_many(r, [_event_fields(event_type, payload, now) for event_type, payload in events])
+            logger.debug(f"📡 {len(events)} events published to Redis")
+        except Exception as e:
+            logger.warning(f"⚠️ Failed to publish {len(events)} events: {e}")
+    else:
+        logger.debug(f"[EventBus DISABLED] {len(events)} events")
+
 def subscribe_to_events(callback, last_id='0'):
     if not REDIS_ENABLED:
         logger.warning("⚠️ Redis subscription skipped — EventBus disabled.")
@@ -34,7 +220,7 @@ def subscribe_to_events(callback, last_id='0'):
 
     while True:
         try:
-            response = r.xread({"event_stream": last_id}, block=0)
+            response = r.xread({STREAM: last_id}, block=0)
             for stream, messages in response:
                 for msg_id, data in messages:
                     callback(data)
@@ -42,3 +228,207 @@ def subscribe_to_events(callback, last_id='0'):
         except Exception as e:
             logger.warning(f"⚠️ Redis subscription error: {e}")
             break
+
+
+# ─── consumer groups ──────────────────────────────────────
+def ensure_group(group: str, stream: str = STREAM, start_id: str = "0", client=None) -> None:
+    """Create ``group`` on ``stream`` (and the stream) unless it exists; new groups start at ``start_id``."""
+    client = client if client is not None else r
+    try:
+        client.xgroup_create(stream, group, id=start_id, mkstream=True)
+        logger.info(f"📡 Created consumer group '{group}' on {stream} from {start_id}")
+    except Exception as e:
+        if "BUSYGROUP" not in str(e):
+            raise
+
+
+def _with_ids(messages, group: str) -> List[dict]:
+    return [
+        {**data, "stream_id": msg_id, "consumer_group": group}
+        for msg_id, data in messages if data is not None
+    ]
+
+
+def event_uuid(event: dict) -> Optional[str]:
+    """Deterministic id for a consumer-group delivery (same on every redelivery); None outside a group."""
+    group, stream_id = event.get("consumer_group"), event.get("stream_id")
+    if not group or not stream_id:
+        return None
+    return str(uuid.uuid5(EVENT_ID_NAMESPACE, f"{group}:{stream_id}"))
+
+
+def _handle_batch(client, stream: str, group: str, handler, messages) -> tuple:
+    """
+    Run ``handler`` on one batch and ack it. A failed batch is retried in
+    halves down to single events, so only the events that fail on their own
+    stay pending for redelivery. Returns ``(acked, failed)`` event counts.
+    """
+    if not messages:
+        return 0, 0
+    ids = [msg_id for msg_id, _ in messages]
+    try:
+        events = _with_ids(messages, group)
+        if events:
+            handler(events)
+    except Exception as e:
+        if len(messages) == 1:
+            logger.warning(f"⚠️ Consumer group '{group}' handler failed on {ids[0]}, left pending: {e}")
+            return 0, 1
+        mid = len(messages) // 2
+        left = _handle_batch(client, stream, group, handler, messages[:mid])
+        right = _handle_batch(client, stream, group, handler, messages[mid:])
+        return left[0] + right[0], left[1] + right[1]
+    client.xack(stream, group, *ids)
+    return len(ids), 0
+
+
+def _reclaim(client, stream: str, group: str, consumer: str, idle_ms: int, count: int,
+             max_deliveries: int, handler_healthy: bool = True):
+    """
+    Claim entries idle for ``idle_ms`` (crashed consumers) and dead-letter the
+    ones that keep failing. Dead-lettering only happens while the handler is
+    succeeding on other events; when everything fails (e.g. the database is
+    down) over-limit entries are retried instead.
+    """
+    pending = client.xpending_range(stream, group, min="-", max="+", count=count, idle=idle_ms)
+    if not pending:
+        return []
+
+    over = [p["message_id"] for p in pending if p["times_delivered"] >= max_deliveries]
+    dead = over if handler_healthy else []
+    if dead:
+        pipe = client.pipeline(transaction=False)
+        for msg_id, data in client.xclaim(stream, group, consumer, idle_ms, dead):
+            pipe.xadd(stream + DEAD_LETTER_SUFFIX, {**(data or {}), "stream_id": msg_id, "consumer_group": group})
+        pipe.xack(stream, group, *dead)
+        pipe.execute()
+        logger.warning(f"☠️ {len(dead)} events failed {max_deliveries} deliveries in '{group}'; moved to {stream}{DEAD_LETTER_SUFFIX}")
+    elif over:
+        logger.warning(f"⚠️ {len(over)} events over {max_deliveries} deliveries in '{group}', but the handler "
+                       f"is failing on everything; retrying instead of dead-lettering")
+
+    retry = [p["message_id"] for p in pending if p["message_id"] not in dead]
+    if not retry:
+        return []
+    claimed = client.xclaim(stream, group, consumer, idle_ms, retry)
+    if claimed:
+        logger.info(f"♻️ Consumer '{consumer}' claimed {len(claimed)} idle events in '{group}'")
+    return claimed
+
+
+def requeue_dead(group: str, handler, stream: str = STREAM, count: int = 1000, client=None) -> int:
+    """
+    Replay ``group``'s dead-lettered events through ``handler`` (same batch
+    splitting as ``consume_group``) and delete the ones it now accepts.
+    Events keep their original ``stream_id``, so ``event_uuid`` is unchanged.
+    Returns the number of events replayed successfully.
+    """
+    client = client if client is not None else (r if REDIS_ENABLED else None)
+    if client is None:
+        return 0
+    dead_stream = stream + DEAD_LETTER_SUFFIX
+    entries = [
+        (dead_id, data) for dead_id, data in client.xrange(dead_stream, count=count)
+        if data.get("consumer_group") == group
+    ]
+    replayed = 0
+    for dead_id, data in entries:
+        fields = {k: v for k, v in data.items() if k not in ("stream_id", "consumer_group")}
+        try:
+            handler(_with_ids([(data.get("stream_id", dead_id), fields)], group))
+        except Exception as e:
+            logger.warning(f"⚠️ Dead event {data.get('stream_id', dead_id)} still fails in '{group}': {e}")
+            continue
+        client.xdel(dead_stream, dead_id)
+        replayed += 1
+    logger.info(f"♻️ Replayed {replayed}/{len(entries)} dead events for '{group}'")
+    return replayed
+
+
+def consume_group(
+    group: str,
+    handler,
+    consumer: Optional[str] = None,
+    stream: str = STREAM,
+    count: Optional[int] = None,
+    block_ms: Optional[int] = None,
+    claim_idle_ms: Optional[int] = None,
+    max_deliveries: Optional[int] = None,
+    start_id: str = "0",
+    stop_event=None,
+    client=None,
+) -> None:
+    """
+    Feed ``stream`` to ``handler(events: list[dict])`` as consumer ``consumer`` of ``group``
+    until ``stop_event`` is set (forever without one; Redis errors are retried
+    with backoff, never fatal). Each event dict carries its ``stream_id`` and
+    ``consumer_group`` (see ``event_uuid``).
+    """
+    client = client if client is not None else (r if REDIS_ENABLED else None)
+    if client is None:
+        logger.warning("⚠️ Redis consumer group skipped — EventBus disabled.")
+        return
+    consumer = consumer or f"{socket.gethostname()}-{os.getpid()}"
+    count = count or settings.event_read_count
+    block_ms = settings.event_block_ms if block_ms is None else block_ms
+    claim_idle_ms = claim_idle_ms or settings.event_claim_idle_ms
+    max_deliveries = max_deliveries or settings.event_max_deliveries
+
+    # Our own unacked entries from a previous run (same consumer name) come first;
+    # ``backlog_id`` walks through them, then ">" reads new entries
+    backlog_id = "0"
+    stop_event = stop_event or threading.Event()
+    backoff = 1.0
+    group_ready = False
+    # Handler results since the last reclaim pass; dead-lettering needs a healthy handler
+    ok = bad = 0
+    while not stop_event.is_set():
+        try:
+            if not group_ready:
+                ensure_group(group, stream, start_id, client)
+                group_ready = True
+            claimed = _reclaim(client, stream, group, consumer, claim_idle_ms, count, max_deliveries,
+                               handler_healthy=ok > 0 or bad == 0)
+            ok, bad = _handle_batch(client, stream, group, handler, claimed)
+
+            response = client.xreadgroup(group, consumer, {stream: backlog_id or ">"},
+                                         count=count, block=None if backlog_id else block_ms)
+            messages = response[0][1] if response else []
+            if backlog_id:
+                backlog_id = messages[-1][0] if messages else None
+            acked, failed = _handle_batch(client, stream, group, handler, messages)
+            ok, bad = ok + acked, bad + failed
+            backoff = 1.0
+        except Exception as e:
+            logger.warning(f"⚠️ Redis consumer group '{group}' error, retrying in {backoff:.0f}s: {e}")
+            stop_event.wait(backoff)
+            backoff = min(backoff * 2, 30.0)
+
+
+def _group_worker(group: str, handler, index: int, kwargs: dict):
+    consume_group(group, handler, consumer=f"{socket.gethostname()}-{group}-{index}", **kwargs)
+
+
+def run_group_workers(group: str, handler, workers: Optional[int] = None, **kwargs) -> None:
+    """
+    Run ``workers`` consumer processes for ``group`` (``handler`` must be picklable).
+    Consumer names are stable per worker index, so a restarted worker picks up
+    its own pending entries first.
+    """
+    workers = workers or settings.event_consumer_workers
+    if workers <= 1:
+        _group_worker(group, handler, 0, kwargs)
+        return
+
+    procs = [
+        multiprocessing.Process(target=_group_worker, args=(group, handler, i, kwargs), name=f"{group}-{i}")
+        for i in range(workers)
+    ]
+    for p in procs:
+        p.start()
+    try:
+        for p in procs:
+            p.join()
+    except KeyboardInterrupt:
+        for p in procs:
+            p.terminate()
@@ -49,4 +49,36 @@ def enrich_features(stock: str, sim_date: datetime, interval: str = "day") -> pd
         logger.error(f"❌ enrich_features() failed for {stock} @ {interval}: {e}")
         return pd.DataFrame()
     finally:
-        session.close()
\ No newline at end of file
+        session.close()
+
+def enrich_features_many(stocks, sim_date: datetime, interval: str = "day") -> pd.DataFrame:
+    """
+    Batch ``enrich_features``: one feature row per stock for ``sim_date`` from a
+    single query, with the same NaN / suspicious-value rejections. Stocks
+    without a usable row are absent from the result.
+    """
+    from db.columnar_reader import read_features
+
+    table_name = settings.interval_feature_table_map.get(interval)
+    if not table_name:
+        logger.error(f"❌ Unknown interval '{interval}' for feature enrichment.")
+        return pd.DataFrame()
+
+    stocks = list(dict.fromkeys(stocks))
+    sim_date = pd.to_datetime(sim_date).date()
+    try:
+        df = read_features(table_name, stocks, start=sim_date, end=sim_date)
+    except Exception as e:
+        logger.error(f"❌ enrich_features_many() failed for {len(stocks)} stocks @ {interval}: {e}")
+        return pd.DataFrame()
+    if df.empty:
+        logger.warning(f"⚠️ No features for {len(stocks)} stocks on {sim_date} @ {interval}.")
+        return df
+
+    df = to_naive_utc(df.drop_duplicates(subset=["stock"], keep="first").reset_index(drop=True), "date")
+    key = df[["sma_short", "sma_long", "rsi_thresh"]]
+    ok = key.notna().all(axis=1) & (df["sma_short"] != df["sma_long"]) & ~(df["rsi_thresh"] > 100)
+    if not ok.all():
+        logger.warning(f"⚠️ Skipping {int((~ok).sum())} stocks with NaN or suspicious key features @ {interval}.")
+    logger.info(f"✅ Features ready for {int(ok.sum())}/{len(stocks)} stocks on {sim_date} @ {interval}")
+    return df[ok].reset_index(drop=True)
@@ -1,6 +1,6 @@
 import pandas as pd
 from datetime import datetime
-from core.feature_engineering.feature_enricher import enrich_features
+from core.feature_engineering.feature_enricher import enrich_features, enrich_features_many
 
 def enrich_multi_interval_features(stock: str, sim_date: datetime, intervals: list = ["day", "60minute", "15minute"]) -> pd.DataFrame:
     dfs = []
@@ -20,3 +20,17 @@ def enrich_multi_interval_features(stock: str, sim_date: datetime, intervals: li
         merged = pd.merge(merged, df, on=["stock", "date"], how="outer")
 
     return merged
+
+
+def enrich_multi_interval_features_many(stocks: list, sim_date: datetime, intervals: list = ["day", "60minute", "15minute"]) -> pd.DataFrame:
+    """``enrich_multi_interval_features`` for many stocks: one row per stock, one query per interval."""
+    merged = None
+    for interval in intervals:
+        df = enrich_features_many(stocks, sim_date, interval)
+        if df.empty:
+            continue
+        df = df.add_suffix(f"_{interval}")
+        df = df.rename(columns={f"stock_{interval}": "stock", f"date_{interval}": "date"})
+        merged = df if merged is None else pd.merge(merged, df, on=["stock", "date"], how="outer")
+
+    return merged if merged is not None else pd.DataFrame()
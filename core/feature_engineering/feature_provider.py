@@ -1,6 +1,6 @@
 import pandas as pd
 from core.data_provider.data_provider import fetch_stock_data, load_data
-from core.feature_engineering.precompute_features import compute_features, insert_feature_row
+from core.feature_engineering.precompute_features import compute_features, bulk_insert_features
 from db.db import SessionLocal
 from core.logger.logger import logger
 from core.config.config import settings
@@ -56,17 +56,11 @@ def process_and_insert(df_price: pd.DataFrame, stock: str, interval: str) -> pd.
         logger.error(f"Table not found for interval: {interval}")
         return pd.DataFrame()
 
-    session = SessionLocal()
     try:
-        for _, row in df_feat.iterrows():
-            insert_feature_row(session, table, row.to_dict(), refresh=True)
-        session.commit()
+        bulk_insert_features(df_feat, table, refresh=True)
         logger.success(f"Inserted {len(df_feat)} features for {stock} @ {interval}")
     except Exception as e:
-        session.rollback()
         logger.error(f"Insert failed for {stock} @ {interval}: {e}")
-    finally:
-        session.close()
 
     return df_feat
 
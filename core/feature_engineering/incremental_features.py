@@ -0,0 +1,297 @@
+# core/feature_engineering/incremental_features.py
+
+"""
+Incremental feature computation.
+
+``RollingFeatureState`` carries everything ``compute_features`` needs to emit
+the next bar — EMA accumulators for RSI/MACD, the Wilder ATR, ring buffers for
+the SMA/Bollinger/volatility/volume windows and cumulative VWAP sums — so
+appending N bars costs O(N) instead of a full recompute over the lookback.
+
+Feeding a state bars one chunk at a time gives the same values as running
+``compute_features`` over all of those bars in one go. States are checkpointed
+per (stock, interval) in ``stock_feature_state`` next to the feature tables.
+"""
+
+import json
+import math
+from collections import deque
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from core.config.config import settings
+from core.logger.logger import logger
+from core.data_provider.data_provider import fetch_stock_data
+from core.feature_engineering.precompute_features import (
+    DAYS_LOOKBACK,
+    bulk_insert_features,
+)
+from core.feature_engineering.panel_features import (
+    SMA_SHORT, SMA_LONG, RSI_WINDOW, MACD_FAST, MACD_SLOW, MACD_SIGN,
+    ATR_WINDOW, BB_WINDOW, BB_DEV, VOL_WINDOW, SPIKE_WINDOW,
+)
+from db.postgres_manager import run_query
+
+_NAN = float("nan")
+
+
+# Checkpoint fields that may hold None ("not started yet"); non-finite values
+# there are listed under "non_finite" so they do not come back as None
+_SCALAR_FIELDS = ("prev_close", "ema_up", "ema_dn", "ema_fast", "ema_slow",
+                  "macd_signal", "atr", "cum_pv", "cum_v")
+
+
+def _finite_or_none(value):
+    return value if value is None or math.isfinite(value) else None
+
+
+def _none_to_nan(values) -> list:
+    return [_NAN if v is None else v for v in values]
+
+
+def _ema_step(prev, value: float, alpha: float) -> float:
+    return value if prev is None else (1.0 - alpha) * prev + alpha * value
+
+
+class RollingFeatureState:
+    """Rolling indicator state for one (stock, interval) series."""
+
+    def __init__(self):
+        self.n = 0
+        self.last_date = None
+        self.prev_close = None
+        self.closes = deque(maxlen=max(SMA_LONG, BB_WINDOW))
+        self.volumes = deque(maxlen=SPIKE_WINDOW)
+        self.returns = deque(maxlen=VOL_WINDOW)
+        self.ema_up = None
+        self.ema_dn = None
+        self.ema_fast = None
+        self.ema_slow = None
+        self.macd_signal = None
+        self.macd_count = 0
+        self.atr = None
+        self.tr_seed = []
+        self.cum_pv = 0.0
+        self.cum_v = 0.0
+
+    # ── serialisation ───────────────────────────────────────────
+    def to_dict(self) -> dict:
+        """JSON-safe (JSONB rejects NaN/inf): non-finite values become null."""
+        data = {
+            "n": self.n,
+            "last_date": self.last_date.isoformat() if self.last_date is not None else None,
+            "closes": [_finite_or_none(v) for v in self.closes],
+            "volumes": [_finite_or_none(v) for v in self.volumes],
+            "returns": [_finite_or_none(v) for v in self.returns],
+            "macd_count": self.macd_count,
+            "tr_seed": [_finite_or_none(v) for v in self.tr_seed],
+            "non_finite": {},
+        }
+        for key in _SCALAR_FIELDS:
+            value = getattr(self, key)
+            data[key] = _finite_or_none(value)
+            if value is not None and data[key] is None:
+                data["non_finite"][key] = repr(float(value))  # 'nan', 'inf', '-inf'
+        return data
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "RollingFeatureState":
+        state = cls()
+        for key in ("n", "macd_count") + _SCALAR_FIELDS:
+            setattr(state, key, data.get(key, getattr(state, key)))
+        for key, value in (data.get("non_finite") or {}).items():
+            setattr(state, key, float(value))
+        state.last_date = pd.Timestamp(data["last_date"]) if data.get("last_date") else None
+        state.closes.extend(_none_to_nan(data.get("closes", [])))
+        state.volumes.extend(_none_to_nan(data.get("volumes", [])))
+        state.returns.extend(_none_to_nan(data.get("returns", [])))
+        state.tr_seed = _none_to_nan(data.get("tr_seed", []))
+        return state
+
+    # ── update ─────────────────────────────────────────────────
+    def _step(self, high: float, low: float, close: float, volume: float) -> dict:
+        prev = self.prev_close
+        self.closes.append(close)
+        self.volumes.append(volume)
+        self.n += 1
+        n = self.n
+        row = {}
+
+        closes = np.fromiter(self.closes, dtype=float)
+        row["sma_short"] = closes[-SMA_SHORT:].mean() if n >= SMA_SHORT else _NAN
+        row["sma_long"] = closes[-SMA_LONG:].mean() if n >= SMA_LONG else _NAN
+
+        # RSI — Wilder smoothing; the first bar contributes a 0 move, as in ta
+        diff = close - prev if prev is not None else 0.0
+        self.ema_up = _ema_step(self.ema_up, max(diff, 0.0), 1.0 / RSI_WINDOW)
+        self.ema_dn = _ema_step(self.ema_dn, max(-diff, 0.0), 1.0 / RSI_WINDOW)
+        if n < RSI_WINDOW:
+            row["rsi_thresh"] = _NAN
+        elif self.ema_dn == 0:
+            row["rsi_thresh"] = 100.0
+        else:
+            row["rsi_thresh"] = 100.0 - 100.0 / (1.0 + self.ema_up / self.ema_dn)
+
+        # MACD — the signal line starts at the first complete MACD value
+        self.ema_fast = _ema_step(self.ema_fast, close, 2.0 / (MACD_FAST + 1))
+        self.ema_slow = _ema_step(self.ema_slow, close, 2.0 / (MACD_SLOW + 1))
+        if n >= MACD_SLOW:
+            macd = self.ema_fast - self.ema_slow
+            self.macd_signal = _ema_step(self.macd_signal, macd, 2.0 / (MACD_SIGN + 1))
+            self.macd_count += 1
+            row["macd"] = macd
+            row["macd_histogram"] = macd - self.macd_signal if self.macd_count >= MACD_SIGN else _NAN
+        else:
+            row["macd"] = _NAN
+            row["macd_histogram"] = _NAN
+
+        self.cum_pv += volume * (high + low + close) / 3
+        self.cum_v += volume
+        if self.cum_v > 0:
+            vwap = self.cum_pv / self.cum_v
+            row["vwap"] = vwap
+            row["vwap_dev"] = (close - vwap) / vwap
+        else:
+            row["vwap"] = row["vwap_dev"] = _NAN
+
+        # ATR — zeros during warm-up, seeded with the first-window mean TR
+        tr = high - low
+        if prev is not None:
+            tr = max(tr, abs(high - prev), abs(low - prev))
+        if self.atr is None:
+            self.tr_seed.append(tr)
+            if len(self.tr_seed) == ATR_WINDOW:
+                self.atr = float(np.mean(self.tr_seed))
+                self.tr_seed = []
+        else:
+            self.atr = (self.atr * (ATR_WINDOW - 1) + tr) / ATR_WINDOW
+        row["atr_14"] = self.atr if self.atr is not None else 0.0
+
+        if n >= BB_WINDOW:
+            window = closes[-BB_WINDOW:]
+            mavg, mstd = window.mean(), window.std(ddof=0)
+            row["bb_width"] = ((mavg + BB_DEV * mstd) - (mavg - BB_DEV * mstd)) / mavg * 100
+        else:
+            row["bb_width"] = _NAN
+
+        row["price_compression"] = (high - low) / close
+        if prev is not None:
+            self.returns.append(close / prev - 1)
+        row["volatility_10"] = (
+            np.fromiter(self.returns, dtype=float).std(ddof=1) if len(self.returns) == VOL_WINDOW else _NAN
+        )
+        row["volume_spike"] = (
+            bool(volume > np.fromiter(self.volumes, dtype=float).mean() * 2) if n >= SPIKE_WINDOW else False
+        )
+
+        self.prev_close = close
+        return row
+
+    def update(self, bars: pd.DataFrame) -> pd.DataFrame:
+        """
+        Consume new OHLCV bars (``date`` column or index, oldest first) and
+        return their feature rows with warm-up rows dropped.
+        """
+        if bars is None or bars.empty:
+            return pd.DataFrame()
+        if "date" not in bars.columns:
+            bars = bars.reset_index()
+
+        bars = bars.copy()
+        bars["date"] = pd.to_datetime(bars["date"])
+        if self.last_date is not None:
+            bars = bars[bars["date"] > self.last_date]
+        if bars.empty:
+            return pd.DataFrame()
+
+        rows = [
+            self._step(float(h), float(l), float(c), float(v))
+            for h, l, c, v in zip(bars["high"], bars["low"], bars["close"], bars["volume"])
+        ]
+        self.last_date = bars["date"].iloc[-1]
+
+        feats = pd.DataFrame(rows, index=bars.index)
+        return pd.concat([bars, feats], axis=1).dropna(subset=list(feats.columns))
+
+
+# ── checkpoints ────────────────────────────────────────────────
+def load_feature_state(stock: str, interval: str):
+    rows = run_query(
+        f"SELECT state FROM {settings.tables.feature_state} WHERE stock = :stock AND interval = :interval",
+        params={"stock": stock, "interval": interval},
+    )
+    if not rows:
+        return None
+    data = rows[0][0]
+    return RollingFeatureState.from_dict(json.loads(data) if isinstance(data, str) else data)
+
+
+def save_feature_state(stock: str, interval: str, state: RollingFeatureState):
+    run_query(
+        f"""
+        INSERT INTO {settings.tables.feature_state} (stock, interval, last_date, state, updated_at)
+        VALUES (:stock, :interval, :last_date, CAST(:state AS JSONB), :updated_at)
+        ON CONFLICT (stock, interval) DO UPDATE
+        SET last_date = EXCLUDED.last_date, state = EXCLUDED.state, updated_at = EXCLUDED.updated_at
+        """,
+        params={
+            "stock": stock,
+            "interval": interval,
+            "last_date": state.last_date.to_pydatetime() if state.last_date is not None else None,
+            "state": json.dumps(state.to_dict(), allow_nan=False),
+            "updated_at": datetime.now(),
+        },
+        fetchall=False,
+    )
+
+
+def clear_feature_state(stock: str, interval: str):
+    run_query(
+        f"DELETE FROM {settings.tables.feature_state} WHERE stock = :stock AND interval = :interval",
+        params={"stock": stock, "interval": interval},
+        fetchall=False,
+    )
+
+
+def update_features_incremental(stock: str, interval: str, rebuild: bool = False, end=None) -> pd.DataFrame:
+    """
+    Append features for bars that arrived since the last checkpoint.
+
+    Without a checkpoint (or with ``rebuild=True``) the state is seeded from
+    the usual ``DAYS_LOOKBACK`` history; afterwards only new bars are fetched.
+    ``end`` caps the fetch window (the simulation date in backtests); it
+    defaults to now.
+    """
+    table = settings.interval_feature_table_map.get(interval)
+    if not table:
+        logger.error(f"Unknown interval: {interval}")
+        return pd.DataFrame()
+
+    state = None if rebuild else load_feature_state(stock, interval)
+    if state is None:
+        state = RollingFeatureState()
+        bars = fetch_stock_data(stock, interval=interval, end=end, days=DAYS_LOOKBACK)
+    else:
+        bars = fetch_stock_data(stock, interval=interval, start=state.last_date, end=end)
+
+    n_before = state.n
+    df = state.update(bars)
+    if state.n == n_before:
+        logger.debug(f"⏭️ No new bars for {stock} @ {interval}")
+        return pd.DataFrame()
+
+    if not df.empty:
+        df["stock"] = stock
+        df["stock_encoded"] = hash(stock) % 10000
+        df["date"] = pd.to_datetime(df["date"]).dt.date
+        try:
+            bulk_insert_features(df, table, refresh=True)
+        except Exception as e:
+            logger.error(f"❌ Failed to insert incremental features for {stock} @ {interval}: {e}")
+            return pd.DataFrame()
+
+    save_feature_state(stock, interval, state)
+    logger.info(f"✅ {stock} @ {interval}: +{state.n - n_before} bars, {len(df)} feature rows")
+    return df
@@ -0,0 +1,177 @@
+# core/feature_engineering/panel_features.py
+
+"""
+Panel-mode feature engine.
+
+Computes the same indicators as ``precompute_features.compute_features`` for
+many symbols at once. The long OHLCV frame is pivoted into a (bars × symbols)
+matrix where row ``i`` holds the i-th bar of every symbol, so each indicator
+is a single NumPy / ``scipy.signal.lfilter`` pass over all columns instead of
+one pandas/``ta`` pass per stock.
+"""
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+from scipy.signal import lfilter
+
+from core.feature_engineering.precompute_features import REQUIRED_FEATURES
+
+SMA_SHORT = 5
+SMA_LONG = 20
+RSI_WINDOW = 14
+MACD_FAST, MACD_SLOW, MACD_SIGN = 12, 26, 9
+ATR_WINDOW = 14
+BB_WINDOW, BB_DEV = 20, 2
+VOL_WINDOW = 10
+SPIKE_WINDOW = 20
+
+# Upper bound on elements materialised by one sliding-window reduction
+_WINDOW_BLOCK_ELEMS = 1 << 22
+
+
+def _rolling(x: np.ndarray, window: int, reducer) -> np.ndarray:
+    """Rolling reduction along axis 0 with pandas' ``min_periods=window`` semantics."""
+    out = np.full(x.shape, np.nan)
+    if x.shape[0] < window:
+        return out
+    view = sliding_window_view(x, window, axis=0)
+    step = max(1, _WINDOW_BLOCK_ELEMS // max(1, x.shape[1] * window))
+    for i in range(0, view.shape[0], step):
+        out[window - 1 + i: window - 1 + i + step] = reducer(view[i:i + step])
+    return out
+
+
+def _rolling_mean(x: np.ndarray, window: int) -> np.ndarray:
+    return _rolling(x, window, lambda v: v.mean(axis=-1))
+
+
+def _rolling_std(x: np.ndarray, window: int, ddof: int) -> np.ndarray:
+    return _rolling(x, window, lambda v: v.std(axis=-1, ddof=ddof))
+
+
+def _ewm(x: np.ndarray, alpha: float, min_periods: int, offset: int = 0) -> np.ndarray:
+    """
+    ``Series.ewm(alpha=alpha, adjust=False, min_periods=min_periods).mean()``
+    applied column-wise. ``offset`` skips leading rows that are NaN in every column.
+    """
+    out = np.full(x.shape, np.nan)
+    if x.shape[0] <= offset:
+        return out
+    body = x[offset:]
+    zi = ((1.0 - alpha) * body[0])[np.newaxis, :]
+    out[offset:], _ = lfilter([alpha], [1.0, alpha - 1.0], body, axis=0, zi=zi)
+    out[offset:offset + min_periods - 1] = np.nan
+    return out
+
+
+def _wilder_atr(tr: np.ndarray, window: int) -> np.ndarray:
+    """Mirror of ``ta.volatility.AverageTrueRange``: seeded with the first-window mean, zeros before it."""
+    out = np.zeros(tr.shape)
+    if tr.shape[0] < window:
+        return out
+    seed = tr[:window].mean(axis=0)
+    out[window - 1] = seed
+    if tr.shape[0] > window:
+        a = (window - 1) / window
+        zi = (a * seed)[np.newaxis, :]
+        out[window:], _ = lfilter([1.0 / window], [1.0, -a], tr[window:], axis=0, zi=zi)
+    return out
+
+
+def _panel_kernels(h: np.ndarray, l: np.ndarray, c: np.ndarray, v: np.ndarray) -> dict:
+    feats = {}
+    n = c.shape[0]
+
+    feats["sma_short"] = _rolling_mean(c, SMA_SHORT)
+    feats["sma_long"] = _rolling_mean(c, SMA_LONG)
+
+    prev_c = np.full(c.shape, np.nan)
+    prev_c[1:] = c[:-1]
+    diff = c - prev_c
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        up = np.where(diff > 0, diff, 0.0)
+        down = np.where(diff < 0, -diff, 0.0)
+        ema_up = _ewm(up, 1.0 / RSI_WINDOW, RSI_WINDOW)
+        ema_dn = _ewm(down, 1.0 / RSI_WINDOW, RSI_WINDOW)
+        feats["rsi_thresh"] = np.where(ema_dn == 0, 100.0, 100.0 - 100.0 / (1.0 + ema_up / ema_dn))
+
+        ema_fast = _ewm(c, 2.0 / (MACD_FAST + 1), MACD_FAST)
+        ema_slow = _ewm(c, 2.0 / (MACD_SLOW + 1), MACD_SLOW)
+        macd = ema_fast - ema_slow
+        signal = _ewm(macd, 2.0 / (MACD_SIGN + 1), MACD_SIGN, offset=min(n, MACD_SLOW - 1))
+        feats["macd"] = macd
+        feats["macd_histogram"] = macd - signal
+
+        typical = (h + l + c) / 3
+        vwap = np.cumsum(v * typical, axis=0) / np.cumsum(v, axis=0)
+        feats["vwap"] = vwap
+        feats["vwap_dev"] = (c - vwap) / vwap
+
+        tr = np.fmax(np.fmax(h - l, np.abs(h - prev_c)), np.abs(l - prev_c))
+        feats["atr_14"] = _wilder_atr(tr, ATR_WINDOW)
+
+        mavg = _rolling_mean(c, BB_WINDOW)
+        mstd = _rolling_std(c, BB_WINDOW, ddof=0)
+        feats["bb_width"] = ((mavg + BB_DEV * mstd) - (mavg - BB_DEV * mstd)) / mavg * 100
+
+        feats["price_compression"] = (h - l) / c
+        feats["volatility_10"] = _rolling_std(c / prev_c - 1, VOL_WINDOW, ddof=1)
+        feats["volume_spike"] = v > (_rolling_mean(v, SPIKE_WINDOW) * 2)
+
+    return feats
+
+
+def compute_features_panel(df: pd.DataFrame, by: str = "stock", chunk_size: int = 256) -> pd.DataFrame:
+    """
+    Vectorised ``compute_features`` over a long OHLCV frame holding many symbols.
+
+    Bars are taken per symbol in input order (exactly as the per-stock function
+    sees them). The result is grouped by symbol, keeps the original columns and
+    index, and drops warm-up rows the same way ``compute_features`` does.
+    ``chunk_size`` bounds how many symbols share one panel matrix.
+    """
+    if df.empty:
+        return df.copy()
+    if by not in df.columns:
+        raise KeyError(f"compute_features_panel: missing symbol column '{by}'")
+
+    df = df.copy()
+    if "stock_encoded" not in df.columns:
+        df["stock_encoded"] = df[by].map(lambda s: hash(s) % 10000)
+
+    codes, symbols = pd.factorize(df[by], sort=False)
+    order = np.argsort(codes, kind="stable")
+    df = df.iloc[order]
+    codes = codes[order]
+    counts = np.bincount(codes, minlength=len(symbols))
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+
+    bars = {col: df[col].to_numpy(dtype=np.float64) for col in ("high", "low", "close", "volume")}
+    out = {name: np.empty(len(df)) for name in REQUIRED_FEATURES if name != "stock_encoded"}
+    out["volume_spike"] = np.zeros(len(df), dtype=bool)
+
+    # Group symbols of similar length into the same panel to keep padding small
+    by_length = np.argsort(counts, kind="stable")
+    for i in range(0, len(by_length), chunk_size):
+        chunk = by_length[i:i + chunk_size]
+        width, depth = len(chunk), int(counts[chunk].max())
+        rows = np.concatenate([np.arange(starts[g], starts[g] + counts[g]) for g in chunk])
+        pos = np.concatenate([np.arange(counts[g]) for g in chunk])
+        col = np.repeat(np.arange(width), counts[chunk])
+
+        panel = {}
+        for name, values in bars.items():
+            mat = np.full((depth, width), np.nan)
+            mat[pos, col] = values[rows]
+            panel[name] = mat
+
+        feats = _panel_kernels(panel["high"], panel["low"], panel["close"], panel["volume"])
+        for name, mat in feats.items():
+            out[name][rows] = mat[pos, col]
+
+    for name, values in out.items():
+        df[name] = values
+
+    return df.dropna(subset=REQUIRED_FEATURES)
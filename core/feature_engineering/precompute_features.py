@@ -4,10 +4,11 @@ from datetime import datetime, timedelta
 from core.config.config import settings
 from core.logger.logger import logger
 from core.data_provider.data_provider import fetch_stock_data
-from db.db import SessionLocal
+from db.bulk_loader import copy_upsert
 from sqlalchemy.sql import text
 from utils.time_utils import to_naive_utc
 import ta
+import time
 import argparse
 
 REQUIRED_FEATURES = [
@@ -15,6 +16,7 @@ REQUIRED_FEATURES = [
     "bb_width", "macd_histogram", "price_compression", "stock_encoded",
     "volatility_10", "volume_spike", "vwap_dev"
 ]
+FEATURE_TABLE_COLUMNS = ["stock", "date"] + REQUIRED_FEATURES
 INTERVALS = ["day", "60minute", "15minute"]
 DAYS_LOOKBACK = 90
 
@@ -64,6 +66,24 @@ def insert_feature_row(session, table_name, row, refresh=False):
     session.execute(sql, row)
 
 
+def bulk_insert_features(df: pd.DataFrame, table_name: str, refresh: bool = False) -> int:
+    """
+    Set-based replacement for looping ``insert_feature_row`` over a frame.
+    """
+    if df.empty:
+        return 0
+
+    df = df[FEATURE_TABLE_COLUMNS].copy()
+    df["stock_encoded"] = df["stock_encoded"].astype("Int64")
+    df["volume_spike"] = df["volume_spike"].astype(bool)
+
+    t0 = time.perf_counter()
+    inserted = copy_upsert(df, table_name, key_cols=["stock", "date"], refresh=refresh)
+    elapsed = max(time.perf_counter() - t0, 1e-9)
+    logger.info(f"📥 {table_name}: {inserted}/{len(df)} rows written in {elapsed:.2f}s ({len(df) / elapsed:,.0f} rows/s)")
+    return inserted
+
+
 def enrich_and_store(stock: str, interval: str, refresh: bool = False):
     table = settings.interval_feature_table_map.get(interval)
     if not table:
@@ -85,28 +105,71 @@ def enrich_and_store(stock: str, interval: str, refresh: bool = False):
     df["date"] = pd.to_datetime(df["date"]).dt.date
     df["stock_encoded"] = hash(stock) % 10000
 
-    session = SessionLocal()
-    inserted = 0
     try:
-        for _, row in df.iterrows():
-            insert_feature_row(session, table, row.to_dict(), refresh=refresh)
-            inserted += 1
-        session.commit()
+        inserted = bulk_insert_features(df, table, refresh=refresh)
         logger.info(f"✅ {inserted} features inserted for {stock} @ {interval}")
     except Exception as e:
-        session.rollback()
         logger.error(f"❌ Failed to insert features for {stock} @ {interval}: {e}")
-    finally:
-        session.close()
+
+
+def enrich_and_store_many(stocks, interval: str, refresh: bool = False):
+    """
+    Panel-mode ``enrich_and_store``: features for every stock in one vectorised pass.
+    """
+    from core.feature_engineering.panel_features import compute_features_panel
+
+    table = settings.interval_feature_table_map.get(interval)
+    if not table:
+        logger.error(f"Unknown interval: {interval}")
+        return
+
+    frames = []
+    for stock in stocks:
+        df = fetch_stock_data(stock, interval=interval, days=DAYS_LOOKBACK)
+        if df is None or df.empty:
+            logger.warning(f"⚠️ No price data for {stock} @ {interval}")
+            continue
+        if "date" not in df.columns:
+            df = df.reset_index()
+        df["stock"] = stock
+        df["stock_encoded"] = hash(stock) % 10000
+        frames.append(df)
+
+    if not frames:
+        return
+
+    logger.info(f"📊 Computing panel features for {len(frames)} stocks @ {interval}...")
+    df_all = compute_features_panel(pd.concat(frames, ignore_index=True))
+    if df_all.empty:
+        logger.warning(f"⚠️ No features computed @ {interval}")
+        return
+    df_all["date"] = pd.to_datetime(df_all["date"]).dt.date
+
+    try:
+        inserted = bulk_insert_features(df_all, table, refresh=refresh)
+        logger.info(f"✅ {inserted} features inserted for {df_all['stock'].nunique()} stocks @ {interval}")
+    except Exception as e:
+        logger.error(f"❌ Failed to insert panel features @ {interval}: {e}")
 
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument("--refresh", action="store_true", help="Force overwrite existing features")
+    parser.add_argument("--per-stock", action="store_true", help="Use the per-stock loop instead of the panel engine")
+    parser.add_argument("--incremental", action="store_true", help="Only append bars since each stock's rolling-state checkpoint")
     args = parser.parse_args()
 
     from core.time_context.time_context import get_stock_universe
     stocks = get_stock_universe()
-    for stock in stocks:
+    if args.incremental:
+        from core.feature_engineering.incremental_features import update_features_incremental
+        for stock in stocks:
+            for interval in INTERVALS:
+                update_features_incremental(stock, interval, rebuild=args.refresh)
+    elif args.per_stock:
+        for stock in stocks:
+            for interval in INTERVALS:
+                enrich_and_store(stock, interval, refresh=args.refresh)
+    else:
         for interval in INTERVALS:
-            enrich_and_store(stock, interval, refresh=args.refresh)
+            enrich_and_store_many(stocks, interval, refresh=args.refresh)
@@ -1,42 +1,147 @@
 # core/model_io.py
 
+"""
+Model persistence in ``model_store``.
+
+Besides the pickled blob, each row carries a small metadata index
+(``version``, ``size_bytes``, ``content_hash`` = sha256 of the blob,
+``updated_at``, ``meta``) that ``list_models``/``load_latest_model`` query
+without reading blobs. Loaded blobs are kept in a content-addressed disk
+cache (``<model_cache_dir>/<hash[:2]>/<hash>.pkl``) and memory-mapped on
+later loads, so a model is downloaded from Postgres once per content hash.
+"""
+
+import hashlib
+import json
+import mmap
+import os
 import pickle
+import threading
 from datetime import datetime
+from pathlib import Path
 import pandas as pd
 
 from core.logger.logger import logger
 from core.config.config import settings
-from db.conflict_utils import insert_with_conflict_handling
 from db.postgres_manager import run_query
-from core.data_provider.data_provider import load_data
+
+INDEX_COLUMNS = ["model_name", "version", "updated_at", "size_bytes", "content_hash", "meta"]
+
+_store_ready = False
+_store_lock = threading.Lock()
+
+
+def _ensure_model_store() -> None:
+    """Create / migrate the table once per process (backfilling the index server-side)."""
+    global _store_ready
+    if _store_ready:
+        return
+    with _store_lock:
+        if _store_ready:
+            return
+        table = settings.tables.model_store
+        run_query(f"""
+        CREATE TABLE IF NOT EXISTS "{table}" (
+            model_name TEXT PRIMARY KEY,
+            model_blob BYTEA,
+            updated_at TIMESTAMP,
+            meta JSONB DEFAULT '{{}}'::jsonb
+        );
+        ALTER TABLE "{table}" ADD COLUMN IF NOT EXISTS version INTEGER NOT NULL DEFAULT 1;
+        ALTER TABLE "{table}" ADD COLUMN IF NOT EXISTS size_bytes BIGINT;
+        ALTER TABLE "{table}" ADD COLUMN IF NOT EXISTS content_hash TEXT;
+        CREATE INDEX IF NOT EXISTS "{table}_name_prefix_idx" ON "{table}" (model_name text_pattern_ops);
+        """, fetchall=False)
+        run_query(f"""
+        UPDATE "{table}"
+        SET size_bytes = octet_length(model_blob), content_hash = encode(sha256(model_blob), 'hex')
+        WHERE content_hash IS NULL AND model_blob IS NOT NULL
+        """, fetchall=False)
+        _store_ready = True
+
+
+# ─── content-addressed blob cache ─────────────────────────
+def _cache_path(content_hash: str) -> Path:
+    return Path(settings.model_cache_dir) / content_hash[:2] / f"{content_hash}.pkl"
+
+
+def _cache_put(content_hash: str, blob: bytes) -> None:
+    if not settings.model_cache_enabled:
+        return
+    path = _cache_path(content_hash)
+    if path.exists():
+        return
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        tmp.write_bytes(blob)
+        os.replace(tmp, path)
+    except OSError as e:
+        logger.warning(f"⚠️ Could not cache model blob {content_hash[:12]}: {e}")
+
+
+def _cache_get(content_hash: str):
+    if not settings.model_cache_enabled:
+        return None
+    path = _cache_path(content_hash)
+    try:
+        with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            return pickle.loads(mm)
+    except (FileNotFoundError, ValueError):  # missing, or empty file (mmap of length 0)
+        return None
+    except (pickle.UnpicklingError, EOFError) as e:
+        logger.warning(f"⚠️ Dropping unreadable cached model {content_hash[:12]}: {e}")
+        path.unlink(missing_ok=True)
+        return None
+
+
+# ─── registry ─────────────────────────────────────────────
+def list_models(prefix: str = None) -> pd.DataFrame:
+    """Metadata index of stored models (no blobs), newest first."""
+    _ensure_model_store()
+    sql = f'SELECT {", ".join(INDEX_COLUMNS)} FROM "{settings.tables.model_store}"'
+    params = None
+    if prefix:
+        sql += " WHERE model_name LIKE %s ESCAPE '\\'"
+        params = (_like_prefix(prefix),)
+    rows = run_query(sql + " ORDER BY updated_at DESC NULLS LAST, model_name", params)
+    return pd.DataFrame(rows or [], columns=INDEX_COLUMNS)
+
+
+def _like_prefix(prefix: str) -> str:
+    return prefix.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
 
 
 def save_model(name: str, model_obj, meta: dict = None) -> None:
     """
     Serialize and save a model to the configured SQL table with optional metadata.
     """
+    _ensure_model_store()
     table = settings.tables.model_store
     blob = pickle.dumps(model_obj)
     meta = meta or {}
+    content_hash = hashlib.sha256(blob).hexdigest()
 
-    # Ensure table exists with meta column
+    # Upsert the new blob + meta; every save of a name bumps its version
     run_query(f"""
-    CREATE TABLE IF NOT EXISTS "{table}" (
-        model_name TEXT PRIMARY KEY,
-        model_blob BYTEA,
-        updated_at TIMESTAMP,
-        meta JSONB DEFAULT '{{}}'::jsonb
-    );
-    """, fetchall=False)
-
-    # Upsert the new blob + meta
-    df = pd.DataFrame([{
-        "model_name": name,
-        "model_blob": blob,
+    INSERT INTO "{table}" AS m (model_name, model_blob, updated_at, meta, version, size_bytes, content_hash)
+    VALUES (:name, :blob, :updated_at, CAST(:meta AS JSONB), 1, :size, :hash)
+    ON CONFLICT (model_name) DO UPDATE SET
+        model_blob = EXCLUDED.model_blob,
+        updated_at = EXCLUDED.updated_at,
+        meta = EXCLUDED.meta,
+        version = m.version + 1,
+        size_bytes = EXCLUDED.size_bytes,
+        content_hash = EXCLUDED.content_hash
+    """, {
+        "name": name,
+        "blob": blob,
         "updated_at": datetime.now(),
-        "meta": meta
-    }])
-    insert_with_conflict_handling(df, table)
+        "meta": json.dumps(meta, default=str),
+        "size": len(blob),
+        "hash": content_hash,
+    }, fetchall=False)
+    _cache_put(content_hash, blob)
     logger.success(f"📦 Model '{name}' saved to '{table}' with metadata.")
 
 def load_model(name: str):
@@ -46,15 +151,35 @@ def load_model(name: str):
     """
     Load a model from the configured SQL table.
     """
+    _ensure_model_store()
     table = settings.tables.model_store
+    rows = run_query(
+        f"SELECT content_hash FROM \"{table}\" WHERE model_name = %s LIMIT 1",
+        (name,)
+    )
+    if not rows:
+        raise FileNotFoundError(f"❌ No model found named '{name}' in '{table}'.")
+    content_hash = rows[0][0]
+
+    model = _cache_get(content_hash) if content_hash else None
+    if model is not None:
+        logger.info(f"📥 Loaded model '{name}' from local cache ({content_hash[:12]}).")
+        return model
+
     rows = run_query(
         f"SELECT model_blob FROM \"{table}\" WHERE model_name = %s LIMIT 1",
         (name,)
     )
     if not rows:
         raise FileNotFoundError(f"❌ No model found named '{name}' in '{table}'.")
+    blob = bytes(rows[0][0])
+    actual = hashlib.sha256(blob).hexdigest()
+    if actual == content_hash:
+        _cache_put(actual, blob)
+    else:  # row replaced between the two queries; don't cache under the wrong hash
+        logger.warning(f"⚠️ Model '{name}' changed while loading; not caching.")
     logger.info(f"📥 Loaded model '{name}' from '{table}'.")
-    return pickle.loads(rows[0][0])
+    return pickle.loads(blob)
 
 def get_model_metadata(name: str):
     rows = run_query(
@@ -63,17 +188,30 @@ def get_model_metadata(name: str):
     )
     return rows[0][0] if rows else {}
 
+def model_version(name: str):
+    """
+    ``(model_name, content_hash)`` that ``load_model(name)`` would load right
+    now, from the index only. Changes whenever the stored model does.
+    """
+    if name.endswith("_latest"):
+        index = list_models(prefix=name.replace("_latest", ""))
+        if index.empty:
+            raise ValueError(f"❌ No models found for base name '{name.replace('_latest', '')}'")
+        return index.iloc[0]["model_name"], index.iloc[0]["content_hash"]
+    _ensure_model_store()
+    table = settings.tables.model_store
+    rows = run_query(f"SELECT content_hash FROM \"{table}\" WHERE model_name = %s LIMIT 1", (name,))
+    if not rows:
+        raise FileNotFoundError(f"❌ No model found named '{name}' in '{table}'.")
+    return name, rows[0][0]
+
 def load_latest_model(base_name: str):
     """
     Loads the most recent model from model_store that matches base_name prefix.
     """
-    df = load_data(settings.tables.model_store)
-    if df is None or df.empty:
-        raise ValueError("❌ Model store is empty or missing.")
-
-    matches = df[df["model_name"].str.startswith(base_name)]
-    if matches.empty:
+    index = list_models(prefix=base_name)
+    if index.empty:
         raise ValueError(f"❌ No models found for base name '{base_name}'")
 
-    latest_name = matches.sort_values("trained_at", ascending=False).iloc[0]["model_name"]
+    latest_name = index.iloc[0]["model_name"]
     return load_model(latest_name)
@@ -0,0 +1,133 @@
+# core/model_pool.py
+
+"""
+Process-wide pool of loaded models.
+
+``get_model(name)`` loads a ``model_store`` model once per process and hands
+back the shared instance. After ``settings.model_pool_ttl`` seconds the next
+call polls the metadata index (content hash only, no blob) and reloads just
+when the stored model changed. ``get_file_model`` does the same for models on
+disk, keyed by path and versioned by mtime/size.
+
+``pool_stats()`` reports loads, hits and load latency per model so reload
+storms are visible.
+"""
+
+import os
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+from core.config.config import settings
+from core.logger.logger import logger
+from core.model_io import load_model, model_version
+
+
+class _Entry:
+    __slots__ = ("model", "version", "checked_at", "loads", "hits", "load_seconds", "last_load_seconds")
+
+    def __init__(self):
+        self.model = None
+        self.version = None
+        self.checked_at = float("-inf")
+        self.loads = 0
+        self.hits = 0
+        self.load_seconds = 0.0
+        self.last_load_seconds = 0.0
+
+
+class ModelPool:
+    def __init__(self, ttl: Optional[float] = None):
+        self.ttl = settings.model_pool_ttl if ttl is None else ttl
+        self._entries: Dict[str, _Entry] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def _entry_lock(self, key: str):
+        with self._lock:
+            if key not in self._locks:
+                self._locks[key] = threading.Lock()
+                self._entries[key] = _Entry()
+            return self._entries[key], self._locks[key]
+
+    def get(self, key: str, load_fn: Callable[[], object], version_fn: Callable[[], object]):
+        entry, lock = self._entry_lock(key)
+        with lock:
+            now = time.monotonic()
+            if entry.loads and now - entry.checked_at < self.ttl:
+                entry.hits += 1
+                return entry.model
+
+            try:
+                version = version_fn()
+            except Exception as e:
+                if not entry.loads:
+                    raise
+                logger.warning(f"⚠️ Version check for '{key}' failed, serving loaded copy: {e}")
+                entry.checked_at = now
+                entry.hits += 1
+                return entry.model
+
+            if entry.loads and version == entry.version:
+                entry.checked_at = now
+                entry.hits += 1
+                return entry.model
+
+            t0 = time.perf_counter()
+            model = load_fn()
+            elapsed = time.perf_counter() - t0
+            if entry.loads:
+                logger.info(f"🔄 Model '{key}' changed; reloaded in {elapsed:.2f}s")
+            entry.model, entry.version, entry.checked_at = model, version, time.monotonic()
+            entry.loads += 1
+            entry.load_seconds += elapsed
+            entry.last_load_seconds = elapsed
+            return model
+
+    def invalidate(self, key: str = None):
+        """Force a version check on the next ``get`` (of ``key``, or of every model)."""
+        with self._lock:
+            for name, entry in self._entries.items():
+                if key is None or name == key:
+                    entry.checked_at = float("-inf")
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                key: {
+                    "loads": e.loads,
+                    "hits": e.hits,
+                    "load_seconds": round(e.load_seconds, 4),
+                    "last_load_seconds": round(e.last_load_seconds, 4),
+                }
+                for key, e in self._entries.items()
+            }
+
+
+_pool = ModelPool()
+
+
+def get_model(name: str):
+    """Shared instance of ``load_model(name)``, refreshed when the stored model changes."""
+    return _pool.get(f"db:{name}", lambda: load_model(name), lambda: model_version(name))
+
+
+def _file_version(path: str):
+    st = os.stat(path)
+    return st.st_mtime_ns, st.st_size
+
+
+def get_file_model(path: str, loader: Callable[[str], object], stat_path: str = None):
+    """
+    Shared instance of ``loader(path)``; reloaded when ``stat_path`` (default
+    ``path``) changes on disk.
+    """
+    return _pool.get(f"file:{path}", lambda: loader(path), lambda: _file_version(stat_path or path))
+
+
+def pool_stats() -> dict:
+    return _pool.stats()
+
+
+def invalidate_models(key: str = None):
+    _pool.invalidate(key)
@@ -7,7 +7,8 @@ from datetime import date
 import matplotlib.pyplot as plt
 
 from core.logger.logger import logger
-from db.replay_buffer_sql import load_replay_episodes
+from core.config.config import settings
+from db.replay_buffer_sql import sample_replay_episodes
 from db.postgres_manager import run_query
 
 def preprocess_training_data(df: pd.DataFrame) -> pd.DataFrame:
@@ -55,7 +56,10 @@ def preprocess_training_data(df: pd.DataFrame) -> pd.DataFrame:
 def train_models(replay_buffer=None, up_to_date=None):
     logger.info("🧠 Starting joint policy model training...")
 
-    df = load_replay_episodes()
+    df = sample_replay_episodes(
+        settings.replay_sample_size, require_reward=True,
+        recency_half_life_days=settings.replay_recency_half_life_days,
+    )
     if df.empty:
         logger.warning("❌ No replay episodes found.")
         return
@@ -1,25 +1,22 @@
 import pandas as pd
 import json
 from core.model_io import save_model
+from core.config.config import settings
 from core.logger.logger import logger
 from core.time_context.time_context import get_simulation_date
-from db.postgres_manager import run_query
+from db.replay_buffer_sql import sample_replay_episodes
 from models.joint_policy import JointPolicyModel
 
 def load_replay_data():
     date = get_simulation_date().date()
-    query = f"""
-        SELECT *
-        FROM replay_buffer
-        WHERE date <= '{date}'
-    """
-    result = run_query(query)
-    if not result:
+    df = sample_replay_episodes(
+        settings.replay_sample_size, end=date, table_name="replay_buffer",
+        recency_half_life_days=settings.replay_recency_half_life_days,
+    )
+    if df.empty:
         logger.warning("No replay buffer data found.")
         return None
 
-    df = pd.DataFrame(result)
-
     # Extract action labels (you store them directly as scalar columns)
     y = df[["position_size", "exit_days"]].copy()
 
@@ -4,7 +4,7 @@ from core.logger.logger import logger
 from core.time_context.time_context import get_simulation_date
 from core.data_provider.data_provider import fetch_stock_data
 from core.config.strategy_config import StrategyConfig, ExitRule
-from core.backtest_bt import run_backtest_config
+from core.backtest_vec import run_backtest_grid
 from db.postgres_manager import run_query
 import json
 
@@ -32,36 +32,33 @@ def predict_grid_config(stock: str, top_n: int = 3) -> list:
         ExitRule(kind="time_stop", max_holding_days=5)
     ]
 
+    configs = [
+        StrategyConfig(sma_short=s, sma_long=l, rsi_entry=r, exit_rule=rule)
+        for s in sma_shorts
+        for l in sma_longs
+        if s < l
+        for r in rsi_thres
+        for rule in exit_rules
+    ]
+
+    try:
+        grid_metrics = run_backtest_grid(stock, configs, end=end_date)
+    except Exception as e:
+        logger.warning(f"❌ Grid backtest failed for {stock}: {e}")
+        return []
+
     results = []
-    for s in sma_shorts:
-        for l in sma_longs:
-            if s >= l:
-                continue
-            for r in rsi_thres:
-                for rule in exit_rules:
-                    cfg = StrategyConfig(
-                        sma_short=s,
-                        sma_long=l,
-                        rsi_entry=r,
-                        exit_rule=rule
-                    )
-                    try:
-                        metrics = run_backtest_config(stock, cfg, end=end_date)
-                        if not metrics:
-                            continue
-                        results.append({
-                            "stock": stock,
-                            "recommended_config": cfg.dict(),
-                            "predicted_return": metrics["total_return"],
-                            "sharpe": metrics["sharpe"],
-                            "max_drawdown": metrics["max_drawdown"],
-                            "avg_trade_return": metrics["avg_trade_return"],
-                            "trade_count": metrics["trade_count"],
-                            "trade_triggered": 1
-                        })
-                    except Exception as e:
-                        logger.warning(f"❌ Backtest failed for {stock}: {e}")
-                        continue
+    for cfg, metrics in zip(configs, grid_metrics):
+        results.append({
+            "stock": stock,
+            "recommended_config": cfg.dict(),
+            "predicted_return": metrics["total_return"],
+            "sharpe": metrics["sharpe"],
+            "max_drawdown": metrics["max_drawdown"],
+            "avg_trade_return": metrics["avg_trade_return"],
+            "trade_count": metrics["trade_count"],
+            "trade_triggered": 1
+        })
 
     if not results:
         return []
@@ -5,35 +5,65 @@ import pandas as pd
 from stable_baselines3 import PPO
 from core.feature_engineering.feature_provider import fetch_features
 from core.logger.logger import logger
+from core.model_pool import get_file_model
 
 MODEL_PATH = "checkpoints/ppo_sb3_model"
 
 class PPOLivePolicy:
     def __init__(self, model_path: str = MODEL_PATH):
-        self.model = PPO.load(model_path)
+        self.model_path = model_path
+        self.model  # load (or reuse) now so a missing checkpoint fails at construction
         logger.info("[PPO LIVE] PPO model loaded for inference.")
 
+    @property
+    def model(self) -> PPO:
+        # One copy per process, shared by every policy instance; PPO.save appends ".zip"
+        stat_path = self.model_path if self.model_path.endswith(".zip") else f"{self.model_path}.zip"
+        return get_file_model(self.model_path, PPO.load, stat_path=stat_path)
+
     def predict(self, stock: str, date: str) -> dict:
-        try:
-            df = fetch_features(
-                stock=stock,
-                interval="15minute",
-                refresh_if_missing=True,
-                start=date,
-                end=date
-            )
+        return self.predict_many([stock], date).get(stock)
+
+    def predict_many(self, stocks: list, date: str) -> dict:
+        """One forward pass over the stacked feature rows of ``stocks``."""
+        rows = {}
+        for stock in stocks:
+            try:
+                df = fetch_features(
+                    stock=stock,
+                    interval="15minute",
+                    refresh_if_missing=True,
+                    start=date,
+                    end=date
+                )
+            except Exception as e:
+                logger.error(f"[PPO LIVE] Inference failed: {e}")
+                continue
 
             if df is None or df.empty:
                 logger.warning(f"[PPO LIVE] No features found for {stock} @ {date}")
-                return None
+                continue
+            rows[stock] = df.drop(columns=["stock", "date", "interval"]).values[0]
+
+        # Rows of a different width fail on their own, as they would unbatched
+        by_width = {}
+        for stock, row in rows.items():
+            by_width.setdefault(row.shape, []).append(stock)
 
-            features = df.drop(columns=["stock", "date", "interval"]).values[0]
-            action, _ = self.model.predict(features, deterministic=True)
+        actions = {}
+        for group in by_width.values():
+            try:
+                batch, _ = self.model.predict(np.stack([rows[s] for s in group]), deterministic=True)
+            except Exception as e:
+                logger.error(f"[PPO LIVE] Inference failed: {e}")
+                continue
+            actions.update(zip(group, batch))
 
+        signals = {}
+        for stock, action in actions.items():
             position_size = float(np.clip(action[0], 0, 1))
             exit_days = int(np.clip(np.round(1 + action[1] * 4), 1, 5))
-
-            return {
+            signals[stock] = {
                 "stock": stock,
                 "date": date,
                 "source": "ppo_sb3",
@@ -41,7 +71,4 @@ class PPOLivePolicy:
                 "position_size": position_size,
                 "exit_days": exit_days
             }
-
-        except Exception as e:
-            logger.error(f"[PPO LIVE] Inference failed: {e}")
-            return None
+        return signals
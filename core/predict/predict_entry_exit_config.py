@@ -1,12 +1,12 @@
 import pandas as pd
 import numpy as np
 from core.logger.logger import logger
-from core.model_io import load_model
+from core.model_pool import get_model
 
 
 def predict_entry_exit_config(enriched: pd.DataFrame) -> dict:
     try:
-        model_obj = load_model("entry_exit_model")
+        model_obj = get_model("entry_exit_model")
         clf = model_obj["clf"]
         reg = model_obj["reg"]
         features = model_obj["features"]
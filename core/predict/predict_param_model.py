@@ -1,7 +1,7 @@
 import pandas as pd
 import numpy as np
 from core.logger.logger import logger
-from core.model_io import load_model
+from core.model_pool import get_model
 from core.config.config import settings
 
 def predict_param_config(enriched: pd.DataFrame) -> dict:
@@ -18,7 +18,7 @@ def predict_param_config(enriched: pd.DataFrame) -> dict:
     model_name = f"{settings.model_names['param']}_{interval}"
 
     try:
-        model_obj = load_model(model_name)
+        model_obj = get_model(model_name)
         model = model_obj["model"]
         features = model_obj["features"]
         le = model_obj["label_encoder"]
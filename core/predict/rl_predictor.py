@@ -5,26 +5,19 @@ from stable_baselines3.common.vec_env import DummyVecEnv
 from core.logger.logger import logger
 from core.config.config import settings
 from core.time_context.time_context import get_simulation_date
-from core.model_io import load_model, load_latest_model
+from core.model_pool import get_model
 from core.data_provider.data_provider import fetch_stock_data, load_data
 from rl.envs.trading_env import TradingEnv
 from core.feature_engineering.feature_enricher_multi import enrich_multi_interval_features
 
-_rl_policies = {}
-
 def load_policy(model_name: str = "ppo_intraday") -> PPO:
     if model_name.endswith("_latest"):
-        return load_latest_model(model_name.replace("_latest", ""))
+        return get_model(model_name)
 
-    if model_name not in _rl_policies:
-        try:
-            model_obj = load_model(model_name)
-            model = model_obj["model"]
-            _rl_policies[model_name] = model
-            logger.success(f"🤖 Loaded RL policy from DB: {model_name}")
-        except Exception as e:
-            raise RuntimeError(f"❌ Failed to load RL policy '{model_name}': {e}")
-    return _rl_policies[model_name]
+    try:
+        return get_model(model_name)["model"]
+    except Exception as e:
+        raise RuntimeError(f"❌ Failed to load RL policy '{model_name}': {e}")
 
 def load_rl_frame(symbol: str, days: int = 1500, interval: str = "day") -> pd.DataFrame:
     end = get_simulation_date()
@@ -57,33 +50,113 @@ def load_rl_frame(symbol: str, days: int = 1500, interval: str = "day") -> pd.Da
 
     return df.set_index("date")
 
-def predict_action(symbol: str, model_name: str = "rl_policy", interval: str = "day") -> str:
-    df = load_rl_frame(symbol, days=1500, interval=interval)
-    if df.empty or len(df) < 30:
-        logger.warning(f"📭 Not enough data to predict RL action for {symbol} @ {interval}")
-        return "hold"
+ACTIONS = ["hold", "buy", "sell"]
 
-    env = DummyVecEnv([lambda: TradingEnv(df, freq=interval)])
-    obs = env.reset()
 
-    if not np.all(np.isfinite(obs[0])):
-        logger.warning(f"🧨 RL obs for {symbol} has NaN or inf: {obs}")
-        return "hold"
+def predict_batch(policy, obs: np.ndarray) -> np.ndarray:
+    """Deterministic actions for an ``(n, obs_dim)`` batch in one forward pass."""
+    actions, _ = policy.predict(np.asarray(obs, dtype=np.float32), deterministic=True)
+    return np.asarray(actions).reshape(-1).astype(int)
 
-    try:
-        specific_model = f"{settings.model_names['ppo']}_{symbol}_{interval}_latest"
-        policy = load_policy(specific_model)
-        logger.info(f"✅ Using specific RL policy: {specific_model}")
-    except Exception:
+
+def simulate_rewards_batch(envs: list, policy) -> tuple:
+    """
+    Roll ``envs`` (all driven by ``policy``) forward in lock-step with one
+    ``predict`` call per step for every env still running.
+
+    Returns ``(total_reward, first_action)`` arrays. An env whose observation
+    or step fails gets ``-inf`` reward, like a failed single-env rollout.
+    """
+    n = len(envs)
+    total = np.zeros(n)
+    first_action = np.zeros(n, dtype=int)
+    obs = [None] * n
+    active = []
+    for i, env in enumerate(envs):
+        try:
+            obs[i] = env.reset()[0]
+            if env.start_idx < env.end_idx:
+                active.append(i)
+        except Exception as e:
+            logger.warning(f"⚠️ Reward simulation failed: {e}")
+            total[i] = -np.inf
+
+    first = True
+    while active:
         try:
-            policy = load_policy(model_name)
-            logger.warning(f"⚠️ Fallback to default policy: {model_name}")
+            actions = predict_batch(policy, np.stack([obs[i] for i in active]))
         except Exception as e:
-            logger.error(f"❌ No valid RL policy found for {symbol}: {e}")
-            return "hold"
+            logger.warning(f"⚠️ Reward simulation failed: {e}")
+            total[active] = -np.inf
+            break
+        if first:
+            first_action[active] = actions
+            first = False
+
+        still_active = []
+        for i, action in zip(active, actions):
+            try:
+                obs[i], reward, done, _, _ = envs[i].step(action)
+            except Exception as e:
+                logger.warning(f"⚠️ Reward simulation failed: {e}")
+                total[i] = -np.inf
+                continue
+            total[i] += reward
+            if not done and envs[i].idx < envs[i].end_idx:
+                still_active.append(i)
+        active = still_active
+
+    return total, first_action
+
+
+def _group_by_policy(items: list) -> dict:
+    """Bucket ``(key, policy, obs)`` items by policy object and observation shape."""
+    groups = {}
+    for key, policy, obs in items:
+        groups.setdefault((id(policy), np.shape(obs)), (policy, []))[1].append((key, obs))
+    return groups
+
+
+def predict_actions_many(symbols: list, model_name: str = "rl_policy", interval: str = "day") -> dict:
+    """
+    Batched ``predict_action``: symbols served by the same policy share one
+    forward pass over their stacked first observations.
+    """
+    actions = {s: "hold" for s in symbols}
+    items = []
+    for symbol in symbols:
+        df = load_rl_frame(symbol, days=1500, interval=interval)
+        if df.empty or len(df) < 30:
+            logger.warning(f"📭 Not enough data to predict RL action for {symbol} @ {interval}")
+            continue
 
-    action, _ = policy.predict(obs, deterministic=True)
-    return ["hold", "buy", "sell"][int(action)]
+        obs = TradingEnv(df, freq=interval).reset()[0]
+        if not np.all(np.isfinite(obs)):
+            logger.warning(f"🧨 RL obs for {symbol} has NaN or inf: {obs}")
+            continue
+
+        try:
+            specific_model = f"{settings.model_names['ppo']}_{symbol}_{interval}_latest"
+            policy = load_policy(specific_model)
+            logger.info(f"✅ Using specific RL policy: {specific_model}")
+        except Exception:
+            try:
+                policy = load_policy(model_name)
+                logger.warning(f"⚠️ Fallback to default policy: {model_name}")
+            except Exception as e:
+                logger.error(f"❌ No valid RL policy found for {symbol}: {e}")
+                continue
+        items.append((symbol, policy, obs))
+
+    for policy, members in _group_by_policy(items).values():
+        batch = predict_batch(policy, np.stack([obs for _, obs in members]))
+        for (symbol, _), action in zip(members, batch):
+            actions[symbol] = ACTIONS[int(action)]
+    return actions
+
+
+def predict_action(symbol: str, model_name: str = "rl_policy", interval: str = "day") -> str:
+    return predict_actions_many([symbol], model_name=model_name, interval=interval)[symbol]
 
 def predict_with_fallback(symbol: str, model_name: str = "ppo_intraday") -> str:
     for interval in ["day", "60minute", "15minute"]:
@@ -101,7 +174,7 @@ def predict_with_fallback(symbol: str, model_name: str = "ppo_intraday") -> str:
             policy = load_policy(model_id)
             action, _ = policy.predict(obs, deterministic=True)
             logger.info(f"🔁 RL fallback used model: {model_id}")
-            return ["hold", "buy", "sell"][int(action)]
+            return ACTIONS[int(action)]
         except Exception:
             continue
 
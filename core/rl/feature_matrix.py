@@ -0,0 +1,107 @@
+# core/rl/feature_matrix.py
+
+"""
+Dense, preloaded feature rows for the replay-driven RL envs.
+
+``FeatureMatrix.load`` fetches the feature row of every ``(stock, date)`` an
+episode set needs in a few keyed queries (``unnest`` join, ``chunk_size``
+keys each) and packs their numeric columns into one float32 matrix with a
+key → row map. Keys with no cached row go through ``fetch_features`` once,
+so the recompute-on-miss path still runs — at load time instead of inside
+``step()``.
+"""
+
+from datetime import date as date_type
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import text
+
+from core.config.config import settings
+from core.feature_engineering.feature_provider import fetch_features
+from core.logger.logger import logger
+from core.skiplist.skiplist import is_in_skiplist
+from db.db import engine
+
+Key = Tuple[str, date_type]
+META_COLUMNS = ["stock", "date", "interval"]
+
+
+def _key(stock, day) -> Key:
+    return str(stock).strip().upper(), pd.Timestamp(day).date()
+
+
+class FeatureMatrix:
+    def __init__(self, columns: List[str], values: np.ndarray, index: Dict[Key, int], extras: Optional[pd.DataFrame] = None):
+        self.columns = columns
+        self.values = values        # (keys × features) float32
+        self.index = index          # (stock, date) → row in ``values``
+        self.extras = extras        # non-feature columns kept per row (e.g. regime_tag)
+
+    @property
+    def width(self) -> int:
+        return self.values.shape[1]
+
+    def row_of(self, stock, day) -> int:
+        """Row for ``(stock, day)``, or -1 when no features exist."""
+        return self.index.get(_key(stock, day), -1)
+
+    @classmethod
+    def load(
+        cls,
+        keys: Iterable[Tuple[str, object]],
+        interval: str = "15minute",
+        extra_columns: Tuple[str, ...] = (),
+        refresh_if_missing: bool = True,
+        chunk_size: int = 5000,
+    ) -> "FeatureMatrix":
+        table = settings.interval_feature_table_map[interval]
+        wanted = list(dict.fromkeys(_key(s, d) for s, d in keys))
+        wanted = [k for k in wanted if not is_in_skiplist(k[0])]  # fetch_features returns nothing for these
+
+        frames = []
+        query = text(f"""
+            SELECT DISTINCT ON (f.stock, f.date) f.*
+            FROM {table} f
+            JOIN unnest(CAST(:stocks AS text[]), CAST(:dates AS date[])) AS k(stock, date)
+              ON f.stock = k.stock AND f.date = k.date
+            ORDER BY f.stock, f.date
+        """)
+        for i in range(0, len(wanted), chunk_size):
+            chunk = wanted[i:i + chunk_size]
+            frames.append(pd.read_sql(query, engine, params={
+                "stocks": [s for s, _ in chunk],
+                "dates": [d for _, d in chunk],
+            }))
+        cached = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+        if not cached.empty:
+            cached["date"] = pd.to_datetime(cached["date"]).dt.date
+
+        found = set(zip(cached["stock"], cached["date"])) if not cached.empty else set()
+        missing = [k for k in wanted if k not in found]
+        if missing and refresh_if_missing:
+            logger.info(f"[ENV] Recomputing features for {len(missing)} uncached (stock, date) keys")
+            recomputed = []
+            for stock, day in missing:
+                df = fetch_features(stock=stock, interval=interval, refresh_if_missing=True, start=day, end=day)
+                if df is not None and not df.empty:
+                    row = df.iloc[[0]].copy()
+                    row["stock"], row["date"] = stock, day
+                    recomputed.append(row)
+            if recomputed:
+                cached = pd.concat([cached, *recomputed], ignore_index=True)
+
+        drop = META_COLUMNS + list(extra_columns)
+        if cached.empty:
+            return cls([], np.zeros((0, 0), dtype=np.float32), {}, pd.DataFrame(columns=list(extra_columns)))
+
+        # Text columns (regime_tag and the like) cannot be observation values
+        numeric = cached.drop(columns=drop, errors="ignore").select_dtypes(include=["number", "bool"])
+        columns = list(numeric.columns)
+        index = {(s, d): i for i, (s, d) in enumerate(zip(cached["stock"], cached["date"]))}
+        extras = cached.reindex(columns=list(extra_columns))
+        values = np.ascontiguousarray(cached[columns].to_numpy(dtype=np.float32))
+        logger.info(f"[ENV] Preloaded {len(index)} feature rows × {len(columns)} columns "
+                    f"({len(missing)} not cached)")
+        return cls(columns, values, index, extras)
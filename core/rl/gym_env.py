@@ -5,7 +5,7 @@ import numpy as np
 import pandas as pd
 from gym import spaces
 from core.logger.logger import logger
-from core.feature_engineering.feature_provider import fetch_features
+from core.rl.feature_matrix import FeatureMatrix
 from core.time_context.time_context import get_simulation_date
 from db.postgres_manager import run_query
 
@@ -13,15 +13,30 @@ class ODINTradingEnv(gym.Env):
     """
     A custom Gym environment for RL agent in O.D.I.N.
     Reads replay events from SQL replay_buffer and yields observations and rewards.
+
+    Feature rows for every event are preloaded at construction into
+    ``self.observations`` (one row per event), so ``step()`` does no I/O.
     """
 
+    REGIME_VECTORS = {
+        "trending": [1, 0, 0],
+        "volatile": [0, 1, 0],
+        "sideways": [0, 0, 1]
+    }
+
     def __init__(self, limit=5000):
         super().__init__()
         self.cursor = 0
         self.limit = limit
         self.events = self._load_events()
+        self.features = FeatureMatrix.load(
+            ((e["stock"], e["date"]) for e in self.events),
+            interval="15minute",
+            extra_columns=("regime_tag",),
+        )
 
         self.observation_space = self._infer_observation_space()
+        self.observations, self.regimes = self._build_observations()
         self.action_space = spaces.Box(low=0, high=1, shape=(2,), dtype=np.float32)
 
     def _load_events(self):
@@ -34,32 +49,37 @@ class ODINTradingEnv(gym.Env):
             ORDER BY id
             LIMIT {self.limit};
         """
-        df = run_query(query)
-        if df is None or df.empty:
+        rows = run_query(query)
+        if not rows:
             logger.warning("[ENV] No replay events found.")
             return []
-        return df.to_dict(orient="records")
+        return pd.DataFrame(rows).to_dict(orient="records")
 
     def _infer_observation_space(self):
-        for row in self.events:
-            df = fetch_features(
-                stock=row["stock"],
-                interval="15minute",
-                refresh_if_missing=True,
-                start=row["date"],
-                end=row["date"]
-            )
-            if df is not None and not df.empty:
-                base = df.drop(columns=["stock", "date", "interval", "regime_tag"], errors="ignore").values[0]
-                obs_shape = len(base) + 3  # +3 for regime vector
-                return spaces.Box(low=-np.inf, high=np.inf, shape=(obs_shape,), dtype=np.float32)
+        if self.features.width:
+            obs_shape = self.features.width + 3  # +3 for regime vector
+            return spaces.Box(low=-np.inf, high=np.inf, shape=(obs_shape,), dtype=np.float32)
         logger.warning("[ENV] Could not infer observation shape. Using default (16,).")
         return spaces.Box(low=-np.inf, high=np.inf, shape=(16,), dtype=np.float32)
 
-    def _parse_event(self, row):
+    def _build_observations(self):
+        """One observation row per event; zeros where no features exist."""
+        observations = np.zeros((len(self.events), *self.observation_space.shape), dtype=np.float32)
+        regimes = ["unknown"] * len(self.events)
+        for i, event in enumerate(self.events):
+            row = self.features.row_of(event["stock"], event["date"])
+            if row < 0:
+                continue
+            regime = self.features.extras["regime_tag"].iat[row]
+            regimes[i] = regime if isinstance(regime, str) else "unknown"
+            observations[i, :-3] = self.features.values[row]
+            observations[i, -3:] = self.REGIME_VECTORS.get(regimes[i], [0, 0, 0])
+        return observations, regimes
+
+    def _parse_event(self, i):
         try:
+            row = self.events[i]
             symbol = row["stock"]
-            date = row["date"]
 
             # Reward components
             base_reward = float(row.get("reward", 0.0))
@@ -69,26 +89,8 @@ class ODINTradingEnv(gym.Env):
             capital_efficiency = float(row.get("capital_efficiency", 0.0))
             reward = base_reward + capital_efficiency - holding_cost - slippage_penalty
 
-            df = fetch_features(
-                stock=symbol,
-                interval="15minute",
-                refresh_if_missing=True,
-                start=date,
-                end=date
-            )
-
-            if df is None or df.empty:
-                obs = np.zeros(self.observation_space.shape)
-                regime = "unknown"
-            else:
-                base = df.drop(columns=["stock", "date", "interval", "regime_tag"], errors="ignore").values[0]
-                regime = df["regime_tag"].values[0] if "regime_tag" in df.columns else "unknown"
-                regime_vector = {
-                    "trending": [1, 0, 0],
-                    "volatile": [0, 1, 0],
-                    "sideways": [0, 0, 1]
-                }.get(regime, [0, 0, 0])
-                obs = np.concatenate([base, regime_vector])
+            obs = self.observations[i]
+            regime = self.regimes[i]
 
             info = {
                 "symbol": symbol,
@@ -118,7 +120,6 @@ class ODINTradingEnv(gym.Env):
             obs = np.zeros(self.observation_space.shape, dtype=np.float32)
             return obs, 0.0, True, False, {}
 
-        event = self.events[self.cursor]
+        obs, reward, done, info = self._parse_event(self.cursor)
         self.cursor += 1
-        obs, reward, done, info = self._parse_event(event)
         return obs.astype(np.float32), float(reward), done, False, info
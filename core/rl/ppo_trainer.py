@@ -2,9 +2,9 @@
 
 import torch
 import torch.nn as nn
+from torch.distributions import Normal
 from torch.optim import Adam
 import numpy as np
-from collections import deque
 from core.rl.gym_env import ODINTradingEnv
 from core.logger.logger import logger
 import os
@@ -12,7 +12,7 @@ from utils.progress_logger import log_model_progress
 
 
 class ActorCritic(nn.Module):
-    def __init__(self, input_dim, hidden_dim=128):
+    def __init__(self, input_dim, hidden_dim=128, action_dim=2):
         super().__init__()
         self.shared = nn.Sequential(
             nn.Linear(input_dim, hidden_dim),
@@ -21,77 +21,212 @@ class ActorCritic(nn.Module):
             nn.ReLU()
         )
         self.actor = nn.Sequential(
-            nn.Linear(hidden_dim, 2),
+            nn.Linear(hidden_dim, action_dim),
             nn.Sigmoid()  # [position_size, exit_days_scaled]
         )
         self.critic = nn.Linear(hidden_dim, 1)
+        # Exploration noise around the sigmoid mean (state-independent)
+        self.log_std = nn.Parameter(torch.full((action_dim,), -1.0))
 
     def forward(self, x):
         latent = self.shared(x)
         return self.actor(latent), self.critic(latent)
 
+    def distribution(self, x):
+        mean, value = self(x)
+        return Normal(mean, self.log_std.exp().expand_as(mean)), value.squeeze(-1)
+
+
+class RolloutBuffer:
+    """
+    Preallocated ``(n_steps × n_envs)`` rollout storage.
+
+    ``dones[t]`` marks an episode that ended on step ``t``; ``compute_gae``
+    then stops bootstrapping across it. Advantages are computed for all envs
+    at once, one reverse pass over time.
+    """
+
+    def __init__(self, n_steps: int, n_envs: int, obs_dim: int, action_dim: int, device="cpu"):
+        self.n_steps, self.n_envs, self.device = n_steps, n_envs, device
+        shape = (n_steps, n_envs)
+        self.obs = torch.zeros(*shape, obs_dim, device=device)
+        self.actions = torch.zeros(*shape, action_dim, device=device)
+        self.log_probs = torch.zeros(shape, device=device)
+        self.values = torch.zeros(shape, device=device)
+        self.rewards = torch.zeros(shape, device=device)
+        self.dones = torch.zeros(shape, device=device)
+        self.advantages = torch.zeros(shape, device=device)
+        self.returns = torch.zeros(shape, device=device)
+        self.pos = 0
+
+    def __len__(self):
+        return self.pos * self.n_envs
+
+    @property
+    def full(self) -> bool:
+        return self.pos == self.n_steps
+
+    def reset(self):
+        self.pos = 0
+
+    def add(self, obs, actions, log_probs, values, rewards, dones):
+        t = self.pos
+        self.obs[t] = torch.as_tensor(obs, dtype=torch.float32, device=self.device)
+        self.actions[t] = actions
+        self.log_probs[t] = log_probs
+        self.values[t] = values
+        self.rewards[t] = torch.as_tensor(rewards, dtype=torch.float32, device=self.device)
+        self.dones[t] = torch.as_tensor(dones, dtype=torch.float32, device=self.device)
+        self.pos += 1
+
+    def compute_gae(self, last_values: torch.Tensor, gamma: float, gae_lambda: float):
+        last_gae = torch.zeros(self.n_envs, device=self.device)
+        for t in reversed(range(self.pos)):
+            next_values = last_values if t == self.pos - 1 else self.values[t + 1]
+            non_terminal = 1.0 - self.dones[t]
+            delta = self.rewards[t] + gamma * next_values * non_terminal - self.values[t]
+            last_gae = delta + gamma * gae_lambda * non_terminal * last_gae
+            self.advantages[t] = last_gae
+        self.returns[:self.pos] = self.advantages[:self.pos] + self.values[:self.pos]
+
+    def flat(self, normalize_advantages: bool = True) -> dict:
+        """The filled part of the buffer as ``(pos * n_envs, ...)`` tensors."""
+        n = len(self)
+        flat = {
+            name: getattr(self, name)[:self.pos].reshape(n, *getattr(self, name).shape[2:])
+            for name in ("obs", "actions", "log_probs", "values", "advantages", "returns")
+        }
+        if normalize_advantages and n > 1:
+            adv = flat["advantages"]
+            flat["advantages"] = (adv - adv.mean()) / (adv.std() + 1e-8)
+        return flat
+
+    def minibatches(self, batch_size: int, generator: torch.Generator = None, flat: dict = None):
+        """
+        One shuffled pass over the filled part of the buffer. Each field is
+        permuted once per pass; minibatches are then contiguous slices.
+        """
+        flat = flat if flat is not None else self.flat()
+        n = len(self)
+        order = torch.randperm(n, generator=generator, device=self.device)
+        shuffled = {name: tensor[order] for name, tensor in flat.items()}
+        for i in range(0, n, batch_size):
+            yield {name: tensor[i:i + batch_size] for name, tensor in shuffled.items()}
+
+
+def _reset_env(env):
+    out = env.reset()
+    return out[0] if isinstance(out, tuple) else out
+
+
+def _step_env(env, action):
+    out = env.step(action)
+    if len(out) == 5:
+        obs, reward, terminated, truncated, info = out
+        return obs, reward, terminated or truncated, info
+    return out
+
 
 class PPOTrainer:
-    def __init__(self, env, lr=3e-4, gamma=0.99):
-        self.env = env
+    """
+    Clipped-objective PPO over one or several envs.
+
+    ``collect_rollout`` steps every env in lock-step (one batched forward
+    pass per step) into a ``RolloutBuffer`` and computes GAE; ``train_step``
+    runs ``epochs`` shuffled passes of ``n_minibatches`` minibatches over it.
+    """
+
+    def __init__(self, env, lr=3e-4, gamma=0.99, gae_lambda=0.95, clip_range=0.2,
+                 value_coef=0.5, entropy_coef=0.0, n_steps=512, n_minibatches=4,
+                 seed=None, device="cpu"):
+        self.envs = list(env) if isinstance(env, (list, tuple)) else [env]
+        self.env = self.envs[0]
         self.gamma = gamma
-        self.model = ActorCritic(input_dim=env.observation_space.shape[0])
+        self.gae_lambda = gae_lambda
+        self.clip_range = clip_range
+        self.value_coef = value_coef
+        self.entropy_coef = entropy_coef
+        self.n_minibatches = n_minibatches
+        self.device = device
+        self.generator = torch.Generator(device=device)
+        if seed is not None:
+            torch.manual_seed(seed)
+            self.generator.manual_seed(seed)
+
+        obs_dim = self.env.observation_space.shape[0]
+        self.model = ActorCritic(input_dim=obs_dim).to(device)
         self.optimizer = Adam(self.model.parameters(), lr=lr)
-        self.buffer = deque(maxlen=5000)
-
-    def collect_rollout(self, steps=1000):
-        obs = self.env.reset()
+        self.buffer = RolloutBuffer(n_steps, len(self.envs), obs_dim, action_dim=2, device=device)
+        self._last_obs = None
+
+    def collect_rollout(self, steps=None):
+        """Fill the buffer with ``steps`` (default: its capacity) lock-step transitions per env."""
+        steps = min(steps or self.buffer.n_steps, self.buffer.n_steps)
+        if self._last_obs is None:
+            self._last_obs = np.stack([_reset_env(env) for env in self.envs]).astype(np.float32)
+
+        self.buffer.reset()
+        rewards = np.zeros(len(self.envs), dtype=np.float32)
+        dones = np.zeros(len(self.envs), dtype=np.float32)
         for _ in range(steps):
-            obs_tensor = torch.tensor(obs, dtype=torch.float32).unsqueeze(0)
+            obs_tensor = torch.as_tensor(self._last_obs, device=self.device)
             with torch.no_grad():
-                action, _ = self.model(obs_tensor)
-            action = action.squeeze().numpy()
-
-            next_obs, reward, done, info = self.env.step(action)
-
-            # Optional debug log for reward breakdown
-            reason = info.get("reason", "N/A")
-            breakdown = info.get("reward_breakdown", {})
-            logger.debug(
-                f"[RL] Step: {reason} | Reward: {reward:.2f} | "
-                f"Profit={breakdown.get('profit', 0):.2f}, "
-                f"Missed={breakdown.get('missed_profit', 0):.2f}, "
-                f"Penalty={breakdown.get('hold_duration_penalty', 0):.2f}"
-            )
-
-            self.buffer.append((obs, action, reward, next_obs, done))
-            obs = next_obs
-            if done:
-                obs = self.env.reset()
-
-    def train_step(self, batch_size=64):
+                dist, values = self.model.distribution(obs_tensor)
+                actions = dist.sample()
+                log_probs = dist.log_prob(actions).sum(-1)
+            env_actions = actions.clamp(0.0, 1.0).cpu().numpy()
+
+            next_obs = np.empty_like(self._last_obs)
+            for i, env in enumerate(self.envs):
+                obs, reward, done, info = _step_env(env, env_actions[i])
+                rewards[i], dones[i] = reward, done
+                next_obs[i] = _reset_env(env) if done else obs
+
+            self.buffer.add(self._last_obs, actions, log_probs, values, rewards, dones)
+            self._last_obs = next_obs
+
+        with torch.no_grad():
+            _, last_values = self.model.distribution(torch.as_tensor(self._last_obs, device=self.device))
+        self.buffer.compute_gae(last_values, self.gamma, self.gae_lambda)
+
+    def train_step(self, batch_size=None, epochs=4):
+        """
+        PPO update over the collected rollout; returns the mean loss.
+
+        ``batch_size`` defaults to the rollout size over ``n_minibatches``
+        (``n_steps * n_envs / 4``): on CPU, small minibatches spend most of
+        their time in per-step Python and optimizer overhead.
+        """
+        batch_size = batch_size or max(len(self.buffer) // self.n_minibatches, 1)
         if len(self.buffer) < batch_size:
             logger.warning("Not enough samples to train.")
             return
 
-        batch = [self.buffer[i] for i in np.random.choice(len(self.buffer), batch_size, replace=False)]
-        obs, actions, rewards, next_obs, dones = zip(*batch)
-        obs = torch.tensor(np.array(obs), dtype=torch.float32)
-        actions = torch.tensor(actions, dtype=torch.float32)
-        rewards = torch.tensor(rewards, dtype=torch.float32)
-        next_obs = torch.tensor(next_obs, dtype=torch.float32)
-        dones = torch.tensor(dones, dtype=torch.float32)
-
-        pred_actions, values = self.model(obs)
-        _, next_values = self.model(next_obs)
-        target_values = rewards + self.gamma * next_values.squeeze() * (1 - dones)
-        advantages = target_values.detach() - values.squeeze()
-
-        actor_loss = ((pred_actions - actions) ** 2).mean()
-        critic_loss = (advantages ** 2).mean()
-
-        loss = actor_loss + critic_loss
-        self.optimizer.zero_grad()
-        loss.backward()
-        self.optimizer.step()
-
-        logger.info(f"\U0001F3AF PPO step complete. Loss: {loss.item():.4f}")
-        log_model_progress("PPO", loss.item(), buffer_size=len(self.buffer))
+        flat = self.buffer.flat()
+        losses = []
+        for _ in range(epochs):
+            for batch in self.buffer.minibatches(batch_size, self.generator, flat):
+                advantages = batch["advantages"]
+                dist, values = self.model.distribution(batch["obs"])
+                log_probs = dist.log_prob(batch["actions"]).sum(-1)
+                ratio = (log_probs - batch["log_probs"]).exp()
+                actor_loss = -torch.min(
+                    ratio * advantages,
+                    ratio.clamp(1 - self.clip_range, 1 + self.clip_range) * advantages,
+                ).mean()
+                critic_loss = ((batch["returns"] - values) ** 2).mean()
+                entropy = dist.entropy().sum(-1).mean()
+
+                loss = actor_loss + self.value_coef * critic_loss - self.entropy_coef * entropy
+                self.optimizer.zero_grad(set_to_none=True)
+                loss.backward()
+                self.optimizer.step()
+                losses.append(loss.detach())
+
+        mean_loss = torch.stack(losses).mean().item()  # one device sync per update
+        logger.info(f"\U0001F3AF PPO step complete. Loss: {mean_loss:.4f} ({epochs} epochs × {len(self.buffer)} samples)")
+        log_model_progress("PPO", mean_loss, buffer_size=len(self.buffer))
+        return mean_loss
 
 
     def save_model(self, path="checkpoints/ppo.pt"):
@@ -100,5 +235,12 @@ class PPOTrainer:
         logger.success(f"\u2705 Model saved to {path}")
 
     def load_model(self, path="checkpoints/ppo.pt"):
-        self.model.load_state_dict(torch.load(path))
+        # Checkpoints from before ``log_std`` existed still load; any other mismatch is an error
+        result = self.model.load_state_dict(torch.load(path), strict=False)
+        missing = set(result.missing_keys) - {"log_std"}
+        if missing or result.unexpected_keys:
+            raise RuntimeError(
+                f"Checkpoint {path} does not match ActorCritic: "
+                f"missing {sorted(missing)}, unexpected {sorted(result.unexpected_keys)}"
+            )
         logger.info(f"🔄 Loaded model from {path}")
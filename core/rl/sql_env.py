@@ -5,7 +5,7 @@ import numpy as np
 import pandas as pd
 from gym import spaces
 from core.logger.logger import logger
-from core.feature_engineering.feature_provider import fetch_features
+from core.rl.feature_matrix import FeatureMatrix
 from core.time_context.time_context import get_simulation_date
 from db.postgres_manager import run_query
 
@@ -13,14 +13,22 @@ class ODINSQLTradingEnv(gym.Env):
     """
     Fallback Gym environment for PPO trainer that pulls replay events from SQL
     instead of Redis (used when Redis is not running).
+
+    Feature rows for every event are preloaded at construction into
+    ``self.observations`` (one row per event), so ``step()`` does no I/O.
     """
 
     def __init__(self):
         super().__init__()
         self.events = self._load_events()
         self.index = 0
+        self.features = FeatureMatrix.load(
+            ((e["stock"], e["date"]) for e in self.events),
+            interval="15minute",
+        )
 
         self.observation_space = self._infer_observation_space()
+        self.observations = self._build_observations()
         self.action_space = spaces.Box(low=0, high=1, shape=(2,), dtype=np.float32)
 
     def _load_events(self):
@@ -33,32 +41,32 @@ class ODINSQLTradingEnv(gym.Env):
             ORDER BY id
             LIMIT 1000
         """
-        df = run_query(query)
-        if isinstance(df, pd.DataFrame) and not df.empty:
-            return df.to_dict(orient="records")
+        rows = run_query(query)
+        if rows:
+            return pd.DataFrame(rows).to_dict(orient="records")
         else:
             logger.warning("[SQL ENV] No replay events available in SQL.")
             return []
 
     def _infer_observation_space(self):
-        for event in self.events:
-            df = fetch_features(
-                stock=event["stock"],
-                interval="15minute",
-                start=event["date"],
-                end=event["date"],
-                refresh_if_missing=True
-            )
-            if df is not None and not df.empty:
-                shape = df.drop(columns=["stock", "date", "interval"], errors="ignore").values[0].shape
-                return spaces.Box(low=-np.inf, high=np.inf, shape=shape, dtype=np.float32)
+        if self.features.width:
+            return spaces.Box(low=-np.inf, high=np.inf, shape=(self.features.width,), dtype=np.float32)
         logger.warning("[SQL ENV] Could not infer feature shape. Using default (13,).")
         return spaces.Box(low=-np.inf, high=np.inf, shape=(13,), dtype=np.float32)
 
-    def _parse_event(self, event):
+    def _build_observations(self):
+        """One observation row per event; zeros where no features exist."""
+        rows = np.array([self.features.row_of(e["stock"], e["date"]) for e in self.events], dtype=int)
+        observations = np.zeros((len(self.events), *self.observation_space.shape), dtype=np.float32)
+        hit = rows >= 0
+        if hit.any():
+            observations[hit] = self.features.values[rows[hit]]
+        return observations
+
+    def _parse_event(self, i):
         try:
+            event = self.events[i]
             symbol = event["stock"]
-            date = event["date"]
 
             # Full reward components
             base_reward = float(event.get("reward", 0.0))
@@ -70,17 +78,7 @@ class ODINSQLTradingEnv(gym.Env):
             total_reward = base_reward + capital_efficiency - holding_cost - slippage_penalty
             done = bool(event.get("done", True))
 
-            df = fetch_features(
-                stock=symbol,
-                interval="15minute",
-                start=date,
-                end=date,
-                refresh_if_missing=True
-            )
-            if df is None or df.empty:
-                obs = np.zeros(self.observation_space.shape)
-            else:
-                obs = df.drop(columns=["stock", "date", "interval"], errors="ignore").values[0]
+            obs = self.observations[i]
 
             info = {
                 "symbol": symbol,
@@ -111,7 +109,6 @@ class ODINSQLTradingEnv(gym.Env):
             obs = np.zeros(self.observation_space.shape, dtype=np.float32)
             return obs, 0.0, True, False, {}
 
-        event = self.events[self.index]
+        obs, reward, done, info = self._parse_event(self.index)
         self.index += 1
-        obs, reward, done, info = self._parse_event(event)
         return obs.astype(np.float32), float(reward), done, False, info
@@ -1,23 +1,46 @@
 # core/skiplist/skiplist.py
 
+import time
 from db.postgres_manager import run_query
 from core.logger.logger import logger
 from core.config.config import settings
 from datetime import datetime, timedelta
+from utils.cache import TTLTableCache
+
+
+def _load_skiplist() -> dict:
+    """Active entries → monotonic expiry deadline (None = permanent)."""
+    rows = run_query(
+        """
+        SELECT stock, EXTRACT(EPOCH FROM (expires_at - NOW())) AS seconds_left
+        FROM skiplist_stocks
+        WHERE expires_at IS NULL OR expires_at > NOW()
+        """
+    ) or []
+    now = time.monotonic()
+    return {row[0]: (now + float(row[1]) if row[1] is not None else None) for row in rows}
+
+
+_skiplist_cache = TTLTableCache("skiplist", _load_skiplist, ttl=settings.skiplist_cache_ttl)
+_MISSING = object()
+
+
+def invalidate_skiplist_cache():
+    """Force a reload on next lookup (for writers that bypass add/remove_from_skiplist)."""
+    _skiplist_cache.invalidate()
+
+
+def skiplist_cache_stats() -> dict:
+    return _skiplist_cache.stats()
+
 
 def is_in_skiplist(stock: str, silent: bool = False) -> bool:
     try:
-        result = run_query(
-            """
-            SELECT 1 FROM skiplist_stocks
-            WHERE stock = :stock AND (expires_at IS NULL OR expires_at > NOW())
-            LIMIT 1
-            """,
-            params={"stock": stock}
-        )
+        deadline = _skiplist_cache.get(stock, _MISSING)
+        result = deadline is not _MISSING and (deadline is None or deadline > time.monotonic())
         if result and not silent and getattr(settings, "log_skiplist_verbose", False):
             logger.info(f"⏭️ Skipping {stock} (in skiplist)")
-        return bool(result)
+        return result
     except Exception as e:
         logger.warning(f"⚠️ Failed to check skiplist for {stock}: {e}")
         return False
@@ -38,6 +61,7 @@ def add_to_skiplist(stock: str, reason: str = "unknown", ttl_days: int = None):
             expires_at = CASE WHEN :ttl IS NOT NULL THEN now() + interval ':ttl days' ELSE NULL END;
         """
         run_query(query, params={"stock": stock, "reason": reason, "ttl": ttl_days}, fetchall=False)
+        _skiplist_cache.set(stock, time.monotonic() + ttl_days * 86400 if ttl_days else None)
 
         if getattr(settings, "log_skiplist_verbose", False):
             expiry_msg = f"(expires in {ttl_days}d)" if ttl_days else "(permanent)"
@@ -53,6 +77,7 @@ def remove_from_skiplist(stock: str):
             params={"stock": stock},
             fetchall=False
         )
+        _skiplist_cache.pop(stock)
     except Exception as e:
         logger.warning(f"⚠️ Failed to remove {stock} from skiplist: {e}")
 
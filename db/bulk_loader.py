@@ -0,0 +1,71 @@
+# db/bulk_loader.py
+
+"""
+Set-based bulk writes via Postgres COPY.
+
+Rows are streamed into a temp staging table with ``COPY ... FROM STDIN``; the
+target is then updated with one ``DELETE ... USING`` (when refreshing) and one
+``INSERT ... ON CONFLICT DO NOTHING``, all in a single transaction.
+"""
+
+import io
+from typing import List, Optional
+
+import pandas as pd
+
+from db.db import engine
+
+
+def _csv_buffer(df: pd.DataFrame) -> io.StringIO:
+    buf = io.StringIO()
+    # Unquoted empty fields are NULL in COPY's csv format
+    df.to_csv(buf, index=False, header=False, date_format="%Y-%m-%d %H:%M:%S")
+    buf.seek(0)
+    return buf
+
+
+def copy_upsert(
+    df: pd.DataFrame,
+    table_name: str,
+    key_cols: List[str],
+    columns: Optional[List[str]] = None,
+    refresh: bool = False,
+) -> int:
+    """
+    Bulk-load ``df`` into ``table_name`` and return the number of rows inserted.
+
+    With ``refresh=True`` existing rows sharing a key with the batch are deleted
+    first and the last duplicate in the batch wins; otherwise existing rows are
+    kept and the first duplicate wins (same as repeated row-wise inserts).
+    """
+    if df is None or df.empty:
+        return 0
+
+    columns = columns or list(df.columns)
+    df = df[columns].drop_duplicates(subset=key_cols, keep="last" if refresh else "first")
+
+    stage = f"_stage_{table_name}"
+    cols = ", ".join(columns)
+    keys = ", ".join(key_cols)
+    match = " AND ".join(f"t.{k} = s.{k}" for k in key_cols)
+
+    conn = engine.raw_connection()
+    try:
+        cur = conn.cursor()
+        cur.execute(f"CREATE TEMP TABLE {stage} (LIKE {table_name} INCLUDING DEFAULTS) ON COMMIT DROP")
+        cur.copy_expert(f"COPY {stage} ({cols}) FROM STDIN WITH (FORMAT csv)", _csv_buffer(df))
+        if refresh:
+            cur.execute(f"DELETE FROM {table_name} t USING {stage} s WHERE {match}")
+        cur.execute(
+            f"INSERT INTO {table_name} ({cols}) SELECT {cols} FROM {stage} "
+            f"ON CONFLICT ({keys}) DO NOTHING"
+        )
+        inserted = cur.rowcount
+        cur.close()
+        conn.commit()
+        return inserted
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
@@ -0,0 +1,138 @@
+# db/columnar_reader.py
+
+"""
+Columnar reads that bypass ORM object hydration.
+
+Rows are streamed with ``COPY (SELECT ...) TO STDOUT`` straight into a CSV
+buffer and parsed by pandas' C reader into typed columns, so loading millions
+of bars never builds one SQLAlchemy object per row. Column dtypes come from the
+ORM model definitions in ``db.models``.
+"""
+
+import io
+from typing import Iterable, List, Optional, Union
+
+import pandas as pd
+from sqlalchemy import BigInteger, Boolean, Date, DateTime, Float, Integer
+
+from db.db import engine
+from db.models import (
+    StockPriceHistory,
+    StockFeatureDay,
+    StockFeature15m,
+    StockFeature60m,
+    StockFeature1m,
+)
+
+COLUMNAR_MODELS = {
+    model.__tablename__: model
+    for model in (StockPriceHistory, StockFeatureDay, StockFeature15m, StockFeature60m, StockFeature1m)
+}
+
+
+def column_dtypes(model, columns: Optional[List[str]] = None):
+    """Map a model's columns to (read_csv dtypes, date columns)."""
+    dtypes, dates = {}, []
+    for col in model.__table__.columns:
+        if columns and col.name not in columns:
+            continue
+        if isinstance(col.type, (Date, DateTime)):
+            dates.append(col.name)
+        elif isinstance(col.type, Float):
+            dtypes[col.name] = "float64"
+        elif isinstance(col.type, (Integer, BigInteger)):
+            dtypes[col.name] = "int64" if not col.nullable else "Int64"
+        elif isinstance(col.type, Boolean):
+            dtypes[col.name] = "boolean"
+        else:
+            dtypes[col.name] = object
+    return dtypes, dates
+
+
+def copy_select(sql: str, params: dict = None, dtypes: dict = None, parse_dates: List[str] = None) -> pd.DataFrame:
+    """
+    Run ``sql`` (psycopg2 ``%(name)s`` placeholders) through COPY TO STDOUT
+    and return a typed DataFrame.
+    """
+    conn = engine.raw_connection()
+    try:
+        cur = conn.cursor()
+        query = cur.mogrify(sql, params or {}).decode()
+        buf = io.StringIO()
+        cur.copy_expert(f"COPY ({query}) TO STDOUT WITH (FORMAT csv, HEADER true)", buf)
+        cur.close()
+    finally:
+        conn.close()
+
+    buf.seek(0)
+    return pd.read_csv(
+        buf,
+        dtype=dtypes or None,
+        parse_dates=parse_dates or False,
+        true_values=["t"],
+        false_values=["f"],
+        # COPY writes NULL as an empty field; "NA", "None", "null" etc. are real text
+        keep_default_na=False,
+        na_values=[""],
+    )
+
+
+def read_table_columnar(
+    table_name: str,
+    key_col: Optional[str] = None,
+    keys: Union[str, Iterable[str], None] = None,
+    start=None,
+    end=None,
+    interval: Optional[str] = None,
+    columns: Optional[List[str]] = None,
+) -> pd.DataFrame:
+    """
+    Typed read of a price/feature table filtered by key(s), date range and interval.
+
+    ``keys`` may be a single value or a list (matched with ``= ANY``).
+    """
+    model = COLUMNAR_MODELS.get(table_name)
+    if model is None:
+        raise ValueError(f"No columnar reader for table: {table_name}")
+
+    cols = columns or [c.name for c in model.__table__.columns]
+    dtypes, dates = column_dtypes(model, cols)
+
+    clauses, params = [], {}
+    if keys is not None and key_col:
+        if isinstance(keys, str):
+            clauses.append(f"{key_col} = %(keys)s")
+            params["keys"] = keys
+        else:
+            clauses.append(f"{key_col} = ANY(%(keys)s)")
+            params["keys"] = list(keys)
+    if interval is not None and "interval" in model.__table__.columns:
+        clauses.append("interval = %(interval)s")
+        params["interval"] = interval
+    if start is not None:
+        clauses.append("date >= %(start)s")
+        params["start"] = pd.to_datetime(start).date()
+    if end is not None:
+        clauses.append("date <= %(end)s")
+        params["end"] = pd.to_datetime(end).date()
+
+    sql = f"SELECT {', '.join(cols)} FROM {table_name}"
+    if clauses:
+        sql += " WHERE " + " AND ".join(clauses)
+    order = [key_col] if key_col and keys is not None and not isinstance(keys, str) else []
+    sql += " ORDER BY " + ", ".join(order + ["date"])
+
+    return copy_select(sql, params, dtypes=dtypes, parse_dates=dates)
+
+
+def read_price_history(symbols, interval: str, start=None, end=None) -> pd.DataFrame:
+    """Bars from ``stock_price_history`` for one symbol or a list of symbols."""
+    return read_table_columnar(
+        StockPriceHistory.__tablename__, key_col="symbol", keys=symbols,
+        start=start, end=end, interval=interval,
+    )
+
+
+def read_features(table_name: str, stocks=None, start=None, end=None) -> pd.DataFrame:
+    """Rows from a ``stock_features_*`` table for one stock, a list, or all stocks."""
+    return read_table_columnar(table_name, key_col="stock", keys=stocks, start=start, end=end)
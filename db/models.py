@@ -126,6 +126,14 @@ class StockFeature60m(Base):
     volume_spike      = Column(Boolean)
     vwap_dev          = Column(Float)
 
+class StockFeatureState(Base):
+    __tablename__ = 'stock_feature_state'
+    stock       = Column(String(20), primary_key=True)
+    interval    = Column(String, primary_key=True)
+    last_date   = Column(DateTime)
+    state       = Column(JSONB)
+    updated_at  = Column(DateTime, default=datetime.utcnow)
+
 class StockFundamental(Base):
     __tablename__ = 'stock_fundamentals'
     stock           = Column(String(20), primary_key=True)
@@ -0,0 +1,155 @@
+# db/position_store.py
+
+"""
+Diff-based persistence for ``open_positions``.
+
+``PositionStore`` remembers the book as last read or written, keyed by
+``(stock, interval)``. ``sync(positions)`` compares the new book with that
+snapshot and writes only the difference, all in one transaction:
+
+* closed positions are deleted by key;
+* new and changed positions are COPY'd into a temp staging table and upserted
+  on the table's primary key (``stock``).
+
+Unchanged rows are not touched, and readers never see an empty table
+between cycles.
+"""
+
+import io
+import json
+import math
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+from sqlalchemy import text
+
+from core.config.config import settings
+from core.logger.logger import logger
+from db.db import engine
+
+POSITION_COLUMNS = [
+    "stock", "entry_price", "entry_date", "quantity",
+    "sma_short", "sma_long", "rsi_thresh", "strategy_config", "interval",
+]
+CONFLICT_KEY = "stock"
+
+Key = Tuple[str, str]
+
+
+def _json_config(value) -> str:
+    if isinstance(value, str):
+        try:
+            value = json.loads(value)
+        except ValueError:
+            return json.dumps(value)
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        value = {}
+    return json.dumps(value, sort_keys=True, default=str)
+
+
+def _float(value):
+    if value is None or pd.isna(value):
+        return None
+    return float(value)
+
+
+def _normalize(row: dict) -> tuple:
+    """Comparable, write-ready tuple in ``POSITION_COLUMNS`` order."""
+    entry_date = pd.to_datetime(row.get("entry_date"), errors="coerce")
+    quantity = row.get("quantity")
+    return (
+        str(row["stock"]),
+        _float(row.get("entry_price")),
+        None if pd.isna(entry_date) else entry_date.to_pydatetime().replace(tzinfo=None),
+        0 if quantity is None or pd.isna(quantity) else int(quantity),
+        _float(row.get("sma_short")),
+        _float(row.get("sma_long")),
+        _float(row.get("rsi_thresh")),
+        _json_config(row.get("strategy_config")),
+        row.get("interval") if isinstance(row.get("interval"), str) else "day",
+    )
+
+
+def _snapshot_of(positions: pd.DataFrame) -> Dict[Key, tuple]:
+    if positions is None or positions.empty:
+        return {}
+    frame = positions.reindex(columns=POSITION_COLUMNS)
+    rows = [_normalize(r) for r in frame.to_dict(orient="records")]
+    # One row per primary key, last one wins (as the old REPLACE upsert did)
+    by_stock = {r[0]: r for r in rows}
+    return {(r[0], r[-1]): r for r in by_stock.values()}
+
+
+class PositionStore:
+    def __init__(self, table_name: str = None):
+        self.table_name = table_name or settings.tables.open_positions
+        self._snapshot: Optional[Dict[Key, tuple]] = None
+
+    def load(self) -> pd.DataFrame:
+        """Read the table and make it the snapshot the next ``sync`` diffs against."""
+        df = pd.read_sql(text(f'SELECT {", ".join(POSITION_COLUMNS)} FROM "{self.table_name}"'), engine)
+        self._snapshot = _snapshot_of(df)
+        return df
+
+    def invalidate(self) -> None:
+        """Forget the snapshot; the next ``sync`` re-reads the table before diffing."""
+        self._snapshot = None
+
+    def diff(self, positions: pd.DataFrame) -> Dict[str, List]:
+        """``{"insert": rows, "update": rows, "close": keys}`` of ``positions`` against the snapshot."""
+        if self._snapshot is None:
+            self.load()
+        new = _snapshot_of(positions)
+        old = self._snapshot
+        return {
+            "insert": [row for key, row in new.items() if key not in old],
+            "update": [row for key, row in new.items() if key in old and old[key] != row],
+            "close": [key for key in old if key not in new],
+        }
+
+    def sync(self, positions: pd.DataFrame) -> Dict[str, int]:
+        """Persist ``positions`` as the whole open book; returns row counts per change kind."""
+        delta = self.diff(positions)
+        counts = {kind: len(items) for kind, items in delta.items()}
+        if any(counts.values()):
+            self._apply(delta["insert"] + delta["update"], delta["close"])
+        self._snapshot = _snapshot_of(positions)
+        logger.info(f"💾 {self.table_name}: +{counts['insert']} ~{counts['update']} -{counts['close']} "
+                    f"({len(self._snapshot)} open)")
+        return counts
+
+    def _apply(self, upserts: List[tuple], closes: List[Key]) -> None:
+        table = self.table_name
+        stage = f"_stage_{table}"
+        cols = ", ".join(POSITION_COLUMNS)
+        updates = ", ".join(f"{c} = EXCLUDED.{c}" for c in POSITION_COLUMNS if c != CONFLICT_KEY)
+
+        conn = engine.raw_connection()
+        try:
+            cur = conn.cursor()
+            if closes:
+                cur.execute(
+                    f'DELETE FROM "{table}" t USING unnest(%s::text[], %s::text[]) AS c(stock, interval) '
+                    f"WHERE t.stock = c.stock AND COALESCE(t.interval, 'day') = c.interval",
+                    ([s for s, _ in closes], [i for _, i in closes]),
+                )
+            if upserts:
+                buf = io.StringIO()
+                pd.DataFrame(upserts, columns=POSITION_COLUMNS).to_csv(
+                    buf, index=False, header=False, date_format="%Y-%m-%d %H:%M:%S.%f"
+                )
+                buf.seek(0)
+                cur.execute(f'CREATE TEMP TABLE {stage} (LIKE "{table}" INCLUDING DEFAULTS) ON COMMIT DROP')
+                cur.copy_expert(f"COPY {stage} ({cols}) FROM STDIN WITH (FORMAT csv)", buf)
+                cur.execute(
+                    f'INSERT INTO "{table}" ({cols}) SELECT {cols} FROM {stage} '
+                    f"ON CONFLICT ({CONFLICT_KEY}) DO UPDATE SET {updates}"
+                )
+            cur.close()
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            self._snapshot = None  # unknown state; re-read before the next diff
+            raise
+        finally:
+            conn.close()
@@ -3,7 +3,11 @@
 import pandas as pd
 import json
 from datetime import datetime
+from sqlalchemy import text
+from core.logger.logger import logger
+from db.db import engine
 from db.postgres_manager import run_query
+from db.replay_writer import REPLAY_TABLE, flush_replay_writer, get_replay_writer
 
 class SQLReplayBuffer:
     def __init__(self):
@@ -12,25 +16,17 @@ class SQLReplayBuffer:
     def _insert_episode(self, episode: dict):
         """
         Internal helper to insert a replay episode.
+
+        Episodes go through the process-wide buffered writer
+        (``db.replay_writer``) and reach the table on the next flush.
         """
         if "inserted_at" not in episode:
             episode["inserted_at"] = datetime.now()
+        get_replay_writer().enqueue(episode)
 
-        # Ensure JSON serialization
-        if isinstance(episode.get("features"), dict):
-            episode["features"] = json.dumps(episode["features"])
-        if isinstance(episode.get("strategy_config"), dict):
-            episode["strategy_config"] = json.dumps(episode["strategy_config"])
-
-        # Use colon‐style binds for all parameters and cast JSON strings to JSONB
-        sql = """
-        INSERT INTO rl_replay_buffer
-            (stock, date, interval, action, reward, features, strategy_config, inserted_at)
-        VALUES
-            (:stock, :date, :interval, :action, :reward,
-             CAST(:features AS JSONB), CAST(:strategy_config AS JSONB), :inserted_at)
-        """
-        run_query(sql, params=episode, fetchall=False)
+    def flush(self) -> int:
+        """Write buffered episodes now."""
+        return get_replay_writer().flush()
 
     def add(self, trade_result: dict, tags: dict = None):
         """
@@ -85,6 +81,7 @@ class SQLReplayBuffer:
         """
         Return count of episodes where reward IS NOT NULL.
         """
+        flush_replay_writer()
         sql = "SELECT COUNT(*) FROM rl_replay_buffer WHERE reward IS NOT NULL"
         rows = run_query(sql, fetchall=True)
         return int(rows[0][0]) if rows else 0
@@ -93,6 +90,7 @@ class SQLReplayBuffer:
         """
         Return total number of episodes.
         """
+        flush_replay_writer()
         sql = "SELECT COUNT(*) FROM rl_replay_buffer"
         rows = run_query(sql, fetchall=True)
         return int(rows[0][0]) if rows else 0
@@ -101,12 +99,22 @@ class SQLReplayBuffer:
         """
         Load all episodes, ordered by date and insertion time.
         """
+        flush_replay_writer()
         sql = "SELECT * FROM rl_replay_buffer ORDER BY date, inserted_at"
         rows = run_query(sql, fetchall=True)
         return pd.DataFrame(rows)
 
+    def sample(self, n: int, **filters) -> pd.DataFrame:
+        """Server-side random sample; see ``sample_replay_episodes``."""
+        return sample_replay_episodes(n, **filters)
+
+    def iter_batches(self, batch_size: int = 10_000, **filters):
+        """Stream episodes in fixed-size batches; see ``iter_replay_episodes``."""
+        return iter_replay_episodes(batch_size, **filters)
+
     def clear(self):
         """Remove all episodes."""
+        flush_replay_writer()
         run_query("DELETE FROM rl_replay_buffer", fetchall=False)
 
     def clear_old_episodes(self, days: int = 90):
@@ -121,10 +129,62 @@ class SQLReplayBuffer:
         run_query(sql, params=[interval_str], fetchall=False)
 
 
+def trade_close_episode(event: dict):
+    """Replay episode for a ``TRADE_CLOSE`` event (None for other event types)."""
+    from core.event_bus import event_uuid
+
+    if event.get("event_type") != "TRADE_CLOSE":
+        return None
+    return {
+        "episode_id": event_uuid(event),  # stable across redeliveries
+        "stock": event["symbol"],
+        "date": event["timestamp"][:10],
+        "features": {},  # Optional: preload from cache
+        "action": 1,  # Since it's a close, assume "hold to exit"
+        "reward": float(event.get("reward", 0)),
+        "interval": event.get("interval", "day"),
+        "strategy_config": event.get("strategy_config", {}),
+        "done": True,
+
+        # 🎯 Enriched reward signals for PPO training
+        "missed_pnl": float(event.get("missed_pnl", 0)),
+        "holding_cost": float(event.get("holding_cost", 0)),
+        "slippage_penalty": float(event.get("slippage_penalty", 0)),
+        "capital_efficiency": float(event.get("capital_efficiency", 0)),
+
+        # 📈 Optional: regime awareness (VIX tag, etc.)
+        "regime_tag": event.get("regime_tag"),
+    }
+
+
+def store_trade_close_batch(events, label: str) -> int:
+    """
+    Consumer-group handler body: enqueue the batch's TRADE_CLOSE episodes and
+    flush once. Malformed events are skipped; a failed flush raises so the
+    batch stays pending and is redelivered. Returns episodes stored.
+    """
+    buffer = SQLReplayBuffer()
+    stored = 0
+    for event in events:
+        try:
+            episode = trade_close_episode(event)
+        except Exception as e:
+            logger.error(f"[{label}] ⚠️ Skipping malformed event {event.get('stream_id')}: {e}")
+            continue
+        if episode is not None:
+            buffer._insert_episode(episode)
+            stored += 1
+    if stored:
+        buffer.flush()
+        logger.info(f"[{label}] Stored {stored} replay episodes from {len(events)} events")
+    return stored
+
+
 def load_replay_episodes(stock: str = None, interval: str = None) -> pd.DataFrame:
     """
     Load replay episodes, optionally filtering by stock and/or interval.
     """
+    flush_replay_writer()
     sql = "SELECT * FROM rl_replay_buffer"
     conditions, params = [], []
     if stock:
@@ -137,6 +197,102 @@ def load_replay_episodes(stock: str = None, interval: str = None) -> pd.DataFram
     rows = run_query(sql, params=params, fetchall=True)
     return pd.DataFrame(rows)
 
+def _replay_where(stock=None, interval=None, start=None, end=None, require_reward: bool = False):
+    conditions, params = [], {}
+    if stock:
+        conditions.append("stock = :stock"); params["stock"] = stock
+    if interval:
+        conditions.append("interval = :interval"); params["interval"] = interval
+    if start is not None:
+        conditions.append("date >= :start"); params["start"] = pd.to_datetime(start).date()
+    if end is not None:
+        conditions.append("date <= :end"); params["end"] = pd.to_datetime(end).date()
+    if require_reward:
+        conditions.append("reward IS NOT NULL")
+    return (" WHERE " + " AND ".join(conditions) if conditions else ""), params
+
+
+def _replay_order(table_name: str, columns) -> str:
+    if table_name == REPLAY_TABLE and (not columns or "inserted_at" in columns):
+        return "date, inserted_at"
+    return "date"
+
+
+def sample_replay_episodes(
+    n: int,
+    stock: str = None,
+    interval: str = None,
+    start=None,
+    end=None,
+    recency_half_life_days: float = None,
+    require_reward: bool = False,
+    columns: list = None,
+    seed: float = None,
+    table_name: str = REPLAY_TABLE,
+) -> pd.DataFrame:
+    """
+    Random sample of at most ``n`` episodes, drawn in Postgres.
+
+    Uniform by default. With ``recency_half_life_days`` an episode's weight
+    halves every that many days before ``end`` (or today), sampled without
+    replacement with Efraimidis–Spirakis keys. Only the sampled rows travel to
+    the client; the result is ordered by date (then insertion time) like
+    ``load_replay_episodes``. ``seed`` (-1..1) makes the draw repeatable.
+    """
+    flush_replay_writer(table_name)
+    where, params = _replay_where(stock, interval, start, end, require_reward)
+    params["n"] = int(n)
+
+    if recency_half_life_days:
+        params["ref_date"] = pd.to_datetime(end).date() if end is not None else datetime.now().date()
+        params["half_life"] = float(recency_half_life_days)
+        # key = Exp(1) / weight; weight = 2^(-age / half_life), clamped to stay in float range
+        order = "-LN(1 - random()) * EXP(LEAST((:ref_date - CAST(date AS DATE)) * LN(2) / :half_life, 700))"
+    else:
+        order = "random()"
+
+    cols = ", ".join(columns) if columns else "*"
+    sql = f"""
+    SELECT * FROM (
+        SELECT {cols} FROM {table_name}{where}
+        ORDER BY {order}
+        LIMIT :n
+    ) s
+    ORDER BY {_replay_order(table_name, columns)}
+    """
+    with engine.connect() as conn:
+        if seed is not None:
+            conn.execute(text("SELECT setseed(:seed)"), {"seed": float(seed)})
+        result = conn.execute(text(sql), params)
+        return pd.DataFrame(result.fetchall(), columns=list(result.keys()))
+
+
+def iter_replay_episodes(
+    batch_size: int = 10_000,
+    stock: str = None,
+    interval: str = None,
+    start=None,
+    end=None,
+    require_reward: bool = False,
+    columns: list = None,
+    table_name: str = REPLAY_TABLE,
+):
+    """
+    Stream the (filtered) buffer in DataFrames of ``batch_size`` rows through
+    a server-side cursor, so memory stays flat however large the table is.
+    """
+    flush_replay_writer(table_name)
+    where, params = _replay_where(stock, interval, start, end, require_reward)
+    cols = ", ".join(columns) if columns else "*"
+    sql = f"SELECT {cols} FROM {table_name}{where} ORDER BY {_replay_order(table_name, columns)}"
+
+    with engine.connect() as conn:
+        result = conn.execution_options(yield_per=batch_size).execute(text(sql), params)
+        keys = list(result.keys())
+        for rows in result.partitions():
+            yield pd.DataFrame(rows, columns=keys)
+
+
 def count_by_stock() -> pd.DataFrame:
     """
     Return DataFrame of episode counts grouped by stock.
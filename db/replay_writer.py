@@ -0,0 +1,320 @@
+# db/replay_writer.py
+
+"""
+Buffered, crash-safe writer for ``rl_replay_buffer``.
+
+Episodes are appended to a local JSONL spool and an in-memory batch. A
+background thread flushes the batch every ``flush_interval`` seconds, or as
+soon as ``flush_size`` episodes are waiting, with one COPY-based insert
+(``db.bulk_loader.copy_upsert``). ``flush()`` also runs at process exit.
+
+Exactly-once delivery:
+
+* each episode gets an ``episode_id`` (UUID) when it is enqueued, and the
+  table has a unique index on it (``scripts/migrate_replay_episode_id.py``),
+  so re-sending a batch is a no-op;
+* a spool file is deleted only after its batch has committed, and spools left
+  behind by a dead process are re-sent by the next writer that starts.
+
+After ``fork`` the child drops the writers it inherited (their thread is gone
+and their rows and spool belong to the parent) and starts fresh ones on first
+use.
+
+A batch whose rows the database rejects is bisected down to the offending rows,
+which go to ``<spool_dir>/dead/`` so later batches still commit.
+"""
+
+import atexit
+import json
+import math
+import multiprocessing.util
+import os
+import threading
+import time
+import uuid
+from datetime import date, datetime
+from pathlib import Path
+from typing import List, Optional
+
+import pandas as pd
+import psycopg2
+
+from core.config.config import settings
+from core.logger.logger import logger
+from db.bulk_loader import copy_upsert
+
+REPLAY_TABLE = "rl_replay_buffer"
+REPLAY_COLUMNS = [
+    "episode_id", "stock", "date", "interval", "action", "reward",
+    "features", "strategy_config", "inserted_at",
+]
+JSON_COLUMNS = ("features", "strategy_config")
+
+
+def _json_default(value):
+    if isinstance(value, (datetime, date, pd.Timestamp)):
+        return value.isoformat()
+    if hasattr(value, "tolist"):  # numpy scalars and arrays
+        return value.tolist()
+    return str(value)
+
+
+def _finite(value):
+    """Replace NaN/inf (rejected by JSONB) with None, recursively."""
+    if isinstance(value, float):
+        return value if math.isfinite(value) else None
+    if isinstance(value, dict):
+        return {k: _finite(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_finite(v) for v in value]
+    if hasattr(value, "tolist") and not isinstance(value, (str, bytes)):
+        return _finite(value.tolist())
+    return value
+
+
+def _to_jsonb(value) -> str:
+    if isinstance(value, str):
+        try:
+            value = json.loads(value)
+        except ValueError:
+            return value
+    return json.dumps(_finite(value), default=_json_default, allow_nan=False)
+
+
+def _to_row(episode: dict) -> dict:
+    row = {col: episode.get(col) for col in REPLAY_COLUMNS}
+    row["episode_id"] = row["episode_id"] or str(uuid.uuid4())
+    row["inserted_at"] = row["inserted_at"] or datetime.now()
+    for col in JSON_COLUMNS:
+        if row[col] is not None:
+            row[col] = _to_jsonb(row[col])
+    for col in ("date", "inserted_at"):
+        if isinstance(row[col], (datetime, date, pd.Timestamp)):
+            row[col] = row[col].isoformat()
+    if hasattr(row["reward"], "item"):
+        row["reward"] = row["reward"].item()
+    if hasattr(row["action"], "item"):
+        row["action"] = row["action"].item()
+    return row
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class ReplayBatchWriter:
+    def __init__(
+        self,
+        table_name: str = REPLAY_TABLE,
+        flush_size: Optional[int] = None,
+        flush_interval: Optional[float] = None,
+        spool_dir: Optional[Path] = None,
+    ):
+        self.table_name = table_name
+        self.flush_size = flush_size or settings.replay_flush_size
+        self.flush_interval = flush_interval or settings.replay_flush_interval
+        self.spool_dir = Path(spool_dir or settings.replay_spool_dir) / table_name
+        self.spool_dir.mkdir(parents=True, exist_ok=True)
+        self.dead_dir = self.spool_dir / "dead"
+
+        self._lock = threading.Lock()          # guards _pending / spool file
+        self._flush_lock = threading.Lock()    # one flush at a time
+        self._pending: List[dict] = []
+        self._sealed: List[tuple] = []         # (spool path, rows) awaiting commit
+        self._spool = None
+        self._spool_path = None
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self.flushed = 0
+        self.flushes = 0
+        self.dead_lettered = 0
+
+        self._recover_spools()
+        self._open_spool()
+        self._thread = threading.Thread(target=self._run, name=f"replay-writer-{table_name}", daemon=True)
+        self._thread.start()
+
+    # ─── spool ──────────────────────────────────────────────
+    def _open_spool(self):
+        self._spool_path = self.spool_dir / f"{os.getpid()}-{uuid.uuid4().hex}.jsonl"
+        self._spool = open(self._spool_path, "a", encoding="utf-8")
+
+    def _recover_spools(self):
+        for path in sorted(self.spool_dir.glob("*.jsonl")):
+            pid = int(path.name.split("-", 1)[0])
+            if pid != os.getpid() and _pid_alive(pid):
+                continue
+            rows = []
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        rows.append(json.loads(line))
+                    except json.JSONDecodeError:
+                        break  # torn final line from a crash mid-write
+            self._sealed.append((path, rows))
+            logger.info(f"♻️ Recovered {len(rows)} unflushed replay episodes from {path.name}")
+
+    # ─── public API ─────────────────────────────────────────
+    def enqueue(self, episode: dict) -> str:
+        row = _to_row(episode)
+        with self._lock:
+            self._spool.write(json.dumps(row) + "\n")
+            self._spool.flush()
+            self._pending.append(row)
+            full = len(self._pending) >= self.flush_size
+        if full:
+            self._wake.set()
+        return row["episode_id"]
+
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._pending) + sum(len(rows) for _, rows in self._sealed)
+
+    def flush(self) -> int:
+        """Write everything enqueued so far; returns rows newly inserted."""
+        with self._flush_lock:
+            with self._lock:
+                if self._pending:
+                    self._spool.close()
+                    self._sealed.append((self._spool_path, self._pending))
+                    self._pending = []
+                    self._open_spool()
+                batches = list(self._sealed)
+
+            if not batches:
+                return 0
+
+            inserted = 0
+            for path, rows in batches:
+                if rows:
+                    inserted += self._write_batch(rows)
+                with self._lock:
+                    self._sealed.pop(0)  # batches commit in seal order under _flush_lock
+                path.unlink(missing_ok=True)
+
+            self.flushed += inserted
+            self.flushes += 1
+            return inserted
+
+    def close(self):
+        self._stop.set()
+        self._wake.set()
+        try:
+            self.flush()
+        except Exception as e:
+            logger.error(f"❌ Final replay flush failed; episodes stay spooled for recovery: {e}")
+        with self._lock:
+            if self._spool and not self._spool.closed:
+                self._spool.close()
+            if self._spool_path and self._spool_path.exists() and self._spool_path.stat().st_size == 0:
+                self._spool_path.unlink()
+
+    def stats(self) -> dict:
+        return {
+            "flushed": self.flushed,
+            "flushes": self.flushes,
+            "pending": self.pending(),
+            "dead_lettered": self.dead_lettered,
+        }
+
+    # ─── internals ──────────────────────────────────────────
+    def _detach(self):
+        """Forget parent-owned state in a forked child so ``close`` is a no-op."""
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._pending = []
+        self._sealed = []
+        self._spool = None
+        self._spool_path = None
+        self._stop.set()
+
+    def _copy(self, rows: List[dict]) -> int:
+        df = pd.DataFrame(rows, columns=REPLAY_COLUMNS)
+        return copy_upsert(df, self.table_name, key_cols=["episode_id"], columns=REPLAY_COLUMNS)
+
+    def _write_batch(self, rows: List[dict]) -> int:
+        """
+        COPY ``rows``; if the database rejects their contents, bisect until the
+        bad rows are isolated and dead-letter those. Any other error (database
+        unreachable, schema not migrated) re-raises, so the batch stays sealed
+        and is retried as a whole.
+        """
+        try:
+            return self._copy(rows)
+        except (psycopg2.DataError, psycopg2.IntegrityError) as e:
+            if len(rows) == 1:
+                self._dead_letter(rows, e)
+                return 0
+        mid = len(rows) // 2
+        return self._write_batch(rows[:mid]) + self._write_batch(rows[mid:])
+
+    def _dead_letter(self, rows: List[dict], error: Exception):
+        self.dead_dir.mkdir(parents=True, exist_ok=True)
+        path = self.dead_dir / f"{os.getpid()}-{uuid.uuid4().hex}.jsonl"
+        with open(path, "w", encoding="utf-8") as f:
+            for row in rows:
+                f.write(json.dumps(row, default=_json_default) + "\n")
+        self.dead_lettered += len(rows)
+        logger.error(f"☠️ {len(rows)} replay episodes rejected by {self.table_name}; moved to {path}: {error}")
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            if self._stop.is_set():
+                break
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"❌ Replay flush failed, will retry: {e}")
+                time.sleep(min(self.flush_interval, 5))
+
+
+_writers = {}
+_writers_lock = threading.Lock()
+
+
+def get_replay_writer(table_name: str = REPLAY_TABLE) -> ReplayBatchWriter:
+    """Process-wide writer for ``table_name``; flushed automatically at exit."""
+    with _writers_lock:
+        writer = _writers.get(table_name)
+        if writer is None:
+            writer = _writers[table_name] = ReplayBatchWriter(table_name)
+            atexit.register(writer.close)
+            # multiprocessing children skip atexit; their finalizers still run
+            multiprocessing.util.Finalize(writer, writer.close, exitpriority=10)
+        return writer
+
+
+def _reset_after_fork():
+    global _writers_lock
+    _writers_lock = threading.Lock()
+    for writer in _writers.values():
+        writer._detach()
+    _writers.clear()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def flush_replay_writer(table_name: str = REPLAY_TABLE) -> int:
+    """
+    Flush the process writer if one exists (readers call this for
+    read-your-writes). Errors are logged, not raised: episodes stay spooled
+    and the read proceeds against what has committed.
+    """
+    writer = _writers.get(table_name)
+    if writer is None:
+        return 0
+    try:
+        return writer.flush()
+    except Exception as e:
+        logger.error(f"❌ Replay flush before read failed; reading committed rows only: {e}")
+        return 0
@@ -6,12 +6,24 @@ from core.logger.logger import logger
 from core.time_context.time_context import get_simulation_date
 from core.data_provider.data_provider import fetch_stock_data, save_data
 from core.feature_engineering.feature_enricher_multi import enrich_multi_interval_features
+from core.feature_engineering.incremental_features import update_features_incremental
 from core.notifications.redis_notifier import push_feature_ready
 from db.postgres_manager import get_all_symbols
 
 LOOKBACK_MINUTES = 30
 INTERVAL = "minute"
 
+@task
+def backfill_incremental_for_symbol(symbol: str):
+    log = get_run_logger()
+    try:
+        df = update_features_incremental(symbol, INTERVAL)
+        if not df.empty:
+            push_feature_ready(symbol, queue="feature_ready_1m")
+            log.info(f"✅ Appended {len(df)} {INTERVAL} feature rows for {symbol}")
+    except Exception as e:
+        log.error(f"❌ Incremental backfill failed for {symbol}: {e}")
+
 @task
 def backfill_for_symbol(symbol: str, lookback_minutes: int = 30):
     log = get_run_logger()
@@ -40,10 +52,13 @@ def backfill_for_symbol(symbol: str, lookback_minutes: int = 30):
         log.error(f"❌ Backfill failed for {symbol}: {e}")
 
 @flow(name="backfill-1m-feature-flow")
-def backfill_1m_feature_flow():
+def backfill_1m_feature_flow(incremental: bool = True):
     symbols = get_all_symbols()
     for symbol in symbols:
-        backfill_for_symbol(symbol, lookback_minutes=LOOKBACK_MINUTES)
+        if incremental:
+            backfill_incremental_for_symbol(symbol)
+        else:
+            backfill_for_symbol(symbol, lookback_minutes=LOOKBACK_MINUTES)
 
 if __name__ == "__main__":
     backfill_1m_feature_flow()
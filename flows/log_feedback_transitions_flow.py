@@ -2,28 +2,14 @@
 
 from prefect import flow
 from core.logger.logger import logger
-from core.event_bus import subscribe_to_events
-from db.replay_buffer_sql import SQLReplayBuffer
+from core.event_bus import run_group_workers
+from db.replay_buffer_sql import SQLReplayBuffer, store_trade_close_batch, trade_close_episode
 
 def handle_trade_close(event):
-    if event.get("event_type") != "TRADE_CLOSE":
-        return
-
     try:
-        episode = {
-            "stock": event["symbol"],
-            "date": event["timestamp"][:10],
-            "features": {},
-            "action": 1,
-            "reward": float(event.get("reward", 0)),
-            "interval": event.get("interval", "day"),
-            "strategy_config": event.get("strategy_config", {}),
-            "done": True,
-            "missed_pnl": float(event.get("missed_pnl", 0)),
-            "holding_cost": float(event.get("holding_cost", 0)),
-            "slippage_penalty": float(event.get("slippage_penalty", 0)),
-            "capital_efficiency": float(event.get("capital_efficiency", 0)),
-        }
+        episode = trade_close_episode(event)
+        if episode is None:
+            return
 
         SQLReplayBuffer()._insert_episode(episode)
         logger.info(f"[FEEDBACK FLOW] Stored replay for {episode['stock']}")
@@ -31,10 +17,13 @@ def handle_trade_close(event):
     except Exception as e:
         logger.error(f"[FEEDBACK FLOW] Failed to store feedback: {e}")
 
+def handle_trade_closes(events):
+    store_trade_close_batch(events, "FEEDBACK FLOW")
+
 @flow(name="Log Trade Feedback", log_prints=True)
 def feedback_logger_flow():
     logger.info("[FEEDBACK FLOW] Listening to events...")
-    subscribe_to_events(handle_trade_close)
+    run_group_workers("feedback_flow", handle_trade_closes)
 
 if __name__ == "__main__":
     feedback_logger_flow()
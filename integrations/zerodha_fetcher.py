@@ -9,8 +9,9 @@ from core.logger.logger import logger
 from dateutil.parser import parse
 from utils.time_utils import to_naive_utc
 from db.postgres_manager import run_query
+from core.config.config import settings
+from utils.cache import TTLTableCache
 
-_instruments_cache = None
 
 INTERVAL_LIMIT_DAYS = {
     "minute": 60,
@@ -113,20 +114,21 @@ def fetch_historical_data(symbol, interval="day", start=None, end=None, days=365
     return None
 
 
+def _load_instrument_tokens() -> dict:
+    # Same pick as the old per-symbol query: highest last_price per tradingsymbol
+    rows = run_query("""
+        SELECT DISTINCT ON (tradingsymbol) tradingsymbol, instrument_token
+        FROM instruments
+        ORDER BY tradingsymbol, last_price DESC
+    """) or []
+    return {row[0]: int(row[1]) for row in rows}
+
+
+_instruments_cache = TTLTableCache("instrument_tokens", _load_instrument_tokens, ttl=settings.instrument_cache_ttl)
+
+
 def get_instrument_token(symbol):
-    query = f"""
-        SELECT instrument_token FROM instruments
-        WHERE tradingsymbol = '{symbol}'
-        ORDER BY last_price DESC
-        LIMIT 1;
-    """
-    result = run_query(query)
-
-    if isinstance(result, list) and result:
-        return int(result[0][0])
-    elif hasattr(result, 'empty') and not result.empty:
-        return int(result['instrument_token'].iloc[0])
-    return None
+    return _instruments_cache.get(symbol)
 
 
 def main():
@@ -9,6 +9,7 @@ from core.data_provider.data_provider import load_data, save_data
 from db.postgres_manager import run_query
 from core.logger.logger import logger
 from core.config.config import settings
+from core.model_pool import get_file_model
 
 FEATURE_TABLE = "stock_features_day"
 PREDICTION_TABLE = settings.tables.predictions["filter"]
@@ -46,8 +47,7 @@ def run_stock_filter(as_of: datetime = None, lookback_only: bool = False):
         return settings.fallback_stocks or []
 
     try:
-        model = joblib.load(MODEL_PATH)
-        logger.info(f"📦 Loaded filter model from {MODEL_PATH}")
+        model = get_file_model(MODEL_PATH, joblib.load)
     except Exception as e:
         logger.error(f"❌ Model load failed: {e}")
         logger.warning(f"🔙 Using fallback stocks: {settings.fallback_stocks}")
@@ -19,27 +19,44 @@ class OfflineEnv(Env):
     Each row contains: state, action, reward, next_state, and done.
     Adds inferred next_state, done flag, episode_id, step_count, and metadata.
     Applies reward shaping based on metadata and logs shaped vs raw rewards.
+
+    Pass ``dataset`` (an ``rl.offline_dataset.OfflineDataset``) instead of a
+    DataFrame to serve transitions straight from its typed arrays.
     """
 
-    def __init__(self, episodes_df):
+    def __init__(self, episodes_df=None, dataset=None):
         super().__init__()
-        self.episodes = self._prepare_episodes(episodes_df.reset_index(drop=True))
+        if (episodes_df is None) == (dataset is None):
+            raise ValueError("Pass exactly one of episodes_df or dataset")
+        self.dataset = dataset
+        self.episodes = None
         self.idx = 0
 
-        # Set observation and action space based on first row
-        sample_state = np.array(self.episodes.iloc[0]["state"])
-        self.observation_space = Box(low=-np.inf, high=np.inf, shape=sample_state.shape, dtype=np.float32)
+        if dataset is not None:
+            if not len(dataset):
+                raise ValueError("Offline dataset is empty")
+            obs_shape = dataset.state.shape[1:]
+        else:
+            self.episodes = self._prepare_episodes(episodes_df.reset_index(drop=True))
+            # Set observation and action space based on first row
+            obs_shape = np.array(self.episodes.iloc[0]["state"]).shape
+        self.observation_space = Box(low=-np.inf, high=np.inf, shape=obs_shape, dtype=np.float32)
         self.action_space = Discrete(3)
 
+    @classmethod
+    def from_replay(cls, n=None, **filters):
+        """Build the env from a server-side sample of ``rl_replay_buffer`` (see ``sample_replay_episodes``)."""
+        from core.config.config import settings
+        from db.replay_buffer_sql import sample_replay_episodes
+        return cls(sample_replay_episodes(n or settings.replay_sample_size, **filters))
+
     def _prepare_episodes(self, df):
         df = df.copy()
 
-        # Add unique episode_id per (stock, interval, date)
-        def generate_episode_id(row):
-            key = f"{row['stock']}_{row['interval']}_{row['date']}"
-            return hashlib.md5(key.encode()).hexdigest()
-
-        df["episode_id"] = df.apply(generate_episode_id, axis=1)
+        # Add unique episode_id per (stock, interval, date), hashing each key once
+        keys = df["stock"].astype(str) + "_" + df["interval"].astype(str) + "_" + df["date"].astype(str)
+        ids = {key: hashlib.md5(key.encode()).hexdigest() for key in keys.unique()}
+        df["episode_id"] = keys.map(ids)
 
         # Ensure 'done' flag is set for last in each group
         if "done" not in df.columns:
@@ -64,6 +81,8 @@ class OfflineEnv(Env):
     def reset(self, *, seed=None, options=None):
         super().reset(seed=seed)
         self.idx = 0
+        if self.dataset is not None:
+            return np.array(self.dataset.state[0]), {}
         state = np.array(self.episodes.iloc[self.idx]["state"])
         return state, {}
 
@@ -82,16 +101,29 @@ class OfflineEnv(Env):
 
         return reward
 
+    def _dataset_row(self, i):
+        ds, manifest = self.dataset, self.dataset.manifest
+        return {
+            "reward": float(ds.reward[i]),
+            "next_state": ds.next_state[i],
+            "done": bool(ds.done[i]),
+            "step_count": int(ds.step_count[i]),
+            "episode_id": manifest["episode_ids"][ds.episode[i]],
+            "stock": manifest["stocks"][ds.stock[i]],
+            "interval": manifest["intervals"][ds.interval[i]],
+        }
+
     def step(self, action):
-        row = self.episodes.iloc[self.idx]
+        row = self._dataset_row(self.idx) if self.dataset is not None else self.episodes.iloc[self.idx]
+        n_rows = len(self.dataset) if self.dataset is not None else len(self.episodes)
         next_state = np.array(row["next_state"])
-        done = bool(row.get("done", self.idx >= len(self.episodes) - 1))
+        done = bool(row.get("done", self.idx >= n_rows - 1))
 
         raw_reward = row["reward"]
         shaped_reward = self._calculate_shaped_reward(row)
 
         # Log raw vs shaped reward
-        logger.info(f"Episode {row.get('episode_id')} Step {row.get('step_count')}: Raw={raw_reward:.4f}, Shaped={shaped_reward:.4f}")
+        logger.debug(f"Episode {row.get('episode_id')} Step {row.get('step_count')}: Raw={raw_reward:.4f}, Shaped={shaped_reward:.4f}")
 
         self.idx += 1
         return next_state, shaped_reward, done, False, {
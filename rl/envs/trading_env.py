@@ -1,6 +1,7 @@
 import gymnasium as gym
 import numpy as np
 from gymnasium import spaces
+from numpy.lib.stride_tricks import sliding_window_view
 from datetime import datetime
 from core.model_io import save_model  # centralized model saving
 from core.model_io import load_model, load_latest_model
@@ -13,6 +14,10 @@ class TradingEnv(gym.Env):
     """
     A trading environment supporting long and short positions with reward shaping,
     drawdown penalties, max holding logic, and episodic control.
+
+    The frame is converted once to a contiguous float32 matrix; observations
+    are copied from a zero-copy ``sliding_window_view`` of it into a
+    preallocated buffer instead of slicing the DataFrame on every step.
     """
 
     def __init__(
@@ -29,7 +34,6 @@ class TradingEnv(gym.Env):
         penalty_weight: float = 0.1,
     ):
         super().__init__()
-        self.df = df.astype(np.float32)
         self.window = window
         self.fee = fee_pct
         self.init_cash = cash
@@ -41,24 +45,40 @@ class TradingEnv(gym.Env):
         self.penalty_weight = penalty_weight
 
         self.start_idx = window
-        self.end_idx = len(df) - 1
+        self._set_frame(df)
 
         self.action_space = spaces.Discrete(3)
         obs_size = window * df.shape[1] + 3  # cash, position, holding_days
         self.observation_space = spaces.Box(
             low=-np.inf, high=np.inf, shape=(obs_size,), dtype=np.float32
         )
+        self._obs = np.empty(obs_size, dtype=np.float32)
+        self._obs_window = self._obs[:-3].reshape(window, df.shape[1])
 
         self.reset()
 
+    def _set_frame(self, df):
+        """Point the env at ``df`` (float32 frames, e.g. shared-memory views, are used without a copy)."""
+        if len(df) < self.window:
+            raise ValueError(f"Need at least {self.window} rows for a {self.window}-bar window, got {len(df)}")
+        self.df = df.astype(np.float32, copy=False)
+        self.end_idx = len(df) - 1
+        self._data = np.ascontiguousarray(self.df.to_numpy(dtype=np.float32))
+        # windows[i] holds rows i .. i + window - 1 as (columns, window)
+        self._windows = sliding_window_view(self._data, self.window, axis=0)
+        self._close = self._data[:, self.df.columns.get_loc("close")] if "close" in self.df.columns else None
+        # Non-finite rows before each index, so a window is checked in O(1)
+        self._bad_rows = np.concatenate([[0], np.cumsum(~np.isfinite(self._data).all(axis=1))])
+
     def _get_obs(self):
-        window_data = self.df.iloc[self.idx - self.window:self.idx].values.flatten()
-        obs = np.append(window_data, [self.cash, self.position, self.holding_days]).astype(np.float32)
+        start = self.idx - self.window
+        self._obs_window[...] = self._windows[start].T
+        self._obs[-3:] = (self.cash, self.position, self.holding_days)
 
-        if not np.all(np.isfinite(obs)):
-            raise ValueError(f"🧨 NaN or inf in observation at idx={self.idx}: {obs}")
+        if self._bad_rows[self.idx] != self._bad_rows[start] or not np.isfinite(self._obs[-3:]).all():
+            raise ValueError(f"🧨 NaN or inf in observation at idx={self.idx}: {self._obs}")
 
-        return obs
+        return self._obs.copy()  # callers may keep observations across steps
 
     def reset(self, *, seed=None, options=None):
         super().reset(seed=seed)
@@ -90,7 +110,9 @@ class TradingEnv(gym.Env):
         return net_reward
 
     def step(self, action):
-        price = self.df.iloc[self.idx]["close"]
+        if self._close is None:
+            raise KeyError("close")
+        price = self._close[self.idx]
         reward = 0
 
         # ========== LONG & SHORT LOGIC ==========
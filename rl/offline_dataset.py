@@ -0,0 +1,178 @@
+# rl/offline_dataset.py
+
+"""
+Columnar export of ``rl_replay_buffer`` for offline RL.
+
+Layout::
+
+    <path>/manifest.json     feature columns, stock/interval/episode vocabularies, row count
+    <path>/<array>.npy       one typed array per field (see ``ARRAYS``)
+
+``build_offline_dataset`` streams the buffer once (``iter_replay_episodes``),
+parses the JSON features into a dense float32 ``state`` matrix whose columns
+are fixed by the manifest, and derives ``next_state``/``done``/``step_count``
+with the same episode rules as ``OfflineEnv`` (an episode is one
+``(stock, interval, date)``). ``OfflineDataset.load`` memory-maps the arrays,
+and ``minibatches`` yields shuffled index batches for offline policy training.
+
+    python -m rl.offline_dataset --out cache/offline_rl --interval day
+"""
+
+import argparse
+import hashlib
+import json
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from core.logger.logger import logger
+
+ARRAYS = {
+    "state": np.float32,
+    "next_state": np.float32,
+    "action": np.int8,
+    "reward": np.float64,
+    "done": np.bool_,
+    "step_count": np.int32,
+    "episode": np.int32,     # index into manifest["episode_ids"]
+    "stock": np.int32,       # index into manifest["stocks"]
+    "interval": np.int16,    # index into manifest["intervals"]
+    "date": "datetime64[D]",
+}
+
+
+def _parse_features(value) -> dict:
+    if isinstance(value, str):
+        return json.loads(value)
+    return value or {}
+
+
+def episode_structure(episode: np.ndarray) -> tuple:
+    """
+    ``(done, step_count)`` for rows tagged with episode codes, in row order:
+    ``done`` marks each episode's last row, ``step_count`` counts rows within it.
+    """
+    n = len(episode)
+    order = np.argsort(episode, kind="stable")
+    sorted_ep = episode[order]
+    starts = np.r_[True, sorted_ep[1:] != sorted_ep[:-1]]
+    ends = np.r_[starts[1:], True]
+
+    first = np.maximum.accumulate(np.where(starts, np.arange(n), 0))
+    step_count = np.empty(n, dtype=np.int32)
+    step_count[order] = np.arange(n) - first
+    done = np.zeros(n, dtype=bool)
+    done[order[ends]] = True
+    return done, step_count
+
+
+def build_offline_dataset(path, batch_size: int = 10_000, **filters) -> "OfflineDataset":
+    """Export the (filtered) replay buffer to ``path``; ``filters`` as in ``iter_replay_episodes``."""
+    from db.replay_buffer_sql import iter_replay_episodes
+
+    columns: Optional[List[str]] = None
+    vocab: Dict[str, Dict[str, int]] = {"stocks": {}, "intervals": {}, "episode_keys": {}}
+    parts: Dict[str, list] = {k: [] for k in ("state", "action", "reward", "episode", "stock", "interval", "date")}
+
+    for batch in iter_replay_episodes(batch_size, **filters):
+        batch = batch.dropna(subset=["features", "reward"])
+        if batch.empty:
+            continue
+        features = pd.DataFrame.from_records([_parse_features(f) for f in batch["features"]])
+        if columns is None:
+            columns = list(features.columns)
+            logger.info(f"📐 Offline dataset feature columns: {columns}")
+        state = features.reindex(columns=columns).apply(pd.to_numeric, errors="coerce")
+
+        stocks = batch["stock"].astype(str).to_numpy()
+        intervals = batch["interval"].astype(str).to_numpy()
+        dates = pd.to_datetime(batch["date"]).dt.date.astype(str).to_numpy()
+        episode_keys = [f"{s}_{i}_{d}" for s, i, d in zip(stocks, intervals, dates)]
+
+        parts["state"].append(state.to_numpy(dtype=np.float32))
+        parts["action"].append(batch["action"].fillna(-1).to_numpy())  # -1: no action recorded
+        parts["reward"].append(batch["reward"].to_numpy())
+        parts["stock"].append([vocab["stocks"].setdefault(s, len(vocab["stocks"])) for s in stocks])
+        parts["interval"].append([vocab["intervals"].setdefault(i, len(vocab["intervals"])) for i in intervals])
+        parts["episode"].append([vocab["episode_keys"].setdefault(k, len(vocab["episode_keys"])) for k in episode_keys])
+        parts["date"].append(dates.astype("datetime64[D]"))
+
+    if columns is None:
+        raise ValueError("No replay episodes with features and reward to export")
+
+    arrays = {k: np.concatenate([np.asarray(p) for p in v]).astype(ARRAYS[k]) for k, v in parts.items()}
+    arrays["done"], arrays["step_count"] = episode_structure(arrays["episode"])
+    arrays["next_state"] = np.roll(arrays["state"], -1, axis=0)
+    arrays["next_state"][arrays["done"]] = arrays["state"][arrays["done"]]
+
+    path = Path(path)
+    path.mkdir(parents=True, exist_ok=True)
+    for name, dtype in ARRAYS.items():
+        np.save(path / f"{name}.npy", arrays[name].astype(dtype, copy=False))
+
+    manifest = {
+        "rows": int(len(arrays["reward"])),
+        "feature_columns": columns,
+        "stocks": list(vocab["stocks"]),
+        "intervals": list(vocab["intervals"]),
+        # md5 of "<stock>_<interval>_<date>", the episode id OfflineEnv reports
+        "episode_ids": [hashlib.md5(k.encode()).hexdigest() for k in vocab["episode_keys"]],
+        "filters": {k: str(v) for k, v in filters.items() if v is not None},
+    }
+    (path / "manifest.json").write_text(json.dumps(manifest, indent=2))
+    logger.success(f"💾 Offline dataset: {manifest['rows']} transitions × {len(columns)} features → {path}")
+    return OfflineDataset.load(path)
+
+
+class OfflineDataset:
+    def __init__(self, arrays: Dict[str, np.ndarray], manifest: dict):
+        self.arrays = arrays
+        self.manifest = manifest
+        for name, arr in arrays.items():
+            setattr(self, name, arr)
+
+    @classmethod
+    def load(cls, path, mmap: bool = True) -> "OfflineDataset":
+        path = Path(path)
+        manifest = json.loads((path / "manifest.json").read_text())
+        arrays = {name: np.load(path / f"{name}.npy", mmap_mode="r" if mmap else None) for name in ARRAYS}
+        return cls(arrays, manifest)
+
+    def __len__(self) -> int:
+        return self.manifest["rows"]
+
+    @property
+    def feature_columns(self) -> List[str]:
+        return self.manifest["feature_columns"]
+
+    def minibatches(
+        self,
+        batch_size: int,
+        shuffle: bool = True,
+        seed: Optional[int] = None,
+        drop_last: bool = False,
+        fields=("state", "action", "reward", "next_state", "done"),
+    ) -> Iterator[Dict[str, np.ndarray]]:
+        """One pass over the dataset in ``batch_size`` batches of ``fields`` (in-memory copies)."""
+        n = len(self)
+        order = np.random.default_rng(seed).permutation(n) if shuffle else np.arange(n)
+        stop = n - n % batch_size if drop_last else n
+        for i in range(0, stop, batch_size):
+            idx = np.sort(order[i:i + batch_size])  # sorted gathers read memory-mapped files sequentially
+            yield {name: np.asarray(self.arrays[name][idx]) for name in fields}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export rl_replay_buffer to a columnar offline RL dataset")
+    parser.add_argument("--out", required=True)
+    parser.add_argument("--stock", default=None)
+    parser.add_argument("--interval", default=None)
+    parser.add_argument("--start", default=None)
+    parser.add_argument("--end", default=None)
+    parser.add_argument("--batch-size", type=int, default=10_000)
+    args = parser.parse_args()
+
+    build_offline_dataset(args.out, args.batch_size, stock=args.stock, interval=args.interval,
+                          start=args.start, end=args.end)
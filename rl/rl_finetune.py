@@ -4,7 +4,7 @@ from datetime import datetime
 from stable_baselines3 import PPO
 from stable_baselines3.common.vec_env import DummyVecEnv
 from rl.envs.trading_env import TradingEnv
-from db.replay_buffer_sql import load_replay_episodes
+from db.replay_buffer_sql import sample_replay_episodes
 from core.model_io import save_model, load_model, load_latest_model
 from core.logger.logger import logger
 from core.config.config import settings
@@ -31,7 +31,10 @@ class OfflineEnv:
 def finetune_rl(model_name=None, stock=None, interval=None, steps=5000):
     logger.start("🔁 Fine-tuning RL model from replay buffer...")
 
-    episodes_df = load_replay_episodes(stock=stock, interval=interval)
+    episodes_df = sample_replay_episodes(
+        settings.replay_sample_size, stock=stock, interval=interval,
+        recency_half_life_days=settings.replay_recency_half_life_days,
+    )
     if episodes_df is None or len(episodes_df) < 100:
         logger.error("❌ Not enough episodes to fine-tune RL.")
         return
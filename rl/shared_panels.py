@@ -0,0 +1,117 @@
+# rl/shared_panels.py
+
+"""
+Symbol price/feature panels in shared memory for multi-process PPO.
+
+The parent loads every symbol's frame once (``load_rl_frame``) and packs them
+into one ``multiprocessing.shared_memory`` block. Vec-env workers attach to
+the block by name and build ``TradingEnv`` on zero-copy float32 views, so no
+worker touches the database or holds its own copy of the data.
+
+``build_vec_env`` keeps today's layout for ``workers=1`` (one env per symbol
+in a ``DummyVecEnv``). With more workers it starts a ``SubprocVecEnv`` of
+``workers`` envs; each env owns every ``workers``-th symbol and moves to its
+next symbol on every reset.
+"""
+
+import functools
+from multiprocessing import shared_memory
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+from stable_baselines3.common.vec_env import DummyVecEnv, SubprocVecEnv
+
+from rl.envs.trading_env import TradingEnv
+
+
+class SharedPanels:
+    """Owner of the shared block; ``spec`` is what workers need to attach."""
+
+    def __init__(self, frames: Dict[str, pd.DataFrame]):
+        arrays = {s: np.ascontiguousarray(df.to_numpy(dtype=np.float32)) for s, df in frames.items()}
+        total = sum(a.size for a in arrays.values())
+        self._shm = shared_memory.SharedMemory(create=True, size=max(total, 1) * np.dtype(np.float32).itemsize)
+        flat = np.ndarray((total,), dtype=np.float32, buffer=self._shm.buf)
+
+        layout, offset = {}, 0
+        for symbol, arr in arrays.items():
+            flat[offset:offset + arr.size] = arr.ravel()
+            layout[symbol] = (offset, arr.shape, list(frames[symbol].columns))
+            offset += arr.size
+        self.spec = {"name": self._shm.name, "layout": layout}
+
+    def frames(self, symbols: List[str] = None) -> Dict[str, pd.DataFrame]:
+        """Views on the block for use in this process."""
+        return _views(self._shm, self.spec, symbols)
+
+    def close(self):
+        try:
+            self._shm.close()
+        except BufferError:
+            pass  # envs still hold views; the mapping goes away with the process
+        self._shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def attach_panels(spec: dict, symbols: List[str] = None):
+    """
+    Map ``spec``'s block into this process; returns ``(shm, {symbol: frame})``.
+    The frames are read-only views, valid while ``shm`` is referenced.
+    """
+    shm = shared_memory.SharedMemory(name=spec["name"])
+    return shm, _views(shm, spec, symbols)
+
+
+def _views(shm, spec: dict, symbols: List[str] = None) -> Dict[str, pd.DataFrame]:
+    frames = {}
+    for symbol in symbols or list(spec["layout"]):
+        offset, shape, columns = spec["layout"][symbol]
+        arr = np.ndarray(shape, dtype=np.float32, buffer=shm.buf, offset=offset * np.dtype(np.float32).itemsize)
+        arr.flags.writeable = False
+        frames[symbol] = pd.DataFrame(arr, columns=columns, copy=False)
+    return frames
+
+
+class PanelTradingEnv(TradingEnv):
+    """``TradingEnv`` that cycles through several symbols' frames, one per episode."""
+
+    def __init__(self, frames: List[pd.DataFrame], **kwargs):
+        widths = {df.shape[1] for df in frames}
+        if len(widths) != 1:
+            raise ValueError(f"All panels must have the same columns to share an env, got widths {sorted(widths)}")
+        self._frames = frames
+        self._next_frame = 0
+        super().__init__(frames[0], **kwargs)
+        self._next_frame = 0  # the constructor's reset does not count as an episode
+
+    def reset(self, *, seed=None, options=None):
+        self._set_frame(self._frames[self._next_frame % len(self._frames)])
+        self._next_frame += 1
+        return super().reset(seed=seed, options=options)
+
+
+def _make_shared_env(spec: dict, symbols: List[str], env_kwargs: dict):
+    shm, frames = attach_panels(spec, symbols)
+    env = PanelTradingEnv([frames[s] for s in symbols], **env_kwargs)
+    env._shm = shm  # keep the mapping alive as long as the env
+    return env
+
+
+def build_vec_env(panels: SharedPanels, workers: int = 1, **env_kwargs):
+    """Vec env over every symbol in ``panels``; see the module docstring for the layout."""
+    symbols = list(panels.spec["layout"])
+    if workers <= 1:
+        frames = panels.frames()
+        return DummyVecEnv([functools.partial(TradingEnv, frames[s], **env_kwargs) for s in symbols])
+
+    workers = min(workers, len(symbols))
+    return SubprocVecEnv([
+        functools.partial(_make_shared_env, panels.spec, symbols[i::workers], env_kwargs)
+        for i in range(workers)
+    ])
@@ -3,8 +3,7 @@ import argparse
 from datetime import datetime
 import pandas as pd
 from stable_baselines3 import PPO
-from stable_baselines3.common.vec_env import DummyVecEnv
-from rl.envs.trading_env import TradingEnv
+from rl.shared_panels import SharedPanels, build_vec_env
 from core.predict.rl_predictor import load_rl_frame
 from core.model_io import save_model
 from core.logger.logger import logger
@@ -13,13 +12,11 @@ from core.config.config import settings
 def get_symbols(default=True):
     return ["RELIANCE", "TCS", "INFY"] if default else settings.stock_whitelist or []
 
-def make_env(symbol, freq: str):
-    def _env():
-        df = load_rl_frame(symbol, days=1500, interval=freq)
-        if df is None or df.empty or len(df) < 60:
-            raise ValueError(f"❌ Not enough data to train RL for {symbol}")
-        return TradingEnv(df, freq=freq)
-    return _env
+def load_frame(symbol, freq: str):
+    df = load_rl_frame(symbol, days=1500, interval=freq)
+    if df is None or df.empty or len(df) < 60:
+        raise ValueError(f"❌ Not enough data to train RL for {symbol}")
+    return df
 
 def main(args):
     logger.start("🏋️ PPO training for RL agent...")
@@ -27,33 +24,39 @@ def main(args):
     symbols = args.symbols or get_symbols()
     freq = args.freq.lower()
 
-    valid_envs, skipped = [], []
+    frames, skipped = {}, []
     for sym in symbols:
         try:
-            valid_envs.append(make_env(sym, freq))
+            frames[sym] = load_frame(sym, freq)
         except Exception as e:
             logger.warning(f"⚠️ Skipping {sym}: {e}")
             skipped.append(sym)
 
-    if not valid_envs:
+    if not frames:
         logger.error("❌ No valid symbols to train on. Aborting.")
         return
 
-    vec_env = DummyVecEnv(valid_envs)
-
-    model = PPO(
-        "MlpPolicy",
-        vec_env,
-        verbose=1,
-        learning_rate=3e-4,
-        n_steps=2048,
-        batch_size=8192,
-        ent_coef=0.01,
-        tensorboard_log="logs/rl_ppo/"
-    )
-
-    logger.info(f"⏱️ Training PPO for {args.steps:,} timesteps across {len(valid_envs)} stocks...")
-    model.learn(total_timesteps=args.steps)
+    workers = args.workers or settings.rl_train_workers
+    with SharedPanels(frames) as panels:
+        vec_env = build_vec_env(panels, workers=workers, freq=freq)
+        try:
+            model = PPO(
+                "MlpPolicy",
+                vec_env,
+                verbose=1,
+                learning_rate=3e-4,
+                n_steps=2048,
+                batch_size=8192,
+                ent_coef=0.01,
+                seed=settings.random_state,  # env i is seeded with seed + i
+                tensorboard_log="logs/rl_ppo/"
+            )
+
+            logger.info(f"⏱️ Training PPO for {args.steps:,} timesteps across {len(frames)} stocks "
+                        f"on {min(workers, len(frames))} worker(s)...")
+            model.learn(total_timesteps=args.steps)
+        finally:
+            vec_env.close()
 
     now = datetime.now().strftime("%Y%m%d_%H%M%S")
     model_name = args.name or f"{settings.model_names['ppo']}_{freq}_{now}"
@@ -86,6 +89,7 @@ if __name__ == "__main__":
     parser.add_argument("--symbols", nargs="+", default=None, help="Symbols to train on")
     parser.add_argument("--name", type=str, default=None, help="Model save name")
     parser.add_argument("--freq", type=str, default="day", help="Data frequency: 'day', '15m', etc.")
+    parser.add_argument("--workers", type=int, default=None, help="Env worker processes (default: settings.rl_train_workers)")
     args = parser.parse_args()
 
     main(args)
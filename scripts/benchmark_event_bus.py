@@ -0,0 +1,89 @@
+# scripts/benchmark_event_bus.py
+
+"""
+One XADD per event vs the batched, pipelined ``EventPublisher``.
+
+Runs against an in-process fakeredis server by default (``pip install
+fakeredis``), which has no network round trip, so the speed-up shown is a
+lower bound. Pass ``--redis-url`` to measure against a real server. Each
+path writes to its own scratch stream, and the script checks that every
+event arrived. A last run publishes more than ``--maxlen`` events to show
+that ``MAXLEN ~`` keeps the stream bounded.
+
+    python -m scripts.benchmark_event_bus --events 50000 --batch-size 500
+"""
+
+import argparse
+import time
+
+from core.event_bus import EventPublisher, _event_fields
+
+SINGLE_STREAM = "bench_event_stream_single"
+BATCH_STREAM = "bench_event_stream_batched"
+TRIM_STREAM = "bench_event_stream_trim"
+
+
+def make_payload(i: int) -> dict:
+    return {
+        "symbol": f"SYM{i % 500}",
+        "exit_price": 100.0 + i % 17,
+        "reward": (i % 11) - 5.0,
+        "strategy_config": {"exit_rule": {"kind": "fixed_pct", "stop_loss": 0.03}},
+    }
+
+
+def connect(url: str = None):
+    if url:
+        import redis
+        return redis.Redis.from_url(url, decode_responses=True)
+    import fakeredis
+    return fakeredis.FakeRedis(decode_responses=True)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--events", type=int, default=50_000)
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--maxlen", type=int, default=10_000)
+    parser.add_argument("--redis-url", default=None)
+    args = parser.parse_args()
+
+    client = connect(args.redis_url)
+    client.delete(SINGLE_STREAM, BATCH_STREAM, TRIM_STREAM)
+    payloads = [make_payload(i) for i in range(args.events)]
+    try:
+        t0 = time.perf_counter()
+        for p in payloads:
+            client.xadd(SINGLE_STREAM, _event_fields("TRADE_CLOSE", p))
+        t_single = time.perf_counter() - t0
+
+        publisher = EventPublisher(client, stream=BATCH_STREAM, batch_size=args.batch_size,
+                                   flush_interval=3600, maxlen=0)
+        t0 = time.perf_counter()
+        for p in payloads:
+            publisher.publish("TRADE_CLOSE", p)
+        publisher.close()
+        t_batch = time.perf_counter() - t0
+
+        single_rate, batch_rate = args.events / t_single, args.events / t_batch
+        print(f"Single XADD     : {args.events:>8,} events in {t_single:7.2f}s  {single_rate:10,.0f} events/s")
+        print(f"Batched pipeline: {args.events:>8,} events in {t_batch:7.2f}s  {batch_rate:10,.0f} events/s  "
+              f"{publisher.stats()}")
+        print(f"Speed-up        : {batch_rate / single_rate:.1f}×")
+
+        n_single, n_batch = client.xlen(SINGLE_STREAM), client.xlen(BATCH_STREAM)
+        status = "✅" if n_single == n_batch == args.events else "❌"
+        print(f"{status} Delivered     : single {n_single:,}, batched {n_batch:,}")
+
+        trim = EventPublisher(client, stream=TRIM_STREAM, batch_size=args.batch_size,
+                              flush_interval=3600, maxlen=args.maxlen)
+        for p in payloads:
+            trim.publish("TRADE_CLOSE", p)
+        trim.close()
+        print(f"MAXLEN ~{args.maxlen:,}  : {args.events:,} published → {client.xlen(TRIM_STREAM):,} kept")
+    finally:
+        client.delete(SINGLE_STREAM, BATCH_STREAM, TRIM_STREAM)
+
+
+if __name__ == "__main__":
+    main()
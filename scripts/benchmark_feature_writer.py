@@ -0,0 +1,80 @@
+# scripts/benchmark_feature_writer.py
+
+"""
+Row-by-row ``insert_feature_row`` vs COPY-based ``bulk_insert_features``.
+
+Writes the same synthetic feature rows into a scratch copy of
+``stock_features_day`` with both paths (refresh=True, as the backfill does)
+and reports rows/second. The scratch table is dropped afterwards.
+
+    python -m scripts.benchmark_feature_writer --rows 50000
+"""
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import text
+
+from db.db import SessionLocal, engine
+from core.feature_engineering.precompute_features import (
+    FEATURE_TABLE_COLUMNS,
+    REQUIRED_FEATURES,
+    bulk_insert_features,
+    insert_feature_row,
+)
+
+SCRATCH_TABLE = "bench_stock_features"
+
+
+def make_rows(n_rows: int, seed: int = 7) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    n_stocks = max(1, n_rows // 250)
+    df = pd.DataFrame({
+        "stock": np.repeat([f"SYM{i:04d}" for i in range(n_stocks)], 250)[:n_rows],
+        "date": np.tile(pd.date_range("2023-01-01", periods=250, freq="D").date, n_stocks)[:n_rows],
+    })
+    for col in REQUIRED_FEATURES:
+        df[col] = rng.normal(size=len(df))
+    df["stock_encoded"] = rng.integers(0, 10000, len(df))
+    df["volume_spike"] = df["volume_spike"] > 1.0
+    return df[FEATURE_TABLE_COLUMNS]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=20_000)
+    parser.add_argument("--rowwise-rows", type=int, default=5_000, help="Cap for the slow row-by-row path")
+    args = parser.parse_args()
+
+    df = make_rows(args.rows)
+    with engine.begin() as conn:
+        conn.execute(text(f"DROP TABLE IF EXISTS {SCRATCH_TABLE}"))
+        conn.execute(text(f"CREATE TABLE {SCRATCH_TABLE} (LIKE stock_features_day INCLUDING ALL)"))
+
+    try:
+        sample = df.head(args.rowwise_rows)
+        session = SessionLocal()
+        t0 = time.perf_counter()
+        try:
+            for _, row in sample.iterrows():
+                insert_feature_row(session, SCRATCH_TABLE, row.to_dict(), refresh=True)
+            session.commit()
+        finally:
+            session.close()
+        t_row = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        bulk_insert_features(df, SCRATCH_TABLE, refresh=True)
+        t_bulk = time.perf_counter() - t0
+
+        print(f"Row-by-row : {len(sample):>9,} rows in {t_row:7.2f}s  {len(sample) / t_row:12,.0f} rows/s")
+        print(f"COPY bulk  : {len(df):>9,} rows in {t_bulk:7.2f}s  {len(df) / t_bulk:12,.0f} rows/s")
+    finally:
+        with engine.begin() as conn:
+            conn.execute(text(f"DROP TABLE IF EXISTS {SCRATCH_TABLE}"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+# scripts/benchmark_fill_simulator.py
+
+"""
+Per-trade ``simulate_trade_execution`` vs the batched ``simulate_fills``.
+
+Both paths read the same synthetic minute bars, served from memory in place
+of the price store. The bars have random gaps, so every entry rule is used:
+exact bar, 5-minute look-ahead, 30-minute look-back and daily close. Some
+symbols have no bars at all. Timings leave out the per-trade database
+queries, so the speed-up shown is a lower bound.
+
+Checks:
+
+* parity: with the same ``random`` seed, both paths fill the same trades at
+  the same prices, times and rewards;
+* stop/target: trades with an ``exit_rule`` exit where a bar-by-bar scan of
+  the same bars says they should.
+
+    python -m scripts.benchmark_fill_simulator --symbols 300 --trades 2000
+"""
+
+import argparse
+import math
+import random
+import time
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+
+import bootstrap.fill_simulator as fill_simulator
+import bootstrap.simulate_trade_execution as per_trade
+from bootstrap.trade_generator import Trade
+
+DAYS = pd.bdate_range("2024-05-06", periods=5)
+
+
+def make_bars(symbols, rng) -> dict:
+    """Minute bars 03:45–09:59 UTC per symbol and day, with gaps and a few empty symbols."""
+    bars = {}
+    for n, sym in enumerate(symbols):
+        if n % 25 == 0:
+            continue
+        frames = []
+        for day in DAYS:
+            ts = pd.date_range(day + pd.Timedelta("03:45:00"), day + pd.Timedelta("09:59:00"), freq="min")
+            keep = rng.random(len(ts)) > 0.15
+            if rng.random() < 0.3:  # a long outage forces the daily-close fallback
+                gap = rng.integers(0, len(ts) - 60)
+                keep[gap:gap + 60] = False
+            ts = ts[keep]
+            close = 100 * np.exp(np.cumsum(rng.normal(0, 0.002, len(ts))))
+            open_ = close * (1 + rng.normal(0, 0.001, len(ts)))
+            frames.append(pd.DataFrame({
+                "open": open_, "close": close,
+                "high": np.maximum(open_, close) * (1 + rng.uniform(0, 0.002, len(ts))),
+                "low": np.minimum(open_, close) * (1 - rng.uniform(0, 0.002, len(ts))),
+                "volume": rng.integers(100, 10_000, len(ts)),
+            }, index=pd.Index(ts, name="date")))
+        bars[sym] = pd.concat(frames)
+    return bars
+
+
+def install_bars(bars: dict) -> None:
+    """Point both simulators' price reads at ``bars``."""
+    empty = pd.DataFrame()
+
+    def fetch_stock_data(symbol, start=None, end=None, interval=None, days=None):
+        df = bars.get(symbol, empty)
+        first, last = pd.Timestamp(start).normalize(), pd.Timestamp(end).normalize() + pd.Timedelta(days=1)
+        return df.loc[first:last - pd.Timedelta(1)] if not df.empty else df
+
+    def fetch_stock_data_many(symbols, start=None, end=None, interval=None, days=None, **_):
+        return {s: fetch_stock_data(s, start, end, interval, days) for s in dict.fromkeys(symbols)}
+
+    def get_last_close(symbol, sim_date=None):
+        df = fetch_stock_data(symbol, sim_date, sim_date)
+        return float(df["close"].iloc[-1]) if not df.empty else None
+
+    per_trade.fetch_stock_data = fetch_stock_data
+    per_trade.get_last_close = get_last_close
+    fill_simulator.fetch_stock_data_many = fetch_stock_data_many
+
+
+def make_trades(symbols, n, seed, exit_rules=False) -> list:
+    rng = random.Random(seed)
+    day = DAYS[0].to_pydatetime()
+    trades = []
+    for _ in range(n):
+        intraday = rng.random() < 0.5
+        strategy_config = {}
+        if exit_rules:
+            strategy_config = {"exit_rule": {"kind": "fixed_pct", "stop_loss": rng.choice([0, 0.002, 0.005]),
+                                             "take_profit": rng.choice([0, 0.003, 0.01])}}
+        trades.append(Trade(
+            symbol=rng.choice(symbols),
+            timestamp=day + timedelta(minutes=rng.choice([0, rng.randint(225, 590)])),
+            order_type="MARKET" if rng.random() < 0.8 else "LIMIT",
+            price=100.0,
+            size=round(rng.uniform(0.1, 1.5), 2),
+            direction=rng.choice([1, -1]),
+            holding_period=timedelta(minutes=rng.choice([30, 60, 90])) if intraday
+            else timedelta(days=rng.choice([1, 2, 3])),
+            exit_strategy="TIME_BASED",
+            meta={"interval": "15minute" if intraday else "day", "novelty": rng.uniform(0.3, 1.0),
+                  "strategy_config": strategy_config},
+        ))
+    return trades
+
+
+def same(a, b) -> bool:
+    if a is None or b is None:
+        return a is None and b is None
+    prices = all(math.isclose(a[k], b[k], rel_tol=1e-12) for k in ("entry_price", "exit_price", "reward"))
+    times = pd.Timestamp(a["entry_time"]) == pd.Timestamp(b["entry_time"]) and \
+        pd.Timestamp(a["exit_time"]) == pd.Timestamp(b["exit_time"])
+    return prices and times and a["symbol"] == b["symbol"]
+
+
+def scan_exit(bars: pd.DataFrame, result: dict, time_exit: dict, rule: dict):
+    """Bar-by-bar stop/target reference: ``(exit_price, exit_time)``."""
+    entry, d = result["entry_price"], result["direction"]
+    stop = entry * (1 - d * rule["stop_loss"]) if rule["stop_loss"] else None
+    take = entry * (1 + d * rule["take_profit"]) if rule["take_profit"] else None
+    path = bars.loc[pd.Timestamp(result["entry_time"]):pd.Timestamp(time_exit["exit_time"])]
+    for ts, bar in path.iterrows():
+        adverse, favourable = (bar["low"], bar["high"]) if d > 0 else (bar["high"], bar["low"])
+        if stop is not None and d * (adverse - stop) <= 0:
+            return (bar["open"] if d * (bar["open"] - stop) < 0 else stop), ts
+        if take is not None and d * (favourable - take) >= 0:
+            return (bar["open"] if d * (bar["open"] - take) > 0 else take), ts
+    return time_exit["exit_price"], pd.Timestamp(time_exit["exit_time"])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--symbols", type=int, default=300)
+    parser.add_argument("--trades", type=int, default=2_000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    symbols = [f"SYM{i}" for i in range(args.symbols)]
+    bars = make_bars(symbols, np.random.default_rng(args.seed))
+    install_bars(bars)
+    day = DAYS[0].to_pydatetime()
+
+    random.seed(args.seed)
+    t0 = time.perf_counter()
+    expected = [per_trade.simulate_trade_execution(t, day) for t in make_trades(symbols, args.trades, args.seed)]
+    t_loop = time.perf_counter() - t0
+
+    random.seed(args.seed)
+    t0 = time.perf_counter()
+    got = fill_simulator.simulate_fills(make_trades(symbols, args.trades, args.seed), day)
+    t_batch = time.perf_counter() - t0
+
+    mismatches = sum(not same(a, b) for a, b in zip(expected, got))
+    filled = sum(r is not None for r in expected)
+    loop_rate, batch_rate = args.trades / t_loop, args.trades / t_batch
+    print(f"Per-trade : {args.trades:>7,} trades in {t_loop:7.2f}s  {loop_rate:10,.0f} trades/s")
+    print(f"Batched   : {args.trades:>7,} trades in {t_batch:7.2f}s  {batch_rate:10,.0f} trades/s")
+    print(f"Speed-up  : {batch_rate / loop_rate:.1f}×")
+    status = "✅" if mismatches == 0 else "❌"
+    print(f"{status} Parity     : {filled:,} filled, {mismatches} mismatches")
+
+    ruled_trades = make_trades(symbols, args.trades, args.seed + 1, exit_rules=True)
+    plain_trades = make_trades(symbols, args.trades, args.seed + 1, exit_rules=True)
+    for t in plain_trades:
+        t.meta["strategy_config"] = {}
+    random.seed(args.seed)
+    ruled = fill_simulator.simulate_fills(ruled_trades, day)
+    random.seed(args.seed)
+    time_exits = fill_simulator.simulate_fills(plain_trades, day)
+    bad = hits = 0
+    for trade, r, te in zip(ruled_trades, ruled, time_exits):
+        if r is None:
+            continue
+        price, ts = scan_exit(bars[trade.symbol], r, te, trade.meta["strategy_config"]["exit_rule"])
+        hits += ts != pd.Timestamp(te["exit_time"])
+        bad += not (math.isclose(price, r["exit_price"], rel_tol=1e-12) and ts == pd.Timestamp(r["exit_time"]))
+    status = "✅" if bad == 0 else "❌"
+    print(f"{status} Stop/target: {hits:,} level exits, {bad} mismatches against a bar-by-bar scan")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+# scripts/benchmark_grid_backtest.py
+
+"""
+Parity check + timing for the vectorized grid backtester.
+
+Runs the same configs through ``SMA_RSI_Exit`` (one ``backtesting.Backtest``
+per config) and through ``core.backtest_vec`` in a single pass, asserts that
+both produce the same trades and metrics, and reports the speed-up.
+
+    python -m scripts.benchmark_grid_backtest                 # synthetic random walk
+    python -m scripts.benchmark_grid_backtest --stock RELIANCE --end 2024-06-01
+"""
+
+import argparse
+import contextlib
+import io
+import itertools
+import time
+
+import numpy as np
+import pandas as pd
+
+from core.backtest_bt import build_backtest
+from core.backtest_vec import grid_stats, simulate_grid
+from core.config.config import settings
+from core.config.strategy_config import ExitRule, StrategyConfig
+
+EXIT_RULES = [
+    ExitRule(kind="fixed_pct", stop_loss=0.03, take_profit=0.06, max_holding_days=10),
+    ExitRule(kind="fixed_pct", stop_loss=3, take_profit=6),
+    ExitRule(kind="trailing_pct", stop_loss=2, trail=0.05, max_holding_days=15),
+    ExitRule(kind="sma_cross", sma_window=20, max_holding_days=10),
+    ExitRule(kind="sma_cross", sma_window=8),
+    ExitRule(kind="time_stop", max_holding_days=5),
+]
+
+
+def synthetic_prices(n_bars: int, seed: int) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.015, n_bars)))
+    index = pd.bdate_range("2019-01-01", periods=n_bars)
+    spread = np.abs(rng.normal(0, 0.01, n_bars)) * close
+    return pd.DataFrame({
+        "Open": close * (1 + rng.normal(0, 0.003, n_bars)),
+        "High": close + spread,
+        "Low": close - spread,
+        "Close": close,
+        "Volume": rng.integers(1_000, 100_000, n_bars),
+    }, index=index)
+
+
+def load_prices(stock: str, start, end) -> pd.DataFrame:
+    from core.data_provider.data_provider import fetch_stock_data
+    df = fetch_stock_data(stock, start=start or settings.backtest_start, end=end or settings.backtest_end)
+    df = df.rename(columns={"open": "Open", "high": "High", "low": "Low", "close": "Close", "volume": "Volume"})
+    df.index = pd.to_datetime(df.index)
+    return df[["Open", "High", "Low", "Close", "Volume"]]
+
+
+def build_grid() -> list:
+    configs = []
+    for s, l, r in itertools.product([5, 10, 15], [20, 30, 50], [40, 55, 70]):
+        for rule in EXIT_RULES:
+            configs.append(StrategyConfig(sma_short=s, sma_long=l, rsi_entry=r, exit_rule=rule))
+    return configs
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--stock", default=None, help="Use cached prices for this stock instead of synthetic data")
+    parser.add_argument("--start", default=None)
+    parser.add_argument("--end", default=None)
+    parser.add_argument("--bars", type=int, default=1000, help="Synthetic series length")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    df = load_prices(args.stock, args.start, args.end) if args.stock else synthetic_prices(args.bars, args.seed)
+    configs = build_grid()
+    print(f"{len(configs)} configs × {len(df)} bars")
+
+    t0 = time.perf_counter()
+    reference = []
+    for cfg in configs:
+        with contextlib.redirect_stdout(io.StringIO()):
+            reference.append(build_backtest(df, cfg).run())
+    t_ref = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    sim = simulate_grid(
+        df["Close"].to_numpy(dtype=float), configs,
+        cash=settings.capital_per_trade,
+        commission=getattr(settings, "backtest_commission", 0.001),
+    )
+    stats = grid_stats(sim["equity"], sim["trades"], pd.DatetimeIndex(df.index))
+    t_vec = time.perf_counter() - t0
+
+    trades = pd.DataFrame(sim["trades"])
+    mismatches = 0
+    for i, (cfg, ref) in enumerate(zip(configs, reference)):
+        ref_trades = ref["_trades"][["EntryBar", "ExitBar", "EntryPrice", "ExitPrice", "Size"]].to_numpy(dtype=float)
+        vec_trades = trades[trades["config"] == i][["entry_bar", "exit_bar", "entry_price", "exit_price", "size"]]
+        checks = {
+            "trades": ref_trades.shape == vec_trades.shape and np.allclose(ref_trades, vec_trades.to_numpy(dtype=float)),
+            "equity": np.allclose(ref["_equity_curve"]["Equity"].to_numpy(), sim["equity"][i]),
+            "total_return": np.isclose(ref["Return [%]"] / 100, stats.at[i, "total_return"]),
+            "sharpe": np.isclose(ref["Sharpe Ratio"], stats.at[i, "sharpe"], equal_nan=True),
+            "max_drawdown": np.isclose(ref["Max. Drawdown [%]"] / 100, stats.at[i, "max_drawdown"]),
+            "avg_trade_return": np.isclose(np.nan_to_num(ref["Avg. Trade [%]"] / 100), stats.at[i, "avg_trade_return"]),
+            "trade_count": int(ref["# Trades"]) == stats.at[i, "trade_count"],
+        }
+        failed = [name for name, ok in checks.items() if not ok]
+        if failed:
+            mismatches += 1
+            print(f"❌ {cfg.sma_short}/{cfg.sma_long}/{cfg.rsi_entry} {cfg.exit_rule.kind}: {', '.join(failed)}")
+
+    print(f"Parity         : {len(configs) - mismatches}/{len(configs)} configs match "
+          f"({int(stats['trade_count'].sum())} trades)")
+    print(f"backtesting.py : {t_ref:7.2f}s  ({len(configs) / t_ref:8.1f} configs/s)")
+    print(f"Vectorized     : {t_vec:7.2f}s  ({len(configs) / t_vec:8.1f} configs/s)")
+    print(f"Speed-up       : {t_ref / max(t_vec, 1e-9):.1f}×")
+    if mismatches:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
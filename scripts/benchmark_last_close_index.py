@@ -0,0 +1,83 @@
+# scripts/benchmark_last_close_index.py
+
+"""
+Expanding-lookback ``get_last_close`` vs the as-of ``LastCloseIndex``.
+
+Builds the index over ``stock_price_history``, then looks up the last close
+of up to ``--symbols`` symbols on each of ``--days`` random days in
+``[--start, --end]``. The same lookups are timed through the lookback path
+on a ``--legacy-sample`` subset, because that path costs several queries per
+lookup, and the two answers are compared.
+
+An index day with minute bars takes the last minute close, as the lookback
+path does for the requested day. For earlier days the lookback path reads
+daily bars only, so a day whose daily bar disagrees with its minute bars can
+show up as a mismatch.
+
+    python -m scripts.benchmark_last_close_index --symbols 2000 --days 20
+"""
+
+import argparse
+import math
+import random
+import time
+
+import pandas as pd
+
+from core.data_provider.data_provider import _get_last_close_lookback
+from core.data_provider.last_close_index import LastCloseIndex
+from db.postgres_manager import run_query
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--symbols", type=int, default=2_000)
+    parser.add_argument("--days", type=int, default=20)
+    parser.add_argument("--start", default="2024-01-01")
+    parser.add_argument("--end", default="2024-12-31")
+    parser.add_argument("--legacy-sample", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    symbols = [r[0] for r in run_query(
+        "SELECT DISTINCT symbol FROM stock_price_history ORDER BY symbol LIMIT :n", {"n": args.symbols}
+    )]
+    days = sorted(rng.sample(list(pd.bdate_range(args.start, args.end)), args.days))
+
+    t0 = time.perf_counter()
+    index = LastCloseIndex().build()
+    t_build = time.perf_counter() - t0
+    print(f"Build      : {t_build:7.2f}s  {index.stats()}")
+
+    t0 = time.perf_counter()
+    touched = index.refresh()
+    print(f"Refresh    : {time.perf_counter() - t0:7.2f}s  ({touched} symbols re-read from the newest day)")
+
+    t0 = time.perf_counter()
+    indexed = {day: index.last_close_many(symbols, day) for day in days}
+    t_index = time.perf_counter() - t0
+    lookups = len(symbols) * len(days)
+    print(f"Index      : {lookups:>8,} lookups in {t_index:7.3f}s  {lookups / t_index:12,.0f} lookups/s")
+
+    sample = [(rng.choice(symbols), rng.choice(days)) for _ in range(args.legacy_sample)]
+    t0 = time.perf_counter()
+    legacy = [_get_last_close_lookback(sym, day) for sym, day in sample]
+    t_legacy = time.perf_counter() - t0
+    legacy_rate = len(sample) / t_legacy
+    print(f"Lookback   : {len(sample):>8,} lookups in {t_legacy:7.3f}s  {legacy_rate:12,.0f} lookups/s")
+    print(f"Speed-up   : {lookups / t_index / legacy_rate:.0f}× per lookup (index build excluded)")
+
+    mismatches = 0
+    for (sym, day), expected in zip(sample, legacy):
+        got = indexed[day].get(sym)
+        if expected is None or got is None:
+            mismatches += (expected is None) != (got is None)
+        else:
+            mismatches += not math.isclose(expected, got, rel_tol=1e-9)
+    status = "✅" if mismatches == 0 else "⚠️"
+    print(f"{status} Parity     : {mismatches} / {len(sample)} sampled lookups differ")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+# scripts/benchmark_position_store.py
+
+"""
+Delete-all + reinsert vs diff-based ``open_positions`` persistence.
+
+Uses a scratch copy of ``open_positions`` (``bench_open_positions``). Each
+simulated cycle closes and opens ``--churn`` of the book and changes the
+quantity of half as many positions. Both paths persist the same sequence of
+books; after every cycle the table is compared with the book.
+
+    python -m scripts.benchmark_position_store --sizes 1000 10000 --cycles 20
+"""
+
+import argparse
+import json
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import MetaData, Table
+from sqlalchemy.dialects.postgresql import insert
+
+from db.db import engine
+from db.postgres_manager import run_query
+from db.position_store import POSITION_COLUMNS, PositionStore
+
+BENCH_TABLE = "bench_open_positions"
+
+
+def make_positions(ids, rng) -> pd.DataFrame:
+    n = len(ids)
+    return pd.DataFrame({
+        "stock": [f"SYM{i}" for i in ids],
+        "entry_price": rng.uniform(10, 2000, n).round(2),
+        "entry_date": [datetime(2024, 1, 1) + timedelta(days=int(d)) for d in rng.integers(0, 300, n)],
+        "quantity": rng.integers(1, 500, n),
+        "sma_short": rng.integers(5, 20, n).astype(float),
+        "sma_long": rng.integers(20, 100, n).astype(float),
+        "rsi_thresh": rng.uniform(20, 80, n).round(2),
+        "strategy_config": [json.dumps({"exit_rule": {"kind": "fixed_pct", "stop_loss": 0.03}})] * n,
+        "interval": "day",
+    })
+
+
+def next_book(book: pd.DataFrame, next_id: int, churn: float, rng):
+    k = max(1, int(len(book) * churn))
+    book = book.drop(index=rng.choice(book.index, k, replace=False))
+    changed = rng.choice(book.index, max(1, k // 2), replace=False)
+    book.loc[changed, "quantity"] = book.loc[changed, "quantity"] + 1
+    book = pd.concat([book, make_positions(range(next_id, next_id + k), rng)], ignore_index=True)
+    return book, next_id + k
+
+
+def write_legacy(book: pd.DataFrame, table, chunk_size: int = 1000):
+    """What ExecutionAgentSQL.run did: DELETE everything, then chunked multi-row INSERTs."""
+    run_query(f'DELETE FROM "{BENCH_TABLE}"', fetchall=False)
+    records = book[POSITION_COLUMNS].to_dict(orient="records")
+    with engine.begin() as conn:
+        for i in range(0, len(records), chunk_size):
+            stmt = insert(table).values(records[i:i + chunk_size])
+            stmt = stmt.on_conflict_do_update(
+                index_elements=["stock"], set_={c: stmt.excluded[c] for c in POSITION_COLUMNS}
+            )
+            conn.execute(stmt)
+
+
+def table_matches(book: pd.DataFrame) -> bool:
+    stored = dict(run_query(f'SELECT stock, quantity FROM "{BENCH_TABLE}"'))
+    return stored == dict(zip(book["stock"], book["quantity"].astype(int)))
+
+
+def run_size(n: int, cycles: int, churn: float, table) -> None:
+    rng = np.random.default_rng(n)
+    books, book, next_id = [], make_positions(range(n), rng), n
+    for _ in range(cycles):
+        book, next_id = next_book(book, next_id, churn, rng)
+        books.append(book)
+    initial = make_positions(range(n), np.random.default_rng(n))
+
+    write_legacy(initial, table)
+    ok, t0 = True, time.perf_counter()
+    for b in books:
+        write_legacy(b, table)
+        ok &= table_matches(b)
+    t_legacy = (time.perf_counter() - t0) / cycles
+
+    run_query(f'TRUNCATE "{BENCH_TABLE}"', fetchall=False)
+    write_legacy(initial, table)
+    store = PositionStore(BENCH_TABLE)
+    store.load()
+    t0 = time.perf_counter()
+    for b in books:
+        store.sync(b)
+        ok &= table_matches(b)
+    t_diff = (time.perf_counter() - t0) / cycles
+
+    status = "✅" if ok else "❌"
+    print(f"{n:>7,} positions | delete+reinsert {t_legacy * 1000:8.1f} ms/cycle | "
+          f"diff {t_diff * 1000:8.1f} ms/cycle | {t_legacy / t_diff:5.1f}× | {status} table == book")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000])
+    parser.add_argument("--cycles", type=int, default=20)
+    parser.add_argument("--churn", type=float, default=0.02, help="Fraction of the book closed and opened per cycle")
+    args = parser.parse_args()
+
+    run_query(f'DROP TABLE IF EXISTS "{BENCH_TABLE}"', fetchall=False)
+    run_query(f'CREATE TABLE "{BENCH_TABLE}" (LIKE open_positions INCLUDING ALL)', fetchall=False)
+    try:
+        table = Table(BENCH_TABLE, MetaData(), autoload_with=engine)
+        for n in args.sizes:
+            run_query(f'TRUNCATE "{BENCH_TABLE}"', fetchall=False)
+            run_size(n, args.cycles, args.churn, table)
+    finally:
+        run_query(f'DROP TABLE IF EXISTS "{BENCH_TABLE}"', fetchall=False)
+
+
+if __name__ == "__main__":
+    main()
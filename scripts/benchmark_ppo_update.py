@@ -0,0 +1,131 @@
+# scripts/benchmark_ppo_update.py
+
+"""
+Update throughput of ``core.rl.ppo_trainer.PPOTrainer`` (tensor rollout
+buffer, GAE, minibatch epochs) versus the previous deque-of-tuples trainer.
+
+Both train on the same number of samples from a synthetic env: the deque
+trainer runs ``train_step`` once per minibatch of its replay sample, the
+tensor trainer runs its epochs over the rollout buffer. Progress logging to
+SQLite is disabled for both so only the update itself is timed.
+
+    python -m scripts.benchmark_ppo_update --envs 8 --steps 512 --epochs 4
+"""
+
+import argparse
+import time
+from collections import deque
+
+import numpy as np
+import torch
+
+import core.rl.ppo_trainer as ppo_trainer
+from core.rl.ppo_trainer import ActorCritic, PPOTrainer
+
+
+class SyntheticEnv:
+    """Gymnasium-style env with random observations and rewards."""
+
+    def __init__(self, obs_dim: int, episode_len: int, seed: int):
+        self.observation_space = type("Space", (), {"shape": (obs_dim,)})()
+        self.rng = np.random.default_rng(seed)
+        self.obs_dim, self.episode_len, self.t = obs_dim, episode_len, 0
+
+    def reset(self, *, seed=None, options=None):
+        self.t = 0
+        return self.rng.normal(size=self.obs_dim).astype(np.float32), {}
+
+    def step(self, action):
+        self.t += 1
+        obs = self.rng.normal(size=self.obs_dim).astype(np.float32)
+        return obs, float(self.rng.normal()), self.t >= self.episode_len, False, {}
+
+
+class LegacyPPOTrainer:
+    """The previous trainer's update: a deque of tuples sampled with ``np.random.choice``."""
+
+    def __init__(self, obs_dim, lr=3e-4, gamma=0.99):
+        self.gamma = gamma
+        self.model = ActorCritic(input_dim=obs_dim)
+        self.optimizer = torch.optim.Adam(self.model.parameters(), lr=lr)
+        self.buffer = deque(maxlen=5000)
+
+    def train_step(self, batch_size=64):
+        batch = [self.buffer[i] for i in np.random.choice(len(self.buffer), batch_size, replace=False)]
+        obs, actions, rewards, next_obs, dones = zip(*batch)
+        obs = torch.tensor(np.array(obs), dtype=torch.float32)
+        actions = torch.tensor(np.array(actions), dtype=torch.float32)
+        rewards = torch.tensor(rewards, dtype=torch.float32)
+        next_obs = torch.tensor(np.array(next_obs), dtype=torch.float32)
+        dones = torch.tensor(dones, dtype=torch.float32)
+
+        pred_actions, values = self.model(obs)
+        _, next_values = self.model(next_obs)
+        target_values = rewards + self.gamma * next_values.squeeze() * (1 - dones)
+        advantages = target_values.detach() - values.squeeze()
+
+        loss = ((pred_actions - actions) ** 2).mean() + (advantages ** 2).mean()
+        self.optimizer.zero_grad()
+        loss.backward()
+        self.optimizer.step()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--envs", type=int, default=8)
+    parser.add_argument("--steps", type=int, default=512, help="Rollout steps per env")
+    parser.add_argument("--epochs", type=int, default=4)
+    parser.add_argument("--batch-size", type=int, default=None,
+                        help="Tensor trainer minibatch (default: rollout size / 4)")
+    parser.add_argument("--legacy-batch-size", type=int, default=64)
+    parser.add_argument("--obs-dim", type=int, default=32)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    ppo_trainer.log_model_progress = lambda *a, **k: None
+    torch.manual_seed(args.seed)
+    np.random.seed(args.seed)
+
+    envs = [SyntheticEnv(args.obs_dim, 200, args.seed + i) for i in range(args.envs)]
+    trainer = PPOTrainer(envs, n_steps=args.steps, seed=args.seed)
+
+    t0 = time.perf_counter()
+    trainer.collect_rollout()
+    t_collect = time.perf_counter() - t0
+    samples = len(trainer.buffer)
+    print(f"Collect : {samples:,} transitions from {args.envs} envs in {t_collect:.2f}s "
+          f"({samples / t_collect:,.0f} transitions/s)")
+
+    # Same transitions for the legacy trainer, as (obs, action, reward, next_obs, done) tuples
+    buf = trainer.buffer
+    obs = buf.obs[:buf.pos].numpy()
+    next_obs = np.concatenate([obs[1:], trainer._last_obs[None]], axis=0)
+    legacy = LegacyPPOTrainer(args.obs_dim)
+    for t in range(buf.pos):
+        for i in range(args.envs):
+            legacy.buffer.append((obs[t, i], buf.actions[t, i].numpy(), float(buf.rewards[t, i]),
+                                  next_obs[t, i], float(buf.dones[t, i])))
+
+    trained = args.epochs * samples
+    n_legacy_steps = trained // args.legacy_batch_size
+    t0 = time.perf_counter()
+    for _ in range(n_legacy_steps):
+        legacy.train_step(args.legacy_batch_size)
+    t_legacy = time.perf_counter() - t0
+
+    batch_size = args.batch_size or max(samples // trainer.n_minibatches, 1)
+    n_tensor_steps = args.epochs * -(-samples // batch_size)
+    t0 = time.perf_counter()
+    trainer.train_step(batch_size=args.batch_size, epochs=args.epochs)
+    t_tensor = time.perf_counter() - t0
+
+    print(f"Deque   : {n_legacy_steps * args.legacy_batch_size:>9,} samples in {t_legacy:6.2f}s "
+          f"({n_legacy_steps * args.legacy_batch_size / t_legacy:10,.0f} samples/s, "
+          f"{n_legacy_steps} optimizer steps of {args.legacy_batch_size})")
+    print(f"Tensor  : {trained:>9,} samples in {t_tensor:6.2f}s ({trained / t_tensor:10,.0f} samples/s, "
+          f"{n_tensor_steps} optimizer steps of {batch_size}, {args.epochs} epochs incl. GAE-normalised clipped loss)")
+    print(f"Speed-up: {(trained / t_tensor) / (n_legacy_steps * args.legacy_batch_size / t_legacy):.1f}×")
+
+
+if __name__ == "__main__":
+    main()
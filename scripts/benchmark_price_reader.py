@@ -0,0 +1,61 @@
+# scripts/benchmark_price_reader.py
+
+"""
+ORM hydration vs COPY-based columnar reads of ``stock_price_history``.
+
+Reads the same slice (all symbols for one interval and date window, so it is
+easy to reach 1M+ rows on a populated database) with both paths and reports
+rows/second and the dtypes of the columnar frame.
+
+    python -m scripts.benchmark_price_reader --interval minute --start 2024-01-01
+"""
+
+import argparse
+import time
+
+import pandas as pd
+
+from db.db import SessionLocal
+from db.models import StockPriceHistory
+from db.columnar_reader import read_table_columnar
+
+
+def read_orm(interval: str, start, end) -> pd.DataFrame:
+    session = SessionLocal()
+    try:
+        q = session.query(StockPriceHistory).filter(StockPriceHistory.interval == interval)
+        if start:
+            q = q.filter(StockPriceHistory.date >= pd.to_datetime(start).date())
+        if end:
+            q = q.filter(StockPriceHistory.date <= pd.to_datetime(end).date())
+        recs = q.order_by(StockPriceHistory.date).all()
+        df = pd.DataFrame([r.__dict__ for r in recs])
+        return df.drop(columns=["_sa_instance_state"], errors="ignore")
+    finally:
+        session.close()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--interval", default="minute")
+    parser.add_argument("--start", default=None)
+    parser.add_argument("--end", default=None)
+    parser.add_argument("--skip-orm", action="store_true", help="Only time the columnar path")
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    col = read_table_columnar("stock_price_history", start=args.start, end=args.end, interval=args.interval)
+    t_col = time.perf_counter() - t0
+    print(f"Columnar (COPY): {len(col):>10,} rows in {t_col:7.2f}s  {len(col) / max(t_col, 1e-9):12,.0f} rows/s")
+    print(col.dtypes.to_string())
+
+    if not args.skip_orm:
+        t0 = time.perf_counter()
+        orm = read_orm(args.interval, args.start, args.end)
+        t_orm = time.perf_counter() - t0
+        print(f"ORM hydration  : {len(orm):>10,} rows in {t_orm:7.2f}s  {len(orm) / max(t_orm, 1e-9):12,.0f} rows/s")
+        print(f"Speed-up       : {t_orm / max(t_col, 1e-9):.1f}×")
+
+
+if __name__ == "__main__":
+    main()
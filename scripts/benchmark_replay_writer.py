@@ -0,0 +1,99 @@
+# scripts/benchmark_replay_writer.py
+
+"""
+Row-wise INSERT vs buffered COPY writes of replay episodes.
+
+Uses a scratch copy of ``rl_replay_buffer`` (``bench_rl_replay_buffer``). The
+row-wise path is timed on a sample and extrapolated; the buffered writer
+writes all episodes, then the table is checked for exactly one row per
+episode.
+
+    python -m scripts.benchmark_replay_writer --episodes 100000
+"""
+
+import argparse
+import json
+import time
+from datetime import datetime
+
+import numpy as np
+
+from db.postgres_manager import run_query
+from db.replay_writer import ReplayBatchWriter
+
+BENCH_TABLE = "bench_rl_replay_buffer"
+
+ROW_INSERT = f"""
+INSERT INTO {BENCH_TABLE}
+    (stock, date, interval, action, reward, features, strategy_config, inserted_at)
+VALUES
+    (:stock, :date, :interval, :action, :reward,
+     CAST(:features AS JSONB), CAST(:strategy_config AS JSONB), :inserted_at)
+"""
+
+
+def make_episode(i: int, rng) -> dict:
+    state = rng.normal(size=16).round(5).tolist()
+    return {
+        "stock": f"SYM{i % 500}",
+        "date": datetime(2024, 1, 1).date(),
+        "interval": "day",
+        "action": int(i % 3),
+        "reward": float(rng.normal()),
+        "features": {"state": state, "next_state": state, "done": bool(i % 2)},
+        "strategy_config": {},
+        "inserted_at": datetime.now(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--episodes", type=int, default=100_000)
+    parser.add_argument("--row-sample", type=int, default=2_000, help="Episodes timed on the row-wise path")
+    parser.add_argument("--flush-size", type=int, default=5_000)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    episodes = [make_episode(i, rng) for i in range(args.episodes)]
+
+    run_query(f"DROP TABLE IF EXISTS {BENCH_TABLE}", fetchall=False)
+    run_query(f"CREATE TABLE {BENCH_TABLE} (LIKE rl_replay_buffer INCLUDING ALL)", fetchall=False)
+    # Same schema as scripts/migrate_replay_episode_id.py, in case the source is not migrated yet
+    run_query(f"ALTER TABLE {BENCH_TABLE} ADD COLUMN IF NOT EXISTS episode_id UUID", fetchall=False)
+    run_query(f"CREATE UNIQUE INDEX IF NOT EXISTS {BENCH_TABLE}_episode_id_key ON {BENCH_TABLE} (episode_id)",
+              fetchall=False)
+    try:
+        sample = episodes[:args.row_sample]
+        t0 = time.perf_counter()
+        for ep in sample:
+            run_query(ROW_INSERT, params={
+                **ep,
+                "features": json.dumps(ep["features"]),
+                "strategy_config": json.dumps(ep["strategy_config"]),
+            }, fetchall=False)
+        t_row = time.perf_counter() - t0
+        row_rate = len(sample) / t_row
+        print(f"Row-wise INSERT : {len(sample):>8,} episodes in {t_row:7.2f}s  {row_rate:10,.0f} episodes/s "
+              f"(≈{args.episodes / row_rate:,.0f}s for {args.episodes:,})")
+        run_query(f"TRUNCATE {BENCH_TABLE}", fetchall=False)
+
+        writer = ReplayBatchWriter(BENCH_TABLE, flush_size=args.flush_size)
+        t0 = time.perf_counter()
+        for ep in episodes:
+            writer.enqueue(ep)
+        writer.flush()
+        t_buf = time.perf_counter() - t0
+        writer.close()
+        print(f"Buffered COPY   : {args.episodes:>8,} episodes in {t_buf:7.2f}s  "
+              f"{args.episodes / t_buf:10,.0f} episodes/s  {writer.stats()}")
+        print(f"Speed-up        : {(args.episodes / t_buf) / row_rate:.1f}×")
+
+        total, distinct = run_query(f"SELECT COUNT(*), COUNT(DISTINCT episode_id) FROM {BENCH_TABLE}")[0]
+        status = "✅" if total == distinct == args.episodes else "❌"
+        print(f"{status} Exactly-once  : {total:,} rows, {distinct:,} distinct episode_ids")
+    finally:
+        run_query(f"DROP TABLE IF EXISTS {BENCH_TABLE}", fetchall=False)
+
+
+if __name__ == "__main__":
+    main()
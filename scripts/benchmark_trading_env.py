@@ -0,0 +1,118 @@
+# scripts/benchmark_trading_env.py
+
+"""
+Parity check + steps/second for the array-backed ``TradingEnv``.
+
+``LegacyTradingEnv`` reproduces the previous pandas path (``df.iloc`` window
+slice + ``np.append`` per step). Both envs are driven with the same seeded
+action sequence over several episodes; every observation, reward and done
+flag must match exactly.
+
+    python -m scripts.benchmark_trading_env --rows 2000 --steps 20000
+"""
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from rl.envs.trading_env import TradingEnv
+
+
+class _ILocClose:
+    def __init__(self, df):
+        self.df = df
+
+    def __getitem__(self, idx):
+        return self.df.iloc[idx]["close"]
+
+
+class LegacyTradingEnv(TradingEnv):
+    """``TradingEnv`` with the per-step DataFrame slicing it used to do."""
+
+    def __init__(self, df, **kwargs):
+        super().__init__(df, **kwargs)
+        self._close = _ILocClose(self.df)
+
+    def _get_obs(self):
+        window_data = self.df.iloc[self.idx - self.window:self.idx].values.flatten()
+        obs = np.append(window_data, [self.cash, self.position, self.holding_days]).astype(np.float32)
+        if not np.all(np.isfinite(obs)):
+            raise ValueError(f"🧨 NaN or inf in observation at idx={self.idx}: {obs}")
+        return obs
+
+
+def synthetic_frame(rows: int, seed: int) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.015, rows)))
+    return pd.DataFrame({
+        "open": close * (1 + rng.normal(0, 0.003, rows)),
+        "high": close * 1.01,
+        "low": close * 0.99,
+        "close": close,
+        "volume": rng.integers(1_000, 100_000, rows).astype(float),
+        "rsi": rng.uniform(0, 100, rows),
+        "sma_short": close,
+        "sma_long": close,
+    })
+
+
+def rollout(env, actions: np.ndarray) -> list:
+    trace = []
+    obs, _ = env.reset()
+    trace.append((obs,))
+    for action in actions:
+        obs, reward, done, truncated, _ = env.step(int(action))
+        trace.append((obs, reward, done, truncated))
+        if done:
+            obs, _ = env.reset()
+            trace.append((obs,))
+    return trace
+
+
+def timed(env, actions: np.ndarray) -> float:
+    env.reset()
+    t0 = time.perf_counter()
+    for action in actions:
+        _, _, done, _, _ = env.step(int(action))
+        if done:
+            env.reset()
+    return time.perf_counter() - t0
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=2_000)
+    parser.add_argument("--steps", type=int, default=20_000)
+    parser.add_argument("--max-steps", type=int, default=500, help="Episode length")
+    parser.add_argument("--reward-mode", default="raw", choices=["raw", "sharpe"])
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    df = synthetic_frame(args.rows, args.seed)
+    actions = np.random.default_rng(args.seed).integers(0, 3, args.steps)
+    kwargs = dict(max_steps=args.max_steps, reward_mode=args.reward_mode)
+
+    legacy, fast = LegacyTradingEnv(df, **kwargs), TradingEnv(df, **kwargs)
+    mismatches = 0
+    for ref, new in zip(rollout(legacy, actions), rollout(fast, actions)):
+        same = all(
+            np.array_equal(a, b) and np.asarray(a).dtype == np.asarray(b).dtype
+            for a, b in zip(ref, new)
+        )
+        mismatches += not same
+    print(f"Parity   : {'✅' if not mismatches else '❌'} {mismatches} mismatching transitions "
+          f"over {args.steps:,} steps ({df.shape[1]} columns, window {fast.window})")
+
+    t_legacy = timed(LegacyTradingEnv(df, **kwargs), actions)
+    t_fast = timed(TradingEnv(df, **kwargs), actions)
+    print(f"pandas   : {args.steps / t_legacy:12,.0f} steps/s")
+    print(f"arrays   : {args.steps / t_fast:12,.0f} steps/s")
+    print(f"Speed-up : {t_legacy / t_fast:.1f}×")
+    if mismatches:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
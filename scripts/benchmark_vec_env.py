@@ -0,0 +1,57 @@
+# scripts/benchmark_vec_env.py
+
+"""
+Environment steps/second of ``rl.shared_panels.build_vec_env`` versus worker
+count.
+
+Synthetic symbol frames are packed into one shared-memory block; for each
+worker count the vec env is stepped with random actions (no policy), so the
+numbers measure env + IPC throughput only.
+
+    python -m scripts.benchmark_vec_env --symbols 16 --workers 1 2 4 8
+"""
+
+import argparse
+import os
+import time
+
+import numpy as np
+
+from rl.shared_panels import SharedPanels, build_vec_env
+from scripts.benchmark_trading_env import synthetic_frame
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--symbols", type=int, default=16)
+    parser.add_argument("--rows", type=int, default=1500)
+    parser.add_argument("--steps", type=int, default=2_000, help="Vec-env steps per run (each steps every env)")
+    parser.add_argument("--workers", type=int, nargs="+", default=None)
+    args = parser.parse_args()
+
+    cores = os.cpu_count() or 1
+    worker_counts = args.workers or sorted({1, 2, 4, 8, cores} & set(range(1, cores + 1)))
+    frames = {f"SYM{i}": synthetic_frame(args.rows, i).astype(np.float32) for i in range(args.symbols)}
+    rng = np.random.default_rng(0)
+
+    print(f"{args.symbols} symbols × {args.rows} rows, {cores} cores")
+    with SharedPanels(frames) as panels:
+        baseline = None
+        for workers in worker_counts:
+            vec_env = build_vec_env(panels, workers=workers, max_steps=500)
+            vec_env.seed(0)
+            vec_env.reset()
+            actions = rng.integers(0, 3, (args.steps, vec_env.num_envs))
+            t0 = time.perf_counter()
+            for step_actions in actions:
+                vec_env.step(step_actions)
+            elapsed = time.perf_counter() - t0
+            vec_env.close()
+
+            rate = args.steps * vec_env.num_envs / elapsed
+            baseline = baseline or rate
+            print(f"workers={workers:<3} envs={vec_env.num_envs:<3} {rate:12,.0f} env steps/s  ({rate / baseline:4.1f}×)")
+
+
+if __name__ == "__main__":
+    main()
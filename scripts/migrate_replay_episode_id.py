@@ -0,0 +1,20 @@
+# scripts/migrate_replay_episode_id.py
+
+"""
+One-off migration for the buffered replay writer (``db.replay_writer``):
+adds ``rl_replay_buffer.episode_id`` and the unique index its
+``ON CONFLICT (episode_id)`` upsert relies on. Safe to re-run.
+
+    python -m scripts.migrate_replay_episode_id
+"""
+
+from db.postgres_manager import execute_raw_sql
+from db.replay_writer import REPLAY_TABLE
+
+if __name__ == "__main__":
+    print(f"🔧 Adding episode_id to {REPLAY_TABLE}...")
+    execute_raw_sql(f"ALTER TABLE {REPLAY_TABLE} ADD COLUMN IF NOT EXISTS episode_id UUID")
+    execute_raw_sql(
+        f"CREATE UNIQUE INDEX IF NOT EXISTS {REPLAY_TABLE}_episode_id_key ON {REPLAY_TABLE} (episode_id)"
+    )
+    print("✅ Done.")
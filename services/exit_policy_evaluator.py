@@ -4,8 +4,8 @@ import traceback
 from typing import Literal, Optional
 from pydantic import BaseModel
 from core.time_context.time_context import get_simulation_date
-from core.feature_engineering.feature_enricher_multi import enrich_multi_interval_features
-from core.model_io import load_model
+from core.feature_engineering.feature_enricher_multi import enrich_multi_interval_features, enrich_multi_interval_features_many
+from core.model_pool import get_model
 from core.logger.logger import logger
 
 class ExitRule(BaseModel):
@@ -38,7 +38,7 @@ def get_exit_probability(position: dict, default: float = 0.5) -> float:
             return default
 
         model_name = f"exit_classifier_{interval}"
-        model_obj = load_model(model_name)
+        model_obj = get_model(model_name)
         model, features = model_obj["model"], model_obj["features"]
 
         X = feats[features].fillna(0).replace([np.inf, -np.inf], 0)
@@ -49,5 +49,42 @@ def get_exit_probability(position: dict, default: float = 0.5) -> float:
         logger.warning(f"⚠️ ML-based exit check failed for {position.get('stock')}: {e}\n{traceback.format_exc()}")
         return default
 
+def get_exit_probabilities(positions: pd.DataFrame, default: float = 0.5, today=None) -> pd.Series:
+    """
+    ``get_exit_probability`` for every row of ``positions`` (aligned to its
+    index): one feature query and one ``predict_proba`` per interval.
+    """
+    proba = pd.Series(default, index=positions.index, dtype=float)
+    if positions.empty:
+        return proba
+
+    today = pd.to_datetime(today if today is not None else get_simulation_date())
+    entry_dates = pd.to_datetime(positions["entry_date"], errors="coerce")
+    intervals = positions["interval"].fillna("day") if "interval" in positions else pd.Series("day", index=positions.index)
+    if entry_dates.isna().any():
+        logger.warning(f"⚠️ Invalid entry_date for {positions.loc[entry_dates.isna(), 'stock'].tolist()}")
+    scorable = entry_dates.notna() & (entry_dates < today)
+
+    for interval, group in positions[scorable].groupby(intervals[scorable], sort=False):
+        try:
+            feats = enrich_multi_interval_features_many(group["stock"].tolist(), today, intervals=[interval])
+            if feats.empty:
+                logger.warning(f"⚠️ No features found for {len(group)} positions at {interval}")
+                continue
+
+            model_obj = get_model(f"exit_classifier_{interval}")
+            model, features = model_obj["model"], model_obj["features"]
+
+            X = feats[features].fillna(0).replace([np.inf, -np.inf], 0)
+            by_stock = pd.Series(model.predict_proba(X)[:, 1], index=feats["stock"].to_numpy())
+            found = group["stock"].map(by_stock)
+            missing = found.isna()
+            if missing.any():
+                logger.warning(f"⚠️ No features found for {group.loc[missing, 'stock'].tolist()} at {interval}")
+            proba.loc[found.index[~missing]] = found[~missing].astype(float)
+        except Exception as e:
+            logger.warning(f"⚠️ ML-based exit check failed for {len(group)} positions at {interval}: {e}\n{traceback.format_exc()}")
+    return proba
+
 def should_exit_model_based(position: dict, threshold: float = 0.5) -> bool:
     return get_exit_probability(position) > threshold
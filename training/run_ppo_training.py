@@ -19,6 +19,6 @@ if __name__ == "__main__":
     for epoch in range(100):
         print(f"\nEpoch {epoch + 1}/100")
         trainer.collect_rollout(steps=500)
-        trainer.train_step(batch_size=64)
+        trainer.train_step()
         trainer.save_model()
         time.sleep(10)  # Optional sleep to simulate spaced training
@@ -1,16 +1,83 @@
 # utils/cache.py
 
-# Global or shared context for one run
-seen_skips = set()
+"""
+Process-local caches for small, hot lookup tables (skiplist, instrument tokens).
+
+A ``TTLTableCache`` loads the whole table once, serves lookups from memory and
+reloads after ``ttl`` seconds or when a writer calls ``invalidate()``. Hit/miss
+counters show how many DB round trips the cache saved.
+"""
+
+import threading
+import time
+from typing import Any, Callable, Dict
+
+_registry: Dict[str, "TTLTableCache"] = {}
+
+
+class TTLTableCache:
+    def __init__(self, name: str, loader: Callable[[], Dict[Any, Any]], ttl: float = 300.0):
+        self.name = name
+        self.ttl = ttl
+        self._loader = loader
+        self._data = None
+        self._loaded_at = 0.0
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+        self.loads = 0
+        _registry[name] = self
+
+    def _ensure_loaded(self) -> bool:
+        """Load if empty or stale; returns True when the snapshot was already fresh."""
+        if self._data is not None and time.monotonic() - self._loaded_at < self.ttl:
+            return True
+        self._data = dict(self._loader())
+        self._loaded_at = time.monotonic()
+        self.loads += 1
+        return False
+
+    def get(self, key, default=None):
+        with self._lock:
+            if self._ensure_loaded():
+                self.hits += 1
+            else:
+                self.misses += 1
+            return self._data.get(key, default)
+
+    def set(self, key, value):
+        """Write-through update after the caller has persisted the change."""
+        with self._lock:
+            if self._data is not None:
+                self._data[key] = value
+
+    def pop(self, key):
+        with self._lock:
+            if self._data is not None:
+                self._data.pop(key, None)
+
+    def invalidate(self):
+        with self._lock:
+            self._data = None
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "loads": self.loads,
+                "size": len(self._data) if self._data is not None else 0,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "round_trips_saved": self.hits,
+            }
+
+
+def cache_stats() -> Dict[str, dict]:
+    """Counters for every registered cache, keyed by cache name."""
+    return {name: cache.stats() for name, cache in _registry.items()}
+
 
 def is_skipped(symbol: str) -> bool:
-    if symbol in seen_skips:
-        return True
-    session = SessionLocal()
-    try:
-        exists = session.query(SkiplistStock).filter_by(stock=symbol).first() is not None
-        if exists:
-            seen_skips.add(symbol)
-        return exists
-    finally:
-        session.close()
\ No newline at end of file
+    from core.skiplist.skiplist import is_in_skiplist
+    return is_in_skiplist(symbol, silent=True)